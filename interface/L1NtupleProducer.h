@@ -24,6 +24,7 @@
 
 #include <memory>
 #include <string>
+#include <vector>
 
 //----------------------
 // Framework Headers --
@@ -68,6 +69,8 @@
 
 class TFile;
 class TTree;
+class TBranch;
+class TH1F;
 
 
 class L1NtupleProducer : public edm::EDAnalyzer {
@@ -87,6 +90,8 @@ class L1NtupleProducer : public edm::EDAnalyzer {
   private:
       
       void book();
+      void bookBranch(const char* name, const char* classname, void* address);
+      void reportSizes();
       void initCSCTF(); 
       void analyzeEvent(const edm::Event& e);
       void analyzeGenerator(const edm::Event& e);
@@ -100,6 +105,15 @@ class L1NtupleProducer : public edm::EDAnalyzer {
       void analyzeECAL(const edm::Event& e, const edm::EventSetup&);
       void analyzeHCAL(const edm::Event& e, const edm::EventSetup&);
 
+   // profiling of the subsystems (profile = True), the steps of analyze
+      enum ProfileStep { kEvent, kGenerator, kSimulation, kGMT, kGT, kGCT, kRCT,
+                         kDTTF, kCSCTF, kCALO, kFill, kNProfileSteps };
+      void bookProfile();
+      void startProfile();
+      void stopProfile(unsigned int step);
+      void profileBytes(long long bytes);
+      void writeProfile();
+
    // Event info
     
       L1Analysis::L1AnalysisEvent* pL1evt; 
@@ -185,9 +199,30 @@ class L1NtupleProducer : public edm::EDAnalyzer {
    //   
       edm::Service<TFileService> tfs_;
       TTree* tree_;
+   // L1Tree, then the subsystem trees with splitTrees
+      std::vector<TTree*> trees_;
+      bool splitTrees_;
     
       bool physVal_;
       bool verbose_;
+
+   // compression and baskets of the branches, size report at end of job
+      edm::ParameterSet treeSettings_;
+      bool sizeReport_;
+
+   // profiling
+      bool profile_;
+      double profileWall_;
+      double profileCpu_;
+      unsigned long long profileEvents_;
+      TBranch* profileBranch_[kNProfileSteps];
+      double profileSumWall_[kNProfileSteps];
+      double profileSumCpu_[kNProfileSteps];
+      double profileSumBytes_;
+      TH1F* hProfileWall_[kNProfileSteps];
+      TH1F* hProfileCpu_[kNProfileSteps];
+      TH1F* hProfileBytes_;
+      TTree* profileTree_;
       
       unsigned int maxGEN_;
       unsigned int maxGT_;
@@ -6,6 +6,7 @@
 #define L1Ntuple_h
 
 #include <vector>
+#include <map>
 #include <string>
 #include <iostream>
 #include <fstream>
@@ -15,6 +16,12 @@
 #include <TFile.h>
 #include <TTree.h>
 #include <TFriendElement.h>
+#include <TChainElement.h>
+#include <TTreeFormula.h>
+#include <TSystem.h>
+#include <TEnv.h>
+#include <TTreeCache.h>
+#include <TFileCacheRead.h>
 #include <TList.h>
 #include <TMatrix.h>
 #include <TH1D.h>
@@ -23,6 +30,8 @@
 #include <TH2F.h>
 #include <TCanvas.h>
 
+#include "core/BranchSelector.h"
+
 #include "L1AnalysisEventDataFormat.h"
 #include "L1AnalysisSimulationDataFormat.h"
 #include "L1AnalysisGCTDataFormat.h"
@@ -50,6 +59,9 @@ public:
   TChain          *ftreeExtra;
   TChain          *ftreeMenu;
   TChain          *ftreeEmuExtra;
+  // subsystem trees (L1GTTree, L1RCTTree, ...) of the ntuples written with
+  // splitTrees, friends of fChain which then holds the Event branch only
+  std::vector<TChain*> fsplit;
   Int_t            fCurrent; //!current Tree number in a TChain
 
   bool doreco;
@@ -58,6 +70,13 @@ public:
   bool dol1emuextra;
   bool dol1menu;
 
+  // TTreeCache per tree, sized for the compressed size of a few thousand
+  // entries, learning the branches to read on the first entries
+  bool dotreecache;
+  // asynchronous prefetching of the cache blocks, and asynchronous open of
+  // the next remote file of the chain
+  bool doprefetch;
+
   L1Analysis::L1AnalysisEventDataFormat        *event_;
   L1Analysis::L1AnalysisSimulationDataFormat   *simulation_;
   L1Analysis::L1AnalysisGCTDataFormat          *gct_;
@@ -93,14 +112,62 @@ public:
   void     Test2();
   Long64_t GetEntries();
 
+  // read only the entries of the certified lumisections of a JSON file,
+  // GetEntries, GetEntry and LoadTree then count the selected entries only
+  bool SetLumiMask(const std::string & jsonfile, const std::string & indexdir="lumiindex");
+  void ClearLumiMask();
+  Long64_t GetSelectedEntry(Long64_t entry);
+
+  // process only the entries [first, first+nentries) of the (selected)
+  // entries, nentries=-1 up to the end, e.g. a part of a file run by one
+  // of several jobs
+  void SetEntryRange(Long64_t first, Long64_t nentries=-1);
+
+  // read only the branches of a whitelist, in the L1Tree and the friend
+  // trees (see core/BranchSelector.h), e.g. {"run", "lumi", "tw1", "tw2", "tt"}
+  void SelectBranches(const std::vector<std::string> & branches);
+  bool SelectBranchesFromFile(const std::string & fname);
+  void ReadAllBranches();
+  void PrintBranches();
+
+  // bytes read, read calls and read calls outside the cache of each tree
+  // since Open, printed at the end
+  void PrintReadStats();
+
  private :
   bool CheckFirstFile();
   bool OpenWithoutInit();
   bool OpenNtupleList(const std::string & fname);
+  bool ReadLumiMask(const std::string & jsonfile);
+  bool IsCertified(int run, int lumi);
+  std::vector<TTree*> Trees();
+  TChain* TreeOf(const std::string & branch);
+  void SetupCache();
+  void CheckFileChange(Long64_t entry);
+  void AddReadStats(std::vector<Long64_t> & bytes, std::vector<Long64_t> & calls, std::vector<Long64_t> & misses);
+  std::string LumiIndexPath(const std::string & fname, const std::string & indexdir);
+  bool LumiIndexOfFile(const std::string & fname, Long64_t nentries, const std::string & indexdir, std::vector<Long64_t> & blocks);
 
   std::vector<std::string> listNtuples;
+  // subsystems of the trees of fsplit
+  std::vector<std::string> splitNames_;
   Long64_t nentries_;
   TFile* rf;
+
+  // certified lumisection ranges by run
+  std::map<int, std::vector<std::pair<int,int> > > lumiMask_;
+  // first entry of the selected blocks and number of selected entries before them
+  std::vector<Long64_t> selFirst_;
+  std::vector<Long64_t> selOffset_;
+  Long64_t nselected_;
+  bool useLumiMask_;
+  Long64_t rangeFirst_;
+  Long64_t rangeEntries_;
+
+  // read statistics of the files already closed, per tree of Trees()
+  std::vector<Long64_t> bytesRead_;
+  std::vector<Long64_t> readCalls_;
+  std::vector<Long64_t> cacheMisses_;
 };
 
 #endif
@@ -26,6 +26,8 @@
 #include <TCanvas.h>
 #include <TFileSet.h>
 
+#include "core/BranchSelector.h"
+
 #include "L1AnalysisEventDataFormat.h"
 #include "L1AnalysisGTDataFormat.h"
 
@@ -34,6 +36,8 @@ class L1GtNtuple {
 public:
   
 TChain          *fChain;   //!pointer to the analyzed TTree or TChain
+  // L1GTTree of the ntuples written with splitTrees, friend of fChain, else 0
+  TChain          *fgt;
   
   
   L1Analysis::L1AnalysisEventDataFormat        *event_;
@@ -76,11 +80,13 @@ Long64_t L1GtNtuple::GetEntries()
 
 L1GtNtuple::L1GtNtuple()
 {
+  fChain=0; fgt=0;
   //doreco=true; domuonreco=true; dol1extra=true;
 }
 
 L1GtNtuple::L1GtNtuple(const std::string & fname)
 {
+  fChain=0; fgt=0;
   //doreco=true; domuonreco=true; dol1extra=true;
   Open(fname);
 }
@@ -162,6 +168,7 @@ bool L1GtNtuple::CheckFirstFile()
 bool L1GtNtuple::OpenWithoutInit()
 {
 	fChain = new TChain("l1NtupleProducer/L1Tree");
+	std::vector<std::string> files;
  	
 	std::cout << "Dir: " << directory_ << std::endl;
 	TFileSet set2(directory_);
@@ -181,14 +188,27 @@ bool L1GtNtuple::OpenWithoutInit()
 		{
 			std::cout << "Add to chain: " << fname << std::endl;
 			fChain->Add(fname.c_str());
+			files.push_back(fname);
 		}
 	}
 
+	// the GT words in their own tree when the first file has one
+	TFile * first = files.size()>0 ? TFile::Open(files[0].c_str()) : 0;
+	if (first && first->Get("l1NtupleProducer/L1GTTree"))
+	{
+		std::cout << "L1GTTree is found ..." << std::endl;
+		fgt = new TChain("l1NtupleProducer/L1GTTree");
+		for (unsigned int i=0; i<files.size(); i++) fgt->Add(files[i].c_str());
+		fChain->AddFriend(fgt);
+	}
+	if (first) delete first;
+
 	return true;
 }
 
 L1GtNtuple::~L1GtNtuple()
 {
+	if (fgt) delete fgt;
 	delete fChain;
 }
 
@@ -237,7 +257,14 @@ void L1GtNtuple::Init()
    std::cout<<"Setting branch addresses for L1Tree...  "<<std::flush;
    
    fChain->SetBranchAddress("Event", &event_ );
-   fChain->SetBranchAddress("GT",    &gt_    );
+   (fgt ? fgt : fChain)->SetBranchAddress("GT", &gt_);
+
+   // the rate macros use only the run, the lumisection and the GT words,
+   // the other branches are not read
+   const char * used[] = {"run", "lumi", "tw1", "tw2", "tt"};
+   std::vector<TTree*> trees(1, fChain);
+   if (fgt) trees.push_back(fgt);
+   SelectBranches(trees, std::vector<std::string>(used, used+5));
    
 }
 
@@ -2,8 +2,11 @@
 #define __TREE_H__
 
 #include <string>
+#include <vector>
 #include <iostream>
-//#include "TTree.h"
+#include <fstream>
+#include "TTree.h"
+#include "TLeaf.h"
 //#include "TFriendElement.h"
 //#include "TList.h"
 
@@ -13,6 +16,82 @@ Int_t SetBranchAddress(TTree * tree, const std::string & name,
 TBranch * GetBranch(TTree * tree, const std::string & name, const std::string & mother);
 
 
+// Branch activation : only the branches of a whitelist are read by
+// GetEntry, the others are disabled with SetBranchStatus. The names are
+// the ones of SetBranchStatus, with wildcards : "GT" for a whole data
+// format struct, "tw1" for one of its members. The selected branches
+// make the read list of the TTreeCache of each tree.
+
+// whitelist of a file, one branch per line, # for comments
+inline std::vector<std::string> ReadBranchList(const std::string & fname)
+{
+  std::vector<std::string> branches;
+  std::ifstream flist(fname.c_str());
+  if (!flist)
+    {
+      std::cout << "File "<<fname<<" is not found !"<<std::endl;
+      return branches;
+    }
+  std::string str;
+  while (flist >> str)
+    {
+      if (str[0]=='#') { std::getline(flist,str); continue; }
+      branches.push_back(str);
+    }
+  return branches;
+}
+
+inline void SelectBranches(const std::vector<TTree*> & trees, const std::vector<std::string> & branches,
+                           Long64_t cachesize=10000000)
+{
+  for (size_t t=0;t<trees.size();t++) trees[t]->SetBranchStatus("*",0);
+
+  for (size_t i=0;i<branches.size();i++)
+    {
+      UInt_t found=0;
+      for (size_t t=0;t<trees.size();t++)
+	{
+	  UInt_t intree=0;
+	  trees[t]->SetBranchStatus(branches[i].c_str(),1,&intree);
+	  if (intree==0) continue;
+	  found+=intree;
+	  if (trees[t]->GetCacheSize()==0) trees[t]->SetCacheSize(cachesize);
+	  trees[t]->AddBranchToCache(branches[i].c_str(),kTRUE);
+	}
+      if (found==0) std::cout << "WARNING unknown branch -> "<<branches[i]<<std::endl;
+    }
+}
+
+inline void ReadAllBranches(const std::vector<TTree*> & trees)
+{
+  for (size_t t=0;t<trees.size();t++)
+    {
+      trees[t]->SetBranchStatus("*",1);
+      if (trees[t]->GetCacheSize()>0) trees[t]->AddBranchToCache("*",kTRUE);
+    }
+}
+
+// compressed bytes of the read branches in the current file of each tree
+inline void PrintBranches(const std::vector<TTree*> & trees)
+{
+  for (size_t t=0;t<trees.size();t++)
+    {
+      TObjArray * leaves = trees[t]->GetListOfLeaves();
+      if (leaves==0) continue;
+      Long64_t total=0, read=0;
+      for (Int_t i=0;i<leaves->GetEntriesFast();i++)
+	{
+	  TBranch * branch = ((TLeaf*) leaves->UncheckedAt(i))->GetBranch();
+	  total+=branch->GetZipBytes();
+	  if (!trees[t]->GetBranchStatus(branch->GetName())) continue;
+	  read+=branch->GetZipBytes();
+	  std::cout << "  " << trees[t]->GetName() << " : " << branch->GetName() << " " << branch->GetZipBytes() << " bytes" << std::endl;
+	}
+      std::cout << trees[t]->GetName() << " : " << read << " bytes read out of " << total << std::endl;
+    }
+}
+
+
 #endif
 
 #ifdef l1ntuple_cxx
@@ -41,7 +120,7 @@ TBranch * GetBranch(TTree * tree, const std::string & name, const std::string &
       Int_t nb3=fBranches3->GetEntriesFast();
       for (Int_t i3=0;i3<nb3;i3++)
       {
-         TBranch * br3 = (TBranch*) fBranches3->UncheckedAt(i);
+         TBranch * br3 = (TBranch*) fBranches3->UncheckedAt(i3);
          TBranch * brmum3 = br3->GetMother();
          if (brmum3==0) continue;
          if (std::string(br3->GetName())==name && std::string(brmum3->GetName())==mother)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+
+# run an analysis class (L1JetAnalysis, L1EnergySumAnalysis, ...) over a
+# file list with local processes instead of the batch queue : the files,
+# and the large files by entry ranges, are split into jobs each run by a
+# "pyRun.py --file" process, the histograms of the jobs are merged at the
+# end. A job fails if its process fails or writes no output, the failed
+# jobs are reported and left out of the merge
+
+import os
+import sys
+import getopt
+import subprocess
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+PYRUN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pyRun.py")
+
+
+def usage():
+    print("Usage : pyLocal.py [ options ] <Analysis> <file list> <output.root>")
+    print("  -j : number of worker processes (default : number of cores)")
+    print("  -n : maximum number of entries per job, 0 for one job per file (default : 0)")
+    print("  -d : directory of the outputs of the jobs (default : <output>.jobs)")
+    print("  -k : keep the outputs of the jobs")
+    print("")
+
+
+def countEntries(fname):
+    import ROOT
+    f = ROOT.TFile.Open(fname)
+    tree = f.Get("l1NtupleProducer/L1Tree") if f else None
+    if not tree:
+        print("Cannot read "+fname+", it is run as one job")
+        return 0
+    nentries = tree.GetEntries()
+    f.Close()
+    return nentries
+
+
+def runJob(job):
+    """ (job, error or None), the output of the process in <output>.log """
+    fname, Analysis, output, first, nevents = job
+    log = open(output+".log", "w")
+    code = subprocess.call([sys.executable, PYRUN, "--file", fname, Analysis, output, str(first), str(nevents)],
+                           stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    if code != 0:
+        return job, "exit code %d" % code
+    if not os.path.exists(output):
+        return job, "no output"
+    os.remove(output+".log")
+    return job, None
+
+
+def splitJobs(files, nentries, maxentries):
+    """ (file, first entry, number of entries) of the jobs, -1 for all the
+    entries of a file """
+    jobs = []
+    for fname, n in zip(files, nentries):
+        if maxentries <= 0 or n <= maxentries:
+            jobs.append((fname, 0, -1))
+            continue
+        njobs = (n+maxentries-1)//maxentries
+        size = (n+njobs-1)//njobs
+        for first in range(0, n, size):
+            jobs.append((fname, first, min(size, n-first)))
+    return jobs
+
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "hj:n:d:k")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
+
+nproc = cpu_count()
+maxentries = 0
+jobdir = None
+keep = False
+
+for opt, arg in opts:
+    if opt == "-h":
+        usage()
+        sys.exit()
+    if opt == "-j":
+        nproc = int(arg)
+    if opt == "-n":
+        maxentries = int(arg)
+    if opt == "-d":
+        jobdir = arg
+    if opt == "-k":
+        keep = True
+
+if len(args) < 3:
+    usage()
+    sys.exit(2)
+
+Analysis = args[0]
+flist = open(args[1])
+files = [line.strip() for line in flist if line.strip() != ""]
+flist.close()
+output = args[2]
+if jobdir is None:
+    jobdir = output+".jobs"
+if not os.path.isdir(jobdir):
+    os.makedirs(jobdir)
+
+# compile the analysis into the library cache of pyRun before the jobs load it
+if subprocess.call([sys.executable, PYRUN, "--compile", Analysis]) != 0:
+    print("Cannot compile "+Analysis)
+    sys.exit(1)
+
+nentries = [countEntries(fname) for fname in files] if maxentries > 0 else [0]*len(files)
+jobs = [(fname, Analysis, os.path.join(jobdir, "%d_%s" % (i, os.path.basename(fname))), first, n)
+        for i, (fname, first, n) in enumerate(splitJobs(files, nentries, maxentries))]
+print("%d files, %d jobs on %d processes" % (len(files), len(jobs), nproc))
+pool = ThreadPool(nproc)
+done = []
+failed = []
+for job, error in pool.imap_unordered(runJob, jobs):
+    if error is None:
+        done.append(job)
+    else:
+        failed.append(job)
+        print("Job on %s (entries %d, %d) failed : %s, see %s.log" % (job[0], job[3], job[4], error, job[2]))
+    print("%d/%d jobs done, %d failed" % (len(done)+len(failed), len(jobs), len(failed)))
+pool.close()
+pool.join()
+
+if len(done) == 0:
+    print("All the jobs failed")
+    sys.exit(1)
+import ROOT
+merger = ROOT.TFileMerger(False)
+merger.OutputFile(output)
+for job in done:
+    merger.AddFile(job[2])
+if not merger.Merge():
+    print("Merging of the outputs in "+jobdir+" failed")
+    sys.exit(1)
+if not keep:
+    for job in done:
+        os.remove(job[2])
+    if len(os.listdir(jobdir)) == 0:
+        os.rmdir(jobdir)
+print("Output written to "+output)
+if len(failed) > 0:
+    print("%d jobs failed, their files are missing from the output :" % len(failed))
+    for job in failed:
+        print("  %s (entries %d, %d)" % (job[0], job[3], job[4]))
+    sys.exit(1)
@@ -1,22 +1,156 @@
 import ROOT as r
-import sys
-
-inpu = file("./dec22List.txt","r")
-#inpu = file("./incompList.txt","r")
-flist = inpu.readlines()
-print len(flist)
-idx = sys.argv[1]
-Analysis = sys.argv[2]
-
-f =  flist[int(idx)]
-print Analysis
-outDir = sys.argv[3]
-r.gROOT.ProcessLine(".x ~/cms03/CMSSW_4_1_3_patch3/src/UserCode/L1TriggerDPG/macros/initL1Analysis.C")
-fi = f.strip()
-r.gROOT.ProcessLine(".L ./"+str(Analysis) +".C+")
-if Analysis == "L1EnergySumAnalysis": m = r.L1EnergySumAnalysis()
-if Analysis == "L1JetAnalysis" : m = r.L1JetAnalysis()
-if Analysis == "L1JetAnalysis_2011" : m = r.L1JetAnalysis_2011()
-m.Open(fi)
-m.run(-1,str(outDir)+"/"+str(fi).rpartition("/")[2])
-m.Delete()
+import sys, os, re, time, glob, shutil, hashlib, socket, errno
+
+INIT = os.path.expanduser("~/cms03/CMSSW_4_1_3_patch3/src/UserCode/L1TriggerDPG/macros/initL1Analysis.C")
+MACROS = os.path.dirname(INIT)
+# where the includes of the macros are searched, after the directory of the includer
+INCLUDES = [MACROS, os.path.join(MACROS, "core"), os.path.join(MACROS, "..", "interface")]
+# shared libraries of the macros, by content hash, shared by the jobs
+LIBCACHE = os.environ.get("L1ANALYSIS_LIBCACHE", "./libcache")
+
+_loaded = {}
+
+def initL1Analysis():
+  r.gROOT.ProcessLine(".x "+INIT)
+
+def sourceFiles(source, found=None):
+  # the macro and the local files it includes, recursively
+  if found is None: found = []
+  source = os.path.abspath(source)
+  if source in found: return found
+  found.append(source)
+  for line in open(source):
+    inc = re.match(r'\s*#\s*include\s*"([^"]+)"', line)
+    if not inc: continue
+    for d in [os.path.dirname(source)] + INCLUDES:
+      path = os.path.join(d, inc.group(1))
+      if os.path.isfile(path):
+        sourceFiles(path, found)
+        break
+  return found
+
+def libraryKey(source):
+  # hash of the macro, of the files it includes, of macros/core/*.h and of the ROOT version
+  files = sourceFiles(source)
+  for f in sorted(glob.glob(os.path.join(MACROS, "core", "*.h"))):
+    if os.path.abspath(f) not in files: files.append(os.path.abspath(f))
+  h = hashlib.sha1(r.gROOT.GetVersion().encode())
+  for f in files:
+    h.update(open(f, "rb").read())
+  return h.hexdigest()[:16]
+
+def staleLock(lock, maxage):
+  # the job holding the lock is gone : its process is dead if it runs on
+  # this host, else the lock is older than maxage
+  try:
+    host, pid = open(os.path.join(lock, "owner")).read().split()
+  except (IOError, OSError, ValueError):
+    host, pid = None, None
+  if host == socket.gethostname():
+    try:
+      os.kill(int(pid), 0)
+    except OSError as e:
+      return e.errno == errno.ESRCH
+    return False
+  try:
+    return time.time()-os.path.getmtime(lock) > maxage
+  except OSError:
+    return False
+
+def loadLibrary(source, timeout=1800):
+  # load the library of a macro from LIBCACHE/<name>_<hash>. The first job
+  # to need it compiles it while the others wait, a change of the macro or
+  # of its includes gives a new hash. The lock of a job killed while
+  # compiling is broken
+  if source in _loaded: return _loaded[source]
+  name = os.path.splitext(os.path.basename(source))[0]
+  libdir = os.path.abspath(os.path.join(LIBCACHE, name+"_"+libraryKey(source)))
+  lib = os.path.join(libdir, name+"_C."+r.gSystem.GetSoExt())
+  lock = libdir+".lock"
+  start = time.time()
+  while not os.path.exists(lib):
+    try:
+      os.makedirs(lock)
+    except OSError:
+      if staleLock(lock, timeout/2):
+        print("Breaking the stale lock "+lock)
+        stale = lock+".stale%d" % os.getpid()
+        try:
+          os.rename(lock, stale)
+          shutil.rmtree(stale)
+        except OSError:
+          pass
+        start = time.time()
+        continue
+      if time.time()-start > timeout: raise RuntimeError("timeout waiting for "+lock)
+      time.sleep(5)
+      continue
+    tmp = libdir+".tmp%d" % os.getpid()
+    try:
+      owner = open(os.path.join(lock, "owner"), "w")
+      owner.write("%s %d\n" % (socket.gethostname(), os.getpid()))
+      owner.close()
+      if not os.path.exists(lib):
+        print("Compiling "+source+" into "+libdir)
+        os.makedirs(tmp)
+        # compile only, the library is loaded from libdir below
+        if not r.gSystem.CompileMacro(os.path.abspath(source), "kc", os.path.join(tmp, name+"_C")):
+          raise RuntimeError("cannot compile "+source)
+        os.rename(tmp, libdir)
+    finally:
+      if os.path.isdir(tmp): shutil.rmtree(tmp)
+      shutil.rmtree(lock, True)
+  if r.gSystem.Load(lib) < 0: raise RuntimeError("cannot load "+lib)
+  _loaded[source] = lib
+  return lib
+
+def loadAnalysis(Analysis):
+  # L1JetAnalysis, L1EnergySumAnalysis, ... compiled once from ./<Analysis>.C
+  loadLibrary("./"+str(Analysis)+".C")
+  return getattr(r, Analysis)()
+
+def runFile(fi, Analysis, output, first=0, nevents=-1):
+  # run the analysis on the entries [first, first+nevents) of a file
+  m = loadAnalysis(Analysis)
+  m.Open(fi)
+  if first > 0 or nevents >= 0: m.SetEntryRange(first, nevents)
+  m.run(-1, output)
+  m.Delete()
+
+def runChunk(arrayFile, task, Analysis, outDir):
+  # task of a job array of subber.py : the files of the chunk of the task,
+  # then the chunk is marked as done
+  chunk = open(arrayFile).read().split()[int(task)-1]
+  chunkFile = os.path.join(outDir, "chunks", "chunk_"+chunk)
+  files = [l.strip() for l in open(chunkFile+".txt") if l.strip() != ""]
+  initL1Analysis()
+  for fi in files:
+    runFile(fi, Analysis, str(outDir)+"/"+str(fi).rpartition("/")[2])
+  open(chunkFile+".done", "w").close()
+
+if __name__ == "__main__" and sys.argv[1] == "--array":
+  # pyRun.py --array <array file> <Analysis> <outDir>, task from SGE_TASK_ID
+  runChunk(sys.argv[2], os.environ["SGE_TASK_ID"], sys.argv[3], sys.argv[4])
+elif __name__ == "__main__" and sys.argv[1] == "--compile":
+  # pyRun.py --compile <Analysis> : fill the library cache only
+  initL1Analysis()
+  loadLibrary("./"+sys.argv[2]+".C")
+elif __name__ == "__main__" and sys.argv[1] == "--file":
+  # pyRun.py --file <file> <Analysis> <output> [ <first> <nevents> ]
+  initL1Analysis()
+  rng = [int(a) for a in sys.argv[5:7]]
+  runFile(sys.argv[2], sys.argv[3], sys.argv[4], *rng)
+elif __name__ == "__main__":
+  inpu = open("./dec22List.txt","r")
+  #inpu = open("./incompList.txt","r")
+  flist = inpu.readlines()
+  print(len(flist))
+  idx = sys.argv[1]
+  Analysis = sys.argv[2]
+
+  f =  flist[int(idx)]
+  print(Analysis)
+  outDir = sys.argv[3]
+  initL1Analysis()
+  fi = f.strip()
+  runFile(fi, Analysis, str(outDir)+"/"+str(fi).rpartition("/")[2])
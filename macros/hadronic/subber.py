@@ -1,9 +1,159 @@
-#!/vols/sl5_exp_software/cms/slc5_amd64_gcc434/cms/cmssw-patch/CMSSW_4_1_3_patch3/external/slc5_amd64_gcc434/bin/python
-
-import ROOT as r
-import sys, os
-inpu = file("./dec22List.txt","r")
-#inpu = file("./incompList.txt","r")
-flist = inpu.readlines()
-for i in range(0,len(flist)):
-  os.system("qsub -q hepmedium.q subScript.sh "+str(i)+" " + sys.argv[1] +" "+sys.argv[2])
+#!/usr/bin/env python
+
+# submit an analysis over a file list as one job array : the files are
+# grouped into chunks of about the same total size, each task of the array
+# runs pyRun.py on the files of one chunk (pyRun.py --array). The chunks
+# are tracked in <outDir>/jobs.json, -s shows their status and -r submits
+# again the chunks whose job ended without marking them as done
+
+import os, sys, re, json, time, heapq, getopt, subprocess
+
+def usage():
+  print("Usage : subber.py [ options ] <Analysis> <outDir>")
+  print("  -l : file list (default : ./dec22List.txt)")
+  print("  -n : number of chunks (default : 100)")
+  print("  -q : queue (default : hepmedium.q)")
+  print("  -f : fake scheduler running the tasks on this machine with this command (e.g. \"python pyRun.py\")")
+  print("  -s : status of the chunks")
+  print("  -r : resubmit the failed chunks")
+  print("")
+
+class SGE(object):
+  def __init__(self, queue):
+    self.queue = queue
+
+  def submit(self, ntasks, args):
+    out = subprocess.Popen(["qsub", "-q", self.queue, "-t", "1-%d" % ntasks, "subScript.sh"] + args,
+                           stdout=subprocess.PIPE).communicate()[0].decode()
+    # Your job-array 12345.1-10:1 ("subScript.sh") has been submitted
+    job = re.search(r"job(-array)? (\d+)", out)
+    if not job: raise RuntimeError("qsub failed : "+out)
+    return job.group(2)
+
+  def running(self, jobid):
+    devnull = open(os.devnull, "w")
+    return subprocess.call(["qstat", "-j", jobid], stdout=devnull, stderr=devnull) == 0
+
+class FakeScheduler(object):
+  # runs the tasks of an array one after the other on this machine, for tests
+  def __init__(self, command):
+    self.command = command.split()
+
+  def submit(self, ntasks, args):
+    for task in range(1, ntasks+1):
+      env = dict(os.environ)
+      env["SGE_TASK_ID"] = str(task)
+      subprocess.call(self.command + args, env=env)
+    return "fake%d" % int(time.time()*1000)
+
+  def running(self, jobid):
+    return False
+
+def fileSize(fname):
+  if os.path.exists(fname): return os.path.getsize(fname)
+  import ROOT as r
+  f = r.TFile.Open(fname)
+  if not f: return 0
+  size = f.GetSize()
+  f.Close()
+  return size
+
+def balancedChunks(files, sizes, nchunks):
+  # files in nchunks chunks of about the same total size : the largest
+  # files first, each one to the lightest chunk
+  nchunks = max(1, min(nchunks, len(files)))
+  heap = [(0, i) for i in range(nchunks)]
+  chunks = [[] for i in range(nchunks)]
+  for j in sorted(range(len(files)), key=lambda j: -sizes[j]):
+    total, i = heapq.heappop(heap)
+    chunks[i].append(j)
+    heapq.heappush(heap, (total+sizes[j], i))
+  return [[files[j] for j in sorted(chunk)] for chunk in chunks]
+
+def submitArray(scheduler, state, outDir, chunks):
+  # one job array whose task k runs the chunk on the line k of its array file
+  arrayFile = os.path.join(outDir, "array_%d.txt" % len(state["arrays"]))
+  out = open(arrayFile, "w")
+  out.write("\n".join([str(chunk) for chunk in chunks])+"\n")
+  out.close()
+  jobid = scheduler.submit(len(chunks), ["--array", arrayFile, state["analysis"], outDir])
+  state["arrays"].append({"id" : jobid, "file" : arrayFile, "chunks" : chunks})
+  print("Job array %s : %d chunks" % (jobid, len(chunks)))
+
+def chunkStatus(scheduler, state, outDir):
+  # done, running or failed, by chunk, from the last array of each chunk
+  last = {}
+  for array in state["arrays"]:
+    for chunk in array["chunks"]:
+      last[chunk] = array["id"]
+  running = dict([(jobid, scheduler.running(jobid)) for jobid in set(last.values())])
+  status = {}
+  for chunk in range(state["nchunks"]):
+    if os.path.exists(os.path.join(outDir, "chunks", "chunk_%d.done" % chunk)):
+      status[chunk] = "done"
+    elif running[last[chunk]]:
+      status[chunk] = "running"
+    else:
+      status[chunk] = "failed"
+  return status
+
+try:
+  opts, args = getopt.getopt(sys.argv[1:], "hl:n:q:f:sr")
+except getopt.GetoptError:
+  usage()
+  sys.exit(2)
+
+flistName = "./dec22List.txt"
+nchunks = 100
+queue = "hepmedium.q"
+fake = None
+status = False
+resubmit = False
+
+for opt, arg in opts:
+  if opt == "-h":
+    usage()
+    sys.exit()
+  if opt == "-l": flistName = arg
+  if opt == "-n": nchunks = int(arg)
+  if opt == "-q": queue = arg
+  if opt == "-f": fake = arg
+  if opt == "-s": status = True
+  if opt == "-r": resubmit = True
+
+if len(args) < 2:
+  usage()
+  sys.exit(2)
+
+Analysis, outDir = args[0], args[1]
+scheduler = SGE(queue) if fake is None else FakeScheduler(fake)
+stateFile = os.path.join(outDir, "jobs.json")
+
+if status or resubmit:
+  state = json.load(open(stateFile))
+  chunks = chunkStatus(scheduler, state, outDir)
+  for name in ["done", "running", "failed"]:
+    print("%-8s %d chunks" % (name, list(chunks.values()).count(name)))
+  failed = sorted([chunk for chunk in chunks if chunks[chunk] == "failed"])
+  if resubmit and len(failed) > 0:
+    submitArray(scheduler, state, outDir, failed)
+else:
+  if os.path.exists(stateFile):
+    print(outDir+" already has jobs, use -s or -r")
+    sys.exit(1)
+  inpu = open(flistName, "r")
+  flist = [line.strip() for line in inpu if line.strip() != ""]
+  inpu.close()
+  if not os.path.isdir(os.path.join(outDir, "chunks")):
+    os.makedirs(os.path.join(outDir, "chunks"))
+  chunkLists = balancedChunks(flist, [fileSize(fname) for fname in flist], nchunks)
+  for i, files in enumerate(chunkLists):
+    out = open(os.path.join(outDir, "chunks", "chunk_%d.txt" % i), "w")
+    out.write("\n".join(files)+"\n")
+    out.close()
+  state = {"analysis" : Analysis, "nchunks" : len(chunkLists), "arrays" : []}
+  submitArray(scheduler, state, outDir, list(range(len(chunkLists))))
+
+out = open(stateFile, "w")
+json.dump(state, out, indent=1)
+out.close()
@@ -1,93 +1,217 @@
-#!/usr/bin/env python 
+#!/usr/bin/env python
 from sys import stderr, exit
 import os
-import commands
-
-
-def parseFile(logfile, Table):
- print " ... parsing file: ",logfile
- TheLog = open(logfile)
- gl="go"
- line=0
- l0=-1
- idx=-1
- while gl:
-   gl = TheLog.readline()
-   line=line+1
-   if len(gl)>0:
-	if gl.find("rigReport Events total =")>=0:
-		total = gl.split()[4]
-		evtpass = gl.split()[7]
-		#print total, evtpass
-		if  Table.has_key("TOTAL"):
-		   Table["TOTAL"] = int(Table["TOTAL"]) + int(total)
-		else:
-		   Table["TOTAL"] = total
-                if  Table.has_key("PASS"):
-                   Table["PASS"] = int(Table["PASS"]) + int(evtpass)
-                else:
-                   Table["PASS"] = evtpass
-
-	
-	if gl.find("eport for L1 menu")>=0:
-	  l0  = line
-# --- the numbers below (esp. the "l0 + 88") may need to be changed 
-# --- depending on how many L1 bits were emulated in the menu...
-        if l0 > 0 and line >= l0+3 and line <= l0+88:
-	    idx = idx+1
-	    L1bit = gl.split()[0]
-	    nbevts = gl.split()[3]
-	    if  Table.has_key(L1bit):
-		Table[L1bit] = int(Table[L1bit]) + int(nbevts)
-	    else:
-		Table[L1bit] = nbevts
- TheLog.close()
-
-
-def parseLogs(directory, Table):
-  cmd='ls -1 ' + directory+'*.stdout   > list.txt'
-  print cmd
-  os.system('ls -1 ' + directory+'*.stdout   > list.txt')
-
-  ll = open('list.txt')
-  fl="go"
-  while fl:
-	fl=ll.readline()
- 	if len(fl)>0:
-		logfile = fl.split()[0]
-		#logfile = directory+logfile
-		parseFile(logfile, Table)
-  os.system('rm list.txt')
+import sys
+import csv
+import glob
+import json
+import getopt
+import multiprocessing
+
+
+def usage():
+  print "Usage : ParseLensLogs.py [ -j <nproc> ] [ -i <index file> ] [ -r ] [ -c <csv file> ] [ -s <json file> ] <log directory> ..."
+  print "  -j : number of log files parsed in parallel (default : number of cores)"
+  print "  -i : index of the already parsed log files (default : ParseLensLogs.index)"
+  print "       only the new or modified log files are parsed again"
+  print "  -r : ignore the index and parse all the log files"
+  print "  -c : write the summed counts to a CSV file"
+  print "  -s : write the summed counts to a JSON file"
+  print
+
+
+def isInt(word):
+  try:
+    int(word)
+  except ValueError:
+    return False
+  return True
+
+
+# a row of the L1 menu report : the L1 bit name followed by at least three
+# integer columns, the fourth word being the number of events passing the bit
+def isMenuRow(words):
+  if len(words) < 4: return False
+  for word in words[1:4]:
+    if not isInt(word): return False
+  return True
+
+
+def parseFile(logfile):
+  """ parse one log file, returns the TOTAL and PASS event counts and the
+  (L1 bit, events) of the "Report for L1 menu" tables in table order """
+  Counts = {"TOTAL" : 0, "PASS" : 0, "bits" : [], "menu" : False}
+  inMenu = False
+  inRows = False
+  TheLog = open(logfile)
+  for gl in TheLog:
+    if gl.find("rigReport Events total =")>=0:
+      words = gl.split()
+      Counts["TOTAL"] += int(words[4])
+      Counts["PASS"] += int(words[7])
+
+    if gl.find("eport for L1 menu")>=0:
+      inMenu = True
+      inRows = False
+      Counts["menu"] = True
+      continue
+
+    if inMenu:
+      # the table starts at the first row after the header and ends with the
+      # first line which is not a row, whatever the number of bits in the menu
+      words = gl.split()
+      if isMenuRow(words):
+        inRows = True
+        Counts["bits"].append((words[0], int(words[3])))
+      elif inRows:
+        inMenu = False
+  TheLog.close()
+  return logfile, Counts
+
+
+def addCounts(Table, Bits, Counts):
+  """ add the counts of one log file to Table, Bits keeps the order of the bits """
+  Table["TOTAL"] = Table.get("TOTAL", 0) + Counts["TOTAL"]
+  Table["PASS"] = Table.get("PASS", 0) + Counts["PASS"]
+  for L1bit, nbevts in Counts["bits"]:
+    if not Table.has_key(L1bit):
+      Table[L1bit] = 0
+      Bits.append(L1bit)
+    Table[L1bit] += nbevts
+
+
+def loadIndex(indexfile):
+  if not os.path.exists(indexfile):
+    return {}
+  f = open(indexfile)
+  Index = json.load(f)
+  f.close()
+  return Index
+
+
+def saveIndex(indexfile, Index):
+  f = open(indexfile+".tmp", "w")
+  json.dump(Index, f)
+  f.close()
+  os.rename(indexfile+".tmp", indexfile)
+
+
+def parseLogs(directories, nproc, indexfile, rebuild=False):
+  """ parse the log files of the directories and sum their counts.
+  The counts of each log file are kept in the index with its size and
+  modification time, only the log files not matching the index are parsed """
+  logfiles = []
+  for directory in directories:
+    logfiles.extend(sorted(glob.glob(os.path.join(directory, "*.stdout"))))
+
+  Index = {}
+  if not rebuild:
+    Index = loadIndex(indexfile)
+  # forget the log files which are gone
+  for logfile in Index.keys():
+    if not os.path.exists(logfile):
+      del Index[logfile]
+
+  Stats = {}
+  toparse = []
+  for logfile in logfiles:
+    st = os.stat(logfile)
+    Stats[logfile] = (st.st_size, st.st_mtime)
+    entry = Index.get(logfile)
+    if entry is None or entry["size"]!=st.st_size or entry["mtime"]!=st.st_mtime:
+      toparse.append(logfile)
+  print " ... "+str(len(logfiles)-len(toparse))+" log files in the index, parsing "+str(len(toparse))+" with "+str(nproc)+" processes"
+
+  if len(toparse) > 0:
+    pool = multiprocessing.Pool(nproc)
+    for logfile, Counts in pool.imap(parseFile, toparse, 16):
+      Index[logfile] = {"size" : Stats[logfile][0], "mtime" : Stats[logfile][1], "counts" : Counts}
+    pool.close()
+    pool.join()
+    saveIndex(indexfile, Index)
+
+  Table = {}
+  Bits = ["TOTAL", "PASS"]
+  for logfile in logfiles:
+    Counts = Index[logfile]["counts"]
+    if not Counts["menu"]:
+      print >> stderr, " ... no L1 menu report found in "+logfile
+    addCounts(Table, Bits, Counts)
+  return Table, Bits, len(logfiles)
+
+
+def writeCSV(filename, Table, Bits):
+  out = open(filename, "w")
+  writer = csv.writer(out)
+  writer.writerow(["bit", "events"])
+  for bit in Bits:
+    writer.writerow([bit, Table[bit]])
+  out.close()
+
+
+def writeJSON(filename, Table, Bits, nfiles):
+  out = open(filename, "w")
+  json.dump({"files" : nfiles,
+             "TOTAL" : Table.get("TOTAL", 0),
+             "PASS"  : Table.get("PASS", 0),
+             "bits"  : dict([(bit, Table[bit]) for bit in Bits[2:]])}, out, indent=1, sort_keys=True)
+  out.close()
 
 
 # -- for skim v3, only the PU10 files were skimmed.
 
-TablePU={}
-
 # --- Len's log files are sitting in lxplus442
 
 # -- skim over DATA :
 # directory="/tmp/apana/cern_r179828_ZeroBiasHPF0/res/"
-# parseLogs(directory,TablePU)
 # directory="/tmp/apana/cern_r179828_ZeroBiasHPF1/res/"
-# parseLogs(directory,TablePU)
 # directory="/tmp/apana/cern_r179828_ZeroBiasHPF2/res/"
-# parseLogs(directory,TablePU)
 # directory="/tmp/apana/cern_r179828_ZeroBiasHPF3/res/"
-# parseLogs(directory,TablePU)
 
 # -- skim over the 8 TeV MC
 directory="/tmp/apana/cern_MinBias_Fall11-Ave23_8TeV_50ns-v1/res/"
 
-# -- skim over the 7 TeV MC 
+# -- skim over the 7 TeV MC
 #directory="/tmp/apana/cern_MinBias_Fall11-E7TeV_Ave32_50ns-v2/res/"
 
-parseLogs(directory,TablePU)
-
-for bit in TablePU.keys():
-        n1=TablePU[bit]
-        print bit,"\t",n1
-
-
-
-
+if __name__ == "__main__":
+  try:
+    opts, args = getopt.getopt(sys.argv[1:], "hj:i:rc:s:")
+  except getopt.GetoptError:
+    usage()
+    exit(2)
+
+  nproc = multiprocessing.cpu_count()
+  indexfile = "ParseLensLogs.index"
+  rebuild = False
+  csvfile = ""
+  jsonfile = ""
+  for opt, arg in opts:
+    if opt=='-h':
+      usage()
+      exit()
+    if opt=='-j':
+      nproc = int(arg)
+    if opt=='-i':
+      indexfile = arg
+    if opt=='-r':
+      rebuild = True
+    if opt=='-c':
+      csvfile = arg
+    if opt=='-s':
+      jsonfile = arg
+
+  directories = args
+  if len(directories)==0:
+    directories = [directory]
+
+  TablePU, Bits, nfiles = parseLogs(directories, nproc, indexfile, rebuild)
+
+  for bit in Bits:
+    if TablePU.has_key(bit):
+      print bit,"\t",TablePU[bit]
+
+  if csvfile!="":
+    writeCSV(csvfile, TablePU, [bit for bit in Bits if TablePU.has_key(bit)])
+  if jsonfile!="":
+    writeJSON(jsonfile, TablePU, Bits, nfiles)
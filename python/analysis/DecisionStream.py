@@ -0,0 +1,181 @@
+"""
+Replay of prescale and mask columns on the recorded GT decisions, python
+counterpart of macros/L1Rates/L1PrescalesSimulator.C that reads the
+ntuples only once
+
+The tw1, tw2, tt words of the triggering crossing are recorded in a
+compact file : the distinct decision patterns, the pattern of each entry
+and the (run, lumisection) of the entries, run length encoded. Any number
+of prescale and mask columns are then replayed against it in memory, with
+counters (the n-th decision of a bit prescaled by p is kept when n/p
+reaches a new integer) or with seeded random numbers as the macro does :
+
+  from L1TriggerDPG.L1Ntuples.analysis.DecisionStream import DecisionStream, readPrescales
+  from L1TriggerDPG.L1Ntuples.analysis.TriggerBits import readBitMasks
+
+  stream = DecisionStream.Record(ntuple)
+  stream.Save("decisions.npz")
+
+  stream = DecisionStream.Load("decisions.npz")
+  masks = readBitMasks("macros/L1Rates/conf/bitmasks.dat")
+  for seed in range(100):
+      result = stream.Replay(readPrescales("macros/L1Rates/conf/prescales.dat"), masks, seed=seed)
+      print(result.Rate(scale))
+
+As in L1PrescalesSimulator::prescale, a bit with prescale p is kept with
+probability 1/p : -1 (conf/prescales.dat), 0 and the prescales up to 1
+leave it unprescaled, the other negative prescales remove it. Bits are
+disabled with the masks.
+"""
+
+import numpy as np
+
+from L1TriggerDPG.L1Ntuples.analysis.TriggerBits import NBITS, NWORDS, WORDS, triggerWords, readConfig
+from L1TriggerDPG.L1Ntuples.analysis.RateExtrapolation import lumiKey
+
+
+def readPrescales(filename):
+    """ prescale of the bits of conf/prescales.dat, by bit """
+    prescales = {}
+    for bit, prescale in readConfig(filename).items():
+        bit = int(bit)
+        if bit >= NBITS:
+            raise ValueError("DecisionStream : bit %d > 191 in %s" % (bit, filename))
+        prescales[bit] = float(prescale)
+    return prescales
+
+
+def patternBits(patterns):
+    """ (patterns, 192) bool array of the bits set in (patterns, 3) words """
+    bits = np.unpackbits(np.ascontiguousarray(patterns, dtype="<u8").view(np.uint8).reshape(-1, NWORDS*8, 1), axis=2)
+    return bits[:, :, ::-1].reshape(-1, NBITS).astype(bool)
+
+
+class ReplayResult(object):
+    """ entries kept per bit and entries accepted (at least one bit kept)
+    of a replayed column. lumis holds (run, lumisection, entries, accepted
+    entries) of the consecutive entries of the same lumisection """
+
+    def __init__(self, nentries, counts, lumis, accepted):
+        self.nentries = nentries
+        self.counts = counts
+        self.lumis = lumis
+        self.accepted = accepted
+
+    @property
+    def naccepted(self):
+        return int(self.accepted.sum())
+
+    def Rate(self, scale=1.):
+        """ fraction of the entries accepted, times scale """
+        return self.naccepted*scale/float(max(self.nentries, 1))
+
+    def Rates(self, scale=1.):
+        """ fraction of the entries kept by each bit, times scale """
+        return self.counts*scale/float(max(self.nentries, 1))
+
+
+class DecisionStream(object):
+
+    def __init__(self, patterns, index, lumis):
+        """ patterns : (patterns, 3) distinct words, index : pattern of each
+        entry, lumis : (run, lumisection, entries) of the consecutive
+        entries of the same lumisection """
+        self.patterns = np.asarray(patterns, dtype=np.uint64).reshape(-1, NWORDS)
+        self.index = np.asarray(index)
+        self.lumis = np.asarray(lumis, dtype=np.int64).reshape(-1, 3)
+        self.bits = patternBits(self.patterns)
+        self.patternCounts = np.bincount(self.index, minlength=len(self.patterns))
+        self.firing = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    @staticmethod
+    def FromWords(words, run, lumi):
+        """ stream of (entries, 3) tw1, tw2, tt words with the run and lumisection of the entries """
+        patterns, index = np.unique(np.asarray(words, dtype=np.uint64).reshape(-1, NWORDS), axis=0, return_inverse=True)
+        index = index.reshape(-1)
+        keys = lumiKey(run, lumi)
+        starts = np.concatenate(([0], np.nonzero(keys[1:] != keys[:-1])[0]+1)) if len(keys) > 0 else np.zeros(0, dtype=np.int64)
+        lengths = np.diff(np.append(starts, len(keys)))
+        lumis = np.stack((keys[starts] >> 32, keys[starts] & 0xffffffff, lengths), axis=1)
+        return DecisionStream(patterns, index.astype(np.uint16 if len(patterns) <= 65536 else np.uint32), lumis)
+
+    @staticmethod
+    def Record(ntuple, chunksize=100000, start=0, stop=None, bx=2):
+        """ stream of the entries [start, stop) of an L1Ntuple """
+        streams = [DecisionStream.FromWords(triggerWords(batch, bx), batch["run"], batch["lumi"])
+                   for batch in ntuple.Iterate(WORDS+["run", "lumi"], chunksize, start, stop)]
+        return DecisionStream.Concatenate(streams)
+
+    @staticmethod
+    def Concatenate(streams):
+        """ stream of the entries of the streams one after the other, e.g.
+        recorded on different files """
+        words = [stream.patterns[stream.index] for stream in streams]
+        lumis = [stream.lumis for stream in streams]
+        if len(words) == 0:
+            return DecisionStream(np.zeros((0, NWORDS), dtype=np.uint64), np.zeros(0, dtype=np.uint16), np.zeros((0, 3)))
+        run = np.concatenate([np.repeat(lumi[:, 0], lumi[:, 2]) for lumi in lumis])
+        lumi = np.concatenate([np.repeat(lumi[:, 1], lumi[:, 2]) for lumi in lumis])
+        return DecisionStream.FromWords(np.concatenate(words), run, lumi)
+
+    def Save(self, filename):
+        out = open(filename, "wb")
+        np.savez_compressed(out, patterns=self.patterns, index=self.index, lumis=self.lumis)
+        out.close()
+
+    @staticmethod
+    def Load(filename):
+        saved = np.load(filename)
+        return DecisionStream(saved["patterns"], saved["index"], saved["lumis"])
+
+    def Firing(self, bit):
+        """ entries with the bit set, in order (kept for the next replays) """
+        if bit not in self.firing:
+            self.firing[bit] = np.nonzero(self.bits[:, bit][self.index])[0]
+        return self.firing[bit]
+
+    def Replay(self, prescales, masks=None, seed=None, counters=False):
+        """ ReplayResult of a prescale column (prescale by bit, the other
+        bits unprescaled) after the masks (3 words, default : no mask),
+        prescaled with seeded random numbers or with counters """
+        enabled = np.ones(NBITS, dtype=bool)
+        if masks is not None:
+            enabled = patternBits(np.asarray(masks, dtype=np.uint64).reshape(1, NWORDS))[0]
+        prescaled = {}
+        for bit, prescale in prescales.items():
+            if prescale == -1 or 0 <= prescale <= 1:
+                continue
+            elif prescale < 0:
+                enabled[bit] = False
+            else:
+                prescaled[bit] = float(prescale)
+        free = enabled.copy()
+        free[list(prescaled.keys())] = False
+
+        # unprescaled bits, from the pattern counts
+        counts = np.dot(self.patternCounts, self.bits & free).astype(np.int64)
+        accepted = (self.bits & free).any(axis=1)[self.index]
+
+        random = np.random.RandomState(seed)
+        for bit in sorted(prescaled):
+            if not enabled[bit]:
+                continue
+            firing = self.Firing(bit)
+            if counters:
+                n = np.arange(1, len(firing)+1)
+                kept = firing[np.floor(n/prescaled[bit]) > np.floor((n-1)/prescaled[bit])]
+            else:
+                kept = firing[random.rand(len(firing)) <= 1./prescaled[bit]]
+            counts[bit] = len(kept)
+            accepted[kept] = True
+
+        starts = np.concatenate(([0], np.cumsum(self.lumis[:, 2])[:-1])).astype(np.int64)
+        perLumi = np.add.reduceat(accepted.astype(np.int64), starts) if len(self) > 0 else np.zeros(0, dtype=np.int64)
+        return ReplayResult(len(self), counts, np.concatenate((self.lumis, perLumi[:, None]), axis=1), accepted)
+
+    def ReplayColumns(self, columns, masks=None, seed=None, counters=False):
+        """ ReplayResult of each prescale column """
+        return [self.Replay(column, masks, seed, counters) for column in columns]
@@ -0,0 +1,99 @@
+"""
+Variable length column of the L1 ntuples : one numpy array holding the
+elements of all the entries ("content") and the number of elements of
+each entry ("counts"), as read from the std::vector branches.
+"""
+
+import numpy as np
+
+
+class JaggedArray(object):
+
+    def __init__(self, content, counts):
+        self.content = np.asarray(content)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.offsets = np.zeros(len(self.counts)+1, dtype=np.int64)
+        np.cumsum(self.counts, out=self.offsets[1:])
+        if self.offsets[-1] != len(self.content):
+            raise ValueError("JaggedArray : counts do not match the content length")
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return "JaggedArray(%d entries, %d elements, %s)" % (len(self), len(self.content), self.content.dtype)
+
+    def __getitem__(self, what):
+        """ elements of one entry, or a JaggedArray of the selected entries """
+        if isinstance(what, (int, np.integer)):
+            if what < 0:
+                what += len(self)
+            return self.content[self.offsets[what]:self.offsets[what+1]]
+        keep = np.zeros(len(self), dtype=bool)
+        keep[what] = True
+        return JaggedArray(self.content[keep[self.parents]], self.counts[keep])
+
+    @property
+    def parents(self):
+        """ entry of each element """
+        return np.repeat(np.arange(len(self)), self.counts)
+
+    @property
+    def index(self):
+        """ position of each element in its entry """
+        return np.arange(len(self.content)) - self.offsets[:-1][self.parents]
+
+    def mask(self, selected):
+        """ JaggedArray keeping only the elements for which selected is True """
+        selected = np.asarray(selected, dtype=bool)
+        counts = np.bincount(self.parents[selected], minlength=len(self))
+        return JaggedArray(self.content[selected], counts)
+
+    def apply(self, content):
+        """ JaggedArray of content (one value per element) with the structure of this one """
+        return JaggedArray(content, self.counts)
+
+    def pad(self, width=None, fill=0):
+        """ 2D array of the elements, one row per entry, cut or filled with fill
+        up to width columns (default : the largest number of elements) """
+        if width is None:
+            width = self.counts.max() if len(self) > 0 else 0
+        out = np.full((len(self), width), fill, dtype=np.result_type(self.content.dtype, np.asarray(fill).dtype))
+        index = self.index
+        inside = index < width
+        out[self.parents[inside], index[inside]] = self.content[inside]
+        return out
+
+    def max(self, default=0):
+        """ largest element of each entry, default for the empty entries """
+        out = np.full(len(self), default, dtype=np.result_type(self.content.dtype, np.asarray(default).dtype))
+        filled = self.counts > 0
+        if filled.any():
+            out[filled] = np.maximum.reduceat(self.content, self.offsets[:-1][filled])
+        return out
+
+    def sum(self):
+        """ sum of the elements of each entry """
+        out = np.zeros(len(self), dtype=np.result_type(self.content.dtype, np.int64))
+        filled = self.counts > 0
+        if filled.any():
+            out[filled] = np.add.reduceat(self.content, self.offsets[:-1][filled])
+        return out
+
+    def any(self):
+        """ True for the entries with at least one non zero element """
+        return np.bincount(self.parents[self.content != 0], minlength=len(self)) > 0
+
+    def argsortDescending(self):
+        """ permutation of the content sorting each entry by decreasing value,
+        elements with the same value keep their order """
+        return np.lexsort((np.arange(len(self.content)), -self.content.astype(np.float64), self.parents))
+
+    def nthLargest(self, n, default=-10.):
+        """ n-th largest element (n=1 is the largest) of each entry,
+        default for the entries with less than n elements """
+        out = np.full(len(self), default, dtype=np.float64)
+        ordered = self.content[self.argsortDescending()]
+        filled = self.counts >= n
+        out[filled] = ordered[self.offsets[:-1][filled]+n-1]
+        return out
@@ -0,0 +1,806 @@
+"""
+Vectorized L1 seeds, python counterpart of macros/L1AlgoFactory.h
+
+The seeds are evaluated for all the entries of a Batch of the columnar
+reader at once instead of one event at a time :
+
+  from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple
+  from L1TriggerDPG.L1Ntuples.analysis.L1AlgoFactory import L1AlgoFactory, COLUMNS
+
+  ntuple = L1Ntuple()
+  ntuple.OpenWithList("ntuples.txt")
+  for batch in ntuple.Iterate(COLUMNS):
+      factory = L1AlgoFactory(batch)
+      masks = factory.Evaluate([("L1_SingleMu16", "SingleMu", (16.,)),
+                                ("L1_DoubleEG_13_7", "DoubleEG", (13., 7.))])
+
+The methods have the names, arguments and results of the C++ ones : the
+...Pt methods give per entry the thresholds passed by the seed (-10 when it
+does not fire at all) and the boolean methods compare them to the cuts.
+The ...Pt results are cached per batch, the seeds of a menu differing only
+by their thresholds are computed once.
+
+The candidates are scanned in the order of the C++ loops, so that the ties,
+the protection against the double counting of the EG candidates and the
+selection of the correlated pairs give the same results.
+scripts/checkAlgoFactory.py compares both on sample ntuples.
+"""
+
+from collections import OrderedDict
+import numpy as np
+
+# columns needed by the seeds, the bunch crossing comes first for the candidates
+MUON_COLUMNS   = ["CandBx", "Pt", "Qual", "Eta", "Phi", "Cha"]
+EG_COLUMNS     = ["Bxel", "Rankel", "Phiel", "Etael", "Isoel"]
+JET_COLUMNS    = ["Bxjet", "Rankjet", "Etajet", "Phijet", "Taujet", "Fwdjet"]
+ISOTAU_COLUMNS = ["IsoTJetBx", "IsoTJetRnk", "IsoTJetEta"]
+SUM_COLUMNS    = ["RankETM", "RankHTT", "RankHTM", "RankETT", "PhiETM"]
+COLUMNS = MUON_COLUMNS + EG_COLUMNS + JET_COLUMNS + ISOTAU_COLUMNS + SUM_COLUMNS
+
+# value of the thresholds when the seed does not fire
+NONE = -10.
+
+PHIBINS = 18
+PHIBIN = np.array([10,30,50,70,90,110,130,150,170,190,210,230,250,270,290,310,330,350], dtype=np.float64)
+ETABIN = np.array([-5.,-4.5,-4.,-3.5,-3.,-2.172,-1.74,-1.392,-1.044,-0.696,-0.348,0.,0.348,0.696,1.044,1.392,1.74,2.172,3.,3.5,4.,4.5,5.])
+ETAMU = np.array([-2.45,-2.4,-2.35,-2.3,-2.25,-2.2,-2.15,-2.1,-2.05,-2,-1.95,-1.9,-1.85,-1.8,-1.75,-1.7,-1.6,-1.5,-1.4,-1.3,-1.2,-1.1,-1,-0.9,-0.8,-0.7,-0.6,-0.5,-0.4,-0.3,-0.2,-0.1,0,0.1,0.2,0.3,0.4,0.5,0.6,0.7,0.8,0.9,1,1.1,1.2,1.3,1.4,1.5,1.6,1.7,1.75,1.8,1.85,1.9,1.95,2,2.05,2.1,2.15,2.2,2.25,2.3,2.35,2.4,2.45])
+
+
+def binIndex(edges, values):
+    """ bin of the values in the edges, 0 outside the edges """
+    idx = np.searchsorted(edges, values, side="right") - 1
+    return np.where((idx >= 0) & (idx < len(edges)-1), idx, 0)
+
+
+def etaMuIdx(eta):
+    return binIndex(ETAMU, eta)
+
+
+def etaINjetCoord(eta):
+    return binIndex(ETABIN, eta)
+
+
+def degree(radian):
+    return np.where(radian < 0., 360.+(radian/np.pi*180.), radian/np.pi*180.)
+
+
+def phiINjetCoord(phi):
+    """ calorimeter phi bin of a muon, the bin 0 being centered on 0 degree """
+    phidegree = degree(phi)
+    idx = np.searchsorted(PHIBIN, phidegree, side="right")
+    return np.where((phidegree >= PHIBIN[-1]) | (phidegree <= PHIBIN[0]), 0, idx)
+
+
+def correlateInPhi(jetphi, muphi, delta=1):
+    dphi = np.abs(np.trunc(muphi) - np.trunc(jetphi))
+    return (dphi < abs(1 + delta)) | (dphi > abs(PHIBINS - 1 - delta))
+
+
+def correlateInEta(mueta, jeteta, delta=1):
+    return np.abs(np.trunc(mueta) - np.trunc(jeteta)) < 1 + delta
+
+
+def leading(values, selected, k=1):
+    """ the k largest selected values of each entry in decreasing order, -10
+    for the missing ones : the "if(pt >= pt1max) ... else if(pt >= pt2max)"
+    loops of the C++ methods """
+    out = np.full((len(values), k), NONE)
+    if values.shape[1] > 0:
+        ordered = -np.sort(-np.where(selected, values, NONE), axis=1)
+        m = min(k, ordered.shape[1])
+        out[:, :m] = np.maximum(ordered[:, :m], NONE)
+    return [out[:, i] for i in range(k)]
+
+
+def gate(fired, *values):
+    """ the values where the seed fired, -10 elsewhere """
+    if len(values) == 1:
+        return np.where(fired, values[0], NONE)
+    return tuple([np.where(fired, value, NONE) for value in values])
+
+
+def bestPair(first, second, correlated):
+    """ the selection of the correlated pairs : in the order the pairs are
+    found, a pair (i, j) replaces the best one if its first pt is larger,
+    or about the same with a larger second pt. correlated(i, j) tells for
+    each entry if the pair is correlated, returns (any pair, pt1, pt2) """
+    n, width = first.shape
+    corr = np.zeros(n, dtype=bool)
+    maxpt1 = np.full(n, NONE)
+    maxpt2 = np.full(n, NONE)
+    for i in range(width):
+        for j in range(second.shape[1]):
+            if i == j:
+                continue
+            pair = correlated(i, j)
+            pt1 = first[:, i]
+            pt2 = second[:, j]
+            better = pair & ((pt1 > maxpt1) | ((np.abs(maxpt1-pt1) < 10E-2) & (pt2 > maxpt2)))
+            maxpt1 = np.where(better, pt1, maxpt1)
+            maxpt2 = np.where(better, pt2, maxpt2)
+            corr |= pair
+    return corr, maxpt1, maxpt2
+
+
+class Candidates(object):
+    """ candidates of one collection in the bunch crossing 0, one row per
+    entry padded up to the largest multiplicity. n is the multiplicity in
+    all the bunch crossings, used by the early returns of the C++ methods """
+
+    def __init__(self, batch, bxcolumn, columns):
+        bx = batch[bxcolumn]
+        central = bx.content == 0
+        self.n = bx.counts
+        inbx = bx.mask(central)
+        self.width = int(inbx.counts.max()) if len(inbx) > 0 else 0
+        self.valid = inbx.apply(np.ones(len(inbx.content), dtype=bool)).pad(self.width, False)
+        self.columns = {}
+        for column in columns:
+            self.columns[column] = batch[column].mask(central).pad(self.width, 0).astype(np.float64)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+
+class L1AlgoFactory(object):
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.noHF = False
+        self.NOTauInJets = False
+        self._candidates = {}
+        self._results = {}
+
+    def setHF(self, isHF):
+        self.noHF = isHF
+
+    def setTau(self, isTauInJet):
+        self.NOTauInJets = isTauInJet
+
+    # ---- inputs
+
+    def candidates(self, columns):
+        if columns[0] not in self._candidates:
+            self._candidates[columns[0]] = Candidates(self.batch, columns[0], columns[1:])
+        return self._candidates[columns[0]]
+
+    @property
+    def muons(self):
+        return self.candidates(MUON_COLUMNS)
+
+    @property
+    def egs(self):
+        return self.candidates(EG_COLUMNS)
+
+    @property
+    def jets(self):
+        return self.candidates(JET_COLUMNS)
+
+    @property
+    def isotaus(self):
+        return self.candidates(ISOTAU_COLUMNS)
+
+    def energySum(self, column):
+        """ the energy sums are given by the GT in units of 0.5 GeV """
+        return np.asarray(self.batch[column], dtype=np.float64)/2.
+
+    def jetSelection(self, isCentral, cutHF):
+        """ jets of the bunch crossing 0, without the forward jets for the
+        central seeds, the tau jets when they are not counted as jets, and
+        |eta| > 3 when HF is off and cutHF is set """
+        jets = self.jets
+        selected = jets.valid.copy()
+        if isCentral:
+            selected &= jets["Fwdjet"] == 0
+        if self.NOTauInJets:
+            selected &= jets["Taujet"] == 0
+        if cutHF and self.noHF:
+            selected &= (jets["Etajet"] >= 5) & (jets["Etajet"] <= 17)
+        return selected
+
+    def jetPt(self):
+        return self.jets["Rankjet"]*4.
+
+    def muonMax(self, isER=False):
+        """ leading muon of single muon quality, |eta| < 2.1 for isER """
+        muons = self.muons
+        selected = muons.valid & (muons["Qual"] >= 4)
+        if isER:
+            selected &= np.abs(muons["Eta"]) <= 2.1
+        return leading(muons["Pt"], selected)[0]
+
+    def egMax(self, isIsolated=False, isER=False):
+        egs = self.egs
+        selected = egs.valid.copy()
+        if isIsolated:
+            selected &= egs["Isoel"] != 0
+        if isER:
+            selected &= (egs["Etael"] >= 4.5) & (egs["Etael"] <= 16.5)
+        return leading(egs["Rankel"], selected)[0]
+
+    def egScan(self):
+        """ two leading EG candidates, skipping the copies of the leading
+        one found in both the isolated and non isolated lists. Also gives
+        the eta < 2.17 flags and the isolation of the two candidates, the
+        isolation of the second one being assigned to the first as in the
+        C++ code """
+        egs = self.egs
+        n = len(egs.valid)
+        ele1pt = np.full(n, NONE)
+        ele2pt = np.full(n, NONE)
+        ele1phi = np.full(n, -1000.)
+        ele1eta = np.full(n, -1000.)
+        EG1_ER = np.zeros(n, dtype=bool)
+        EG2_ER = np.zeros(n, dtype=bool)
+        EG1_isol = np.zeros(n, dtype=bool)
+        EG2_isol = np.zeros(n, dtype=bool)
+        for ue in range(egs.width):
+            pt = egs["Rankel"][:, ue]
+            phi = egs["Phiel"][:, ue]
+            eta = egs["Etael"][:, ue]
+            iso = egs["Isoel"][:, ue] != 0
+            er = (eta > 4.5) & (eta < 16.5)
+            copy = (np.abs(pt-ele1pt) < 0.001) & (np.abs(phi-ele1phi) < 0.001) & (np.abs(eta-ele1eta) < 0.001)
+            active = egs.valid[:, ue] & ~copy
+            first = active & (pt >= ele1pt)
+            second = active & ~first & (pt >= ele2pt)
+            ele2pt = np.where(first, ele1pt, np.where(second, pt, ele2pt))
+            EG2_ER = np.where(first, EG1_ER, np.where(second, er, EG2_ER))
+            EG2_isol = np.where(first, EG1_isol, EG2_isol)
+            EG1_isol = np.where(first | second, iso, EG1_isol)
+            ele1pt = np.where(first, pt, ele1pt)
+            ele1phi = np.where(first, phi, ele1phi)
+            ele1eta = np.where(first, eta, ele1eta)
+            EG1_ER = np.where(first, er, EG1_ER)
+        return ele1pt, ele2pt, EG1_ER, EG2_ER, EG1_isol, EG2_isol
+
+    def egMaxEta(self, selected, eta0):
+        """ leading EG candidate and its eta, the last one of the equal
+        leading candidates as in the C++ loops """
+        egs = self.egs
+        n = len(egs.valid)
+        eleptmax = np.full(n, NONE)
+        elemaxeta = np.full(n, eta0)
+        for ue in range(egs.width):
+            pt = egs["Rankel"][:, ue]
+            better = selected[:, ue] & (pt >= eleptmax)
+            eleptmax = np.where(better, pt, eleptmax)
+            elemaxeta = np.where(better, egs["Etael"][:, ue], elemaxeta)
+        return eleptmax, elemaxeta
+
+    def muOpenPhi(self):
+        """ MuOpen candidates and their phi in calorimeter bins """
+        muons = self.muons
+        selected = muons.valid & ((muons["Qual"] >= 5) | (muons["Qual"] == 3)) & (muons["Pt"] >= 0.)
+        return selected, phiINjetCoord(muons["Phi"]).astype(np.float64)
+
+    def jetMuOpenMax(self):
+        """ leading jet within 2 calorimeter phi bins of a MuOpen """
+        jets = self.jets
+        selected = jets.valid.copy()
+        if self.NOTauInJets:
+            selected &= jets["Taujet"] == 0
+        muopen, muphi = self.muOpenPhi()
+        corr = np.zeros(selected.shape, dtype=bool)
+        for imu in range(self.muons.width):
+            corr |= muopen[:, imu:imu+1] & (np.abs(muphi[:, imu:imu+1] - jets["Phijet"]) < 3.)
+        return leading(self.jetPt(), selected & corr)[0]
+
+    # ---- cached results
+
+    def cached(self, method, *args):
+        key = (method, self.noHF, self.NOTauInJets) + args
+        if key not in self._results:
+            self._results[key] = getattr(self, method)(*args)
+        return self._results[key]
+
+    def passes(self, method, args, cuts):
+        """ entries for which the results of method(*args) pass the cuts,
+        compared in single precision as in the C++ code """
+        values = self.cached(method, *args)
+        if not isinstance(values, tuple):
+            values = (values,)
+        passed = np.ones(self.batch.size, dtype=bool)
+        for value, cut in zip(values, cuts):
+            passed &= value >= float(np.float32(cut))
+        return passed
+
+    def Evaluate(self, seeds):
+        """ boolean mask of each seed, seeds being (name, method, arguments) """
+        masks = OrderedDict()
+        for name, method, args in seeds:
+            masks[name] = getattr(self, method)(*args)
+        return masks
+
+    # ---- muons
+
+    def SingleMuPt(self, qualmin=4):
+        muons = self.muons
+        return leading(muons["Pt"], muons.valid & (muons["Qual"] >= qualmin))[0]
+
+    def SingleMuEta2p1Pt(self):
+        return self.muonMax(isER=True)
+
+    def DoubleMuPt(self, isHighQual=False, isER=False):
+        muons = self.muons
+        qual = muons["Qual"]
+        selected = muons.valid & ((qual >= 4) | (qual == 3))
+        if isHighQual:
+            selected &= qual >= 4
+        if isER:
+            selected &= np.abs(muons["Eta"]) <= 2.1
+        mu1, mu2 = leading(muons["Pt"], selected, 2)
+        return gate((muons.n >= 2) & (mu2 >= 0.), mu1, mu2)
+
+    def DoubleMuXOpenPt(self):
+        muons = self.muons
+        qual = muons["Qual"]
+        ptmax = leading(muons["Pt"], muons.valid & ((qual >= 5) | (qual == 3)))[0]
+        n2 = (muons.valid & (muons["Pt"] >= 0.)).sum(axis=1)
+        return gate(n2 >= 2, ptmax)
+
+    def muonPairs(self, selected, correlated):
+        muons = self.muons
+        pt = np.where(selected, muons["Pt"], NONE)
+        corr, maxpt1, maxpt2 = bestPair(pt, pt, lambda i, j: selected[:, i] & selected[:, j] & correlated(i, j))
+        return gate((muons.n >= 2) & corr & (maxpt2 >= 0.), maxpt1, maxpt2)
+
+    def OniaPt(self, delta):
+        muons = self.muons
+        selected = muons.valid & (muons["Qual"] >= 4) & (np.abs(muons["Eta"]) <= 2.1)
+        ieta = etaMuIdx(muons["Eta"])
+        return self.muonPairs(selected, lambda i, j: np.abs(ieta[:, i] - ieta[:, j]) <= delta)
+
+    def Onia2015Pt(self, isER, isOS, delta):
+        muons = self.muons
+        selected = muons.valid & (muons["Qual"] >= 4)
+        if isER:
+            selected &= np.abs(muons["Eta"]) <= 1.6
+        ieta = etaMuIdx(muons["Eta"])
+        charge = muons["Cha"]
+        def correlated(i, j):
+            corr = np.abs(ieta[:, i] - ieta[:, j]) <= delta
+            if isOS:
+                corr &= charge[:, i]*charge[:, j] <= 0
+            return corr
+        return self.muonPairs(selected, correlated)
+
+    def TripleMuPt(self, qualmin=4):
+        muons = self.muons
+        mu1, mu2, mu3 = leading(muons["Pt"], muons.valid & (muons["Qual"] >= qualmin), 3)
+        return gate((muons.n >= 3) & (mu3 >= 0.), mu1, mu2, mu3)
+
+    def QuadMuPt(self, qualmin=4):
+        muons = self.muons
+        mu1, mu2, mu3, mu4 = leading(muons["Pt"], muons.valid & (muons["Qual"] >= qualmin), 4)
+        return gate((muons.n >= 4) & (mu4 >= 0.), mu1, mu2, mu3, mu4)
+
+    # ---- EG
+
+    def SingleEGPt(self, isIsolated=False):
+        return self.egMax(isIsolated)
+
+    def SingleEGEta2p1Pt(self, isIsolated=False):
+        return self.egMax(isIsolated, isER=True)
+
+    def DoubleEGPt(self, isIsolated=False, isER=False):
+        ele1pt, ele2pt, EG1_ER, EG2_ER, EG1_isol, EG2_isol = self.cached("egScan")
+        fired = (self.egs.n >= 2) & (ele2pt >= 0.)
+        if isER:
+            fired &= EG1_ER & EG2_ER
+        if isIsolated:
+            fired &= EG1_isol | EG2_isol
+        return gate(fired, ele1pt, ele2pt)
+
+    def TripleEGPt(self):
+        egs = self.egs
+        n = len(egs.valid)
+        ele1pt = np.full(n, NONE)
+        ele2pt = np.full(n, NONE)
+        ele3pt = np.full(n, NONE)
+        ele1phi = np.full(n, -1000.)
+        ele1eta = np.full(n, -1000.)
+        ele2phi = np.full(n, -1000.)
+        ele2eta = np.full(n, -1000.)
+        for ue in range(egs.width):
+            pt = egs["Rankel"][:, ue]
+            phi = egs["Phiel"][:, ue]
+            eta = egs["Etael"][:, ue]
+            copy1 = (np.abs(pt-ele1pt) < 0.001) & (np.abs(phi-ele1phi) < 0.001) & (np.abs(eta-ele1eta) < 0.001)
+            copy2 = (np.abs(pt-ele2pt) < 0.001) & (np.abs(phi-ele2phi) < 0.001) & (np.abs(eta-ele2eta) < 0.001)
+            active = egs.valid[:, ue] & ~copy1 & ~copy2
+            first = active & (pt >= ele1pt)
+            second = active & ~first & (pt >= ele2pt)
+            third = active & ~first & ~second & (pt >= ele3pt)
+            ele3pt = np.where(first | second, ele2pt, np.where(third, pt, ele3pt))
+            ele2pt = np.where(first, ele1pt, np.where(second, pt, ele2pt))
+            ele2phi = np.where(second, phi, ele2phi)
+            ele2eta = np.where(second, eta, ele2eta)
+            ele1pt = np.where(first, pt, ele1pt)
+            ele1phi = np.where(first, phi, ele1phi)
+            ele1eta = np.where(first, eta, ele1eta)
+        return gate((egs.n >= 3) & (ele3pt >= 0.), ele1pt, ele2pt, ele3pt)
+
+    # ---- jets
+
+    def SingleJetPt(self, isCentral=False):
+        return leading(self.jetPt(), self.jetSelection(isCentral, isCentral))[0]
+
+    def DoubleJetPt(self, isCentral=False):
+        jet1, jet2 = leading(self.jetPt(), self.jetSelection(isCentral, isCentral), 2)
+        return gate((self.jets.n >= 2) & (jet2 >= 0.), jet1, jet2)
+
+    def DoubleJet_Eta1p7_deltaEta4Pt(self):
+        jets = self.jets
+        eta = jets["Etajet"]
+        selected = self.jetSelection(True, True) & (eta >= 5.5) & (eta <= 16.5)
+        pt = self.jetPt()
+        corr, maxpt1, maxpt2 = bestPair(pt, pt, lambda i, j: selected[:, i] & selected[:, j] &
+                                        correlateInEta(eta[:, i], eta[:, j], 4))
+        return maxpt1, maxpt2
+
+    def DoubleTauJetEta2p17Pt(self, isIsolated=False):
+        if isIsolated:
+            taus = self.isotaus
+            selected = taus.valid.copy()
+            pt = taus["IsoTJetRnk"]*4.
+            eta = taus["IsoTJetEta"]
+        else:
+            taus = self.jets
+            selected = taus.valid & (taus["Taujet"] != 0)
+            pt = self.jetPt()
+            eta = taus["Etajet"]
+        selected &= (eta >= 4.5) & (eta <= 16.5)
+        tau1, tau2 = leading(pt, selected, 2)
+        return gate((taus.n >= 2) & (tau2 >= 0.), tau1, tau2)
+
+    def TripleJetPt(self, isCentral=False):
+        jet1, jet2, jet3 = leading(self.jetPt(), self.jetSelection(isCentral, True), 3)
+        return gate((self.jets.n >= 3) & (jet3 >= 0.), jet1, jet2, jet3)
+
+    def TripleJet_VBF(self, jet1, jet2, jet3, jetclass=0):
+        jets = self.jets
+        selected = jets.valid.copy()
+        if self.NOTauInJets:
+            selected &= jets["Taujet"] == 0
+        fwd = jets["Fwdjet"] != 0
+        pt = self.jetPt()
+        f1, f2, f3, n1, n2, n3 = [(selected & isfwd & (pt >= float(np.float32(cut)))).sum(axis=1)
+                                  for isfwd in (fwd, ~fwd) for cut in (jet1, jet2, jet3)]
+        jet   = (n1 >= 1) & (n2 >= 2) & (n3 >= 3)
+        jetf  = (f1 >= 1) & (f2 >= 2) & (f3 >= 3)
+        jetc1 = (n1 >= 1) & (f2 >= 1) & (f3 >= 2)
+        jetc2 = (f1 >= 1) & (n2 >= 1) & (f3 >= 2)
+        jetc3 = (f1 >= 1) & (f2 >= 1) & (n3 >= 2)
+        jetf1 = (f1 >= 1) & (n2 >= 1) & (n3 >= 2)
+        jetf2 = (n1 >= 1) & (f2 >= 1) & (n3 >= 2)
+        jetf3 = (n1 >= 1) & (n2 >= 1) & (f3 >= 2)
+        classes = {1 : jet, 2 : jetf1, 3 : jetf2, 4 : jetf3, 5 : jetc1, 6 : jetc2, 7 : jetc3, 8 : jetf}
+        passed = classes.get(jetclass, jet | jetf1 | jetf2)
+        return passed & (jets.n >= 3)
+
+    def QuadJetPt(self, isCentral=False):
+        jet1, jet2, jet3, jet4 = leading(self.jetPt(), self.jetSelection(isCentral, isCentral), 4)
+        return gate((self.jets.n >= 4) & (jet4 >= 0.), jet1, jet2, jet3, jet4)
+
+    # ---- energy sums
+
+    def ETMVal(self):
+        return self.energySum("RankETM")
+
+    def HTTVal(self):
+        return self.energySum("RankHTT")
+
+    def HTMVal(self):
+        return self.energySum("RankHTM")
+
+    def ETTVal(self):
+        return self.energySum("RankETT")
+
+    def ETMVal_NoQCD(self):
+        jets = self.jets
+        selected = jets.valid & (jets["Taujet"] == 0) & (self.jetPt() >= 52.)
+        etmphi = np.asarray(self.batch["PhiETM"], dtype=np.float64)[:, np.newaxis]
+        qcd = (selected & correlateInPhi(jets["Phijet"], etmphi, 3)).any(axis=1)
+        return gate(~qcd, self.ETMVal())
+
+    # ---- cross triggers
+
+    def Mu_EGPt(self, isIsolated=False, qualmin=4):
+        muptmax = self.SingleMuPt(qualmin)
+        eleptmax = self.egMax(isIsolated)
+        return gate((muptmax >= 0.) & (eleptmax >= 0.), muptmax, eleptmax)
+
+    def DoubleMu_EGPt(self, isMuHighQual=False):
+        muons = self.muons
+        qual = muons["Qual"]
+        selected = muons.valid & ((qual >= 4) | (qual == 3))
+        if isMuHighQual:
+            selected &= qual >= 4
+        second_muptmax = leading(muons["Pt"], selected, 2)[1]
+        return gate((muons.n >= 2) & (second_muptmax >= 0.), second_muptmax, self.egMax())
+
+    def Mu_DoubleEGPt(self):
+        muptmax = self.muonMax()
+        eleptmax2 = self.cached("egScan")[1]
+        return gate((self.egs.n >= 2) & (muptmax >= 0.) & (eleptmax2 >= 0.), muptmax, eleptmax2)
+
+    def Muer_JetCentralPt(self):
+        muptmax = self.muonMax(isER=True)
+        jetptmax = leading(self.jetPt(), self.jetSelection(True, True))[0]
+        return gate((muptmax >= 0.) & (jetptmax >= 0.), muptmax, jetptmax)
+
+    def Mu_JetCentral_deltaPt(self, mucut=NONE, jetcut=NONE):
+        muons = self.muons
+        jets = self.jets
+        muselected = muons.valid & (muons["Qual"] >= 4) & (muons["Pt"] >= mucut)
+        jetpt = self.jetPt()
+        jetselected = self.jetSelection(True, True) & (jetpt >= jetcut)
+        iphi_mu = phiINjetCoord(muons["Phi"])
+        ieta_mu = etaINjetCoord(muons["Eta"])
+        n = len(muons.valid)
+        correlate = np.zeros(n, dtype=bool)
+        muptmax = np.full(n, NONE)
+        jetptmax = np.full(n, NONE)
+        for imu in range(muons.width):
+            corr = (muselected[:, imu:imu+1] & jetselected &
+                    correlateInPhi(jets["Phijet"], iphi_mu[:, imu:imu+1], 2) &
+                    correlateInEta(jets["Etajet"], ieta_mu[:, imu:imu+1], 2))
+            paired = corr.any(axis=1)
+            correlate |= paired
+            muptmax = np.where(paired, np.maximum(muptmax, muons["Pt"][:, imu]), muptmax)
+            jetptmax = np.maximum(jetptmax, leading(jetpt, corr)[0])
+        return np.where(correlate, muptmax, mucut), np.where(correlate, jetptmax, jetcut)
+
+    def Mu_DoubleJetCentralPt(self):
+        muptmax = self.muonMax()
+        jetptmax2 = leading(self.jetPt(), self.jetSelection(True, True), 2)[1]
+        return gate((self.jets.n >= 2) & (muptmax >= 0.) & (jetptmax2 >= 0.), muptmax, jetptmax2)
+
+    def Mu_HTTPt(self):
+        muptmax = self.muonMax()
+        return gate(muptmax >= 0., muptmax, self.HTTVal())
+
+    def Muer_ETMPt(self):
+        muptmax = self.muonMax(isER=True)
+        return gate(muptmax >= 0., muptmax, self.ETMVal())
+
+    def Muer_TauJetEta2p17Pt(self):
+        jets = self.jets
+        muptmax = self.muonMax(isER=True)
+        selected = jets.valid & (jets["Etajet"] >= 4.5) & (jets["Etajet"] <= 16.5)
+        if self.NOTauInJets:
+            selected &= jets["Taujet"] != 0
+        maxpttau = leading(self.jetPt(), selected)[0]
+        return gate((self.muons.n >= 1) & (muptmax >= 0.), muptmax, maxpttau)
+
+    def Muer_ETM_HTTPt(self):
+        fired = self.muons.n >= 1
+        return gate(fired, self.muonMax(isER=True), self.ETMVal(), self.HTTVal())
+
+    def Muer_ETM_JetCPt(self):
+        fired = self.muons.n >= 1
+        jetptmax = leading(self.jetPt(), self.jetSelection(True, True))[0]
+        return gate(fired, self.muonMax(isER=True), self.ETMVal(), jetptmax)
+
+    def SingleEG_Eta2p1_HTTPt(self, isIsolated=False):
+        eleptmax = self.egMax(isIsolated, isER=True)
+        return gate(eleptmax >= 0., eleptmax, self.HTTVal())
+
+    def EG_FwdJetPt(self):
+        jets = self.jets
+        eleptmax = self.egMax()
+        selected = jets.valid & (jets["Fwdjet"] != 0)
+        if self.NOTauInJets:
+            selected &= jets["Taujet"] == 0
+        jetptmax = leading(self.jetPt(), selected)[0]
+        return gate((eleptmax >= 0.) & (jetptmax >= 0.), eleptmax, jetptmax)
+
+    def EG_DoubleJetCentralPt(self):
+        eleptmax = self.egMax()
+        jetptmax2 = leading(self.jetPt(), self.jetSelection(True, True), 2)[1]
+        return gate((self.jets.n >= 2) & (eleptmax >= 0.) & (jetptmax2 >= 0.), eleptmax, jetptmax2)
+
+    def EGer_TripleJetCentralPt(self):
+        egs = self.egs
+        eta = egs["Etael"]
+        eleptmax, elemaxeta = self.egMaxEta(egs.valid & (eta >= 4.5) & (eta <= 16.5), NONE)
+        selected = self.jetSelection(True, True) & (self.jets["Etajet"] != elemaxeta[:, np.newaxis])
+        jetptmax3 = leading(self.jetPt(), selected, 3)[2]
+        return gate((self.jets.n >= 3) & (eleptmax >= 0.) & (jetptmax3 >= 0.), eleptmax, jetptmax3)
+
+    def DoubleEG_HTPt(self):
+        eleptmax2 = self.cached("egScan")[1]
+        return gate((self.egs.n >= 2) & (eleptmax2 >= 0.), eleptmax2, self.HTTVal())
+
+    def IsoEGer_TauJetEta2p17Pt(self):
+        egs = self.egs
+        jets = self.jets
+        eta = egs["Etael"]
+        eleptmax, eleetamax = self.egMaxEta(egs.valid & (egs["Isoel"] != 0) & (eta >= 4.5) & (eta <= 16.5), -999.)
+        jeteta = jets["Etajet"]
+        selected = (jets.valid & (jets["Taujet"] != 0) & (jeteta >= 4.5) & (jeteta <= 16.5) &
+                    ~(np.abs(jeteta - eleetamax[:, np.newaxis]) < 2))
+        maxpttau = leading(self.jetPt(), selected)[0]
+        return gate((egs.n >= 1) & (eleptmax >= 0.), eleptmax, maxpttau)
+
+    def Jet_MuOpen_Mu_dPhiMuMu1Pt(self):
+        muons = self.muons
+        jetptmax = self.jetMuOpenMax()
+        # the quality of the second muon is checked against the one of the first
+        # muon, and the phi difference computed in single precision as in the C++ code
+        qual = muons["Qual"]
+        phi = muons["Phi"].astype(np.float32)
+        first = muons.valid & (qual >= 4)
+        pt = muons["Pt"]
+        def correlated(i, j):
+            return (first[:, i] & muons.valid[:, j] & ~((qual[:, j] < 5) & (qual[:, i] != 3)) &
+                    (np.abs((phi[:, i] - phi[:, j]).astype(np.float64)) > 1.))
+        corr, maxpt1, maxpt2 = bestPair(pt, pt, correlated)
+        maxptmu = np.where(maxpt1 > maxpt2, maxpt1, maxpt2)
+        return gate((jetptmax > 0.) & (maxptmu > 0.), jetptmax, maxptmu)
+
+    def Jet_MuOpen_EG_dPhiMuEG1Pt(self):
+        egs = self.egs
+        jetptmax = self.jetMuOpenMax()
+        muopen, muphi = self.muOpenPhi()
+        corr = np.zeros(egs.valid.shape, dtype=bool)
+        for imu in range(self.muons.width):
+            corr |= muopen[:, imu:imu+1] & (np.abs(muphi[:, imu:imu+1] - egs["Phiel"]) > 3.)
+        maxptEG = leading(egs["Rankel"], egs.valid & corr)[0]
+        return gate((jetptmax > 0.) & (maxptEG > 0.), jetptmax, maxptEG)
+
+    def DoubleJetCentral_ETMPt(self):
+        jet1, jet2 = leading(self.jetPt(), self.jetSelection(True, True), 2)
+        return gate((self.jets.n >= 2) & (jet2 >= 0.), jet1, jet2, self.ETMVal())
+
+    def QuadJetCentral_TauJetPt(self):
+        jets = self.jets
+        jet4ptmax = leading(self.jetPt(), self.jetSelection(True, True), 4)[3]
+        maxpttau = leading(self.jetPt(), jets.valid & (jets["Taujet"] != 0))[0]
+        return gate((jets.n >= 5) & (jet4ptmax >= 0.) & (maxpttau >= 0.), jet4ptmax, maxpttau)
+
+    def DoubleJetC_deltaPhi7_HTTPt(self):
+        phi = self.jets["Phijet"]
+        selected = self.jetSelection(True, True)
+        pt = self.jetPt()
+        corr, maxpt1, maxpt2 = bestPair(pt, pt, lambda i, j: selected[:, i] & selected[:, j] &
+                                        correlateInPhi(phi[:, i], phi[:, j], 7))
+        return gate(self.jets.n >= 2, maxpt2), self.HTTVal()
+
+    # ---- seeds
+
+    def SingleMu(self, ptcut, qualmin=4):
+        return self.passes("SingleMuPt", (qualmin,), (ptcut,))
+
+    def SingleMuEta2p1(self, ptcut):
+        return self.passes("SingleMuEta2p1Pt", (), (ptcut,))
+
+    def DoubleMu(self, mu1pt, mu2pt, isHighQual=False, isER=False):
+        return self.passes("DoubleMuPt", (isHighQual, isER), (mu1pt, mu2pt))
+
+    def DoubleMuXOpen(self, mu1pt):
+        return self.passes("DoubleMuXOpenPt", (), (mu1pt,))
+
+    def Onia(self, mu1pt, mu2pt, delta):
+        return self.passes("OniaPt", (delta,), (mu1pt, mu2pt))
+
+    def Onia2015(self, mu1pt, mu2pt, isER, isOS, delta):
+        return self.passes("Onia2015Pt", (isER, isOS, delta), (mu1pt, mu2pt))
+
+    def TripleMu(self, mu1pt, mu2pt, mu3pt, qualmin):
+        return self.passes("TripleMuPt", (qualmin,), (mu1pt, mu2pt, mu3pt))
+
+    def QuadMu(self, mu1pt, mu2pt, mu3pt, mu4pt, qualmin):
+        return self.passes("QuadMuPt", (qualmin,), (mu1pt, mu2pt, mu3pt, mu4pt))
+
+    def SingleEG(self, ptcut, isIsolated=False):
+        return self.passes("SingleEGPt", (isIsolated,), (ptcut,))
+
+    def SingleEGEta2p1(self, ptcut, isIsolated=False):
+        return self.passes("SingleEGEta2p1Pt", (isIsolated,), (ptcut,))
+
+    def DoubleEG(self, ptcut1, ptcut2, isIsolated=False):
+        return self.passes("DoubleEGPt", (isIsolated,), (ptcut1, ptcut2))
+
+    def TripleEG(self, ptcut1, ptcut2, ptcut3):
+        return self.passes("TripleEGPt", (), (ptcut1, ptcut2, ptcut3))
+
+    def SingleJet(self, ptcut, isCentral=False):
+        return self.passes("SingleJetPt", (isCentral,), (ptcut,))
+
+    def DoubleJet(self, ptcut1, ptcut2, isCentral=False):
+        return self.passes("DoubleJetPt", (isCentral,), (ptcut1, ptcut2))
+
+    def DoubleJet_Eta1p7_deltaEta4(self, ptcut1, ptcut2):
+        return self.passes("DoubleJet_Eta1p7_deltaEta4Pt", (), (ptcut1, ptcut2))
+
+    def DoubleTauJetEta2p17(self, ptcut1, ptcut2, isIsolated=False):
+        return self.passes("DoubleTauJetEta2p17Pt", (isIsolated,), (ptcut1, ptcut2))
+
+    def TripleJet(self, ptcut1, ptcut2, ptcut3, isCentral=False):
+        return self.passes("TripleJetPt", (isCentral,), (ptcut1, ptcut2, ptcut3))
+
+    def QuadJet(self, ptcut1, ptcut2, ptcut3, ptcut4, isCentral=False):
+        return self.passes("QuadJetPt", (isCentral,), (ptcut1, ptcut2, ptcut3, ptcut4))
+
+    def ETM(self, ETMcut):
+        return self.passes("ETMVal", (), (ETMcut,))
+
+    def HTT(self, HTTcut):
+        return self.passes("HTTVal", (), (HTTcut,))
+
+    def HTM(self, HTMcut):
+        return self.passes("HTMVal", (), (HTMcut,))
+
+    def ETT(self, ETTcut):
+        return self.passes("ETTVal", (), (ETTcut,))
+
+    def ETM_NoQCD(self, ETMcut):
+        return self.passes("ETMVal_NoQCD", (), (ETMcut,))
+
+    def Mu_EG(self, mucut, EGcut, isIsolated=False, qualmin=4):
+        return self.passes("Mu_EGPt", (isIsolated, qualmin), (mucut, EGcut))
+
+    def DoubleMu_EG(self, mucut, EGcut, isMuHighQual=False):
+        return self.passes("DoubleMu_EGPt", (isMuHighQual,), (mucut, EGcut))
+
+    def Mu_DoubleEG(self, mucut, EGcut):
+        return self.passes("Mu_DoubleEGPt", (), (mucut, EGcut))
+
+    def Muer_JetCentral(self, mucut, jetcut):
+        return self.passes("Muer_JetCentralPt", (), (mucut, jetcut))
+
+    def Mu_JetCentral_delta(self, mucut, jetcut):
+        return self.passes("Mu_JetCentral_deltaPt", (), (mucut, jetcut))
+
+    def Mu_DoubleJetCentral(self, mucut, jetcut):
+        return self.passes("Mu_DoubleJetCentralPt", (), (mucut, jetcut))
+
+    def Mu_HTT(self, mucut, HTcut):
+        return self.passes("Mu_HTTPt", (), (mucut, HTcut))
+
+    def Muer_ETM(self, mucut, ETMcut):
+        return self.passes("Muer_ETMPt", (), (mucut, ETMcut))
+
+    def Muer_TauJetEta2p17(self, mucut, taucut):
+        return self.passes("Muer_TauJetEta2p17Pt", (), (mucut, taucut))
+
+    def Muer_ETM_HTT(self, mucut, ETMcut, HTTcut):
+        return self.passes("Muer_ETM_HTTPt", (), (mucut, ETMcut, HTTcut))
+
+    def Muer_ETM_JetC(self, mucut, ETMcut, jetcut):
+        return self.passes("Muer_ETM_JetCPt", (), (mucut, ETMcut, jetcut))
+
+    def SingleEG_Eta2p1_HTT(self, egcut, HTTcut, isIsolated=False):
+        return self.passes("SingleEG_Eta2p1_HTTPt", (isIsolated,), (egcut, HTTcut))
+
+    def EG_FwdJet(self, EGcut, FWcut):
+        return self.passes("EG_FwdJetPt", (), (EGcut, FWcut))
+
+    def EG_DoubleJetCentral(self, EGcut, jetcut):
+        return self.passes("EG_DoubleJetCentralPt", (), (EGcut, jetcut))
+
+    def EGer_TripleJetCentral(self, EGcut, jetcut):
+        return self.passes("EGer_TripleJetCentralPt", (), (EGcut, jetcut))
+
+    def DoubleEG_HT(self, EGcut, HTcut):
+        return self.passes("DoubleEG_HTPt", (), (EGcut, HTcut))
+
+    def IsoEGer_TauJetEta2p17(self, egcut, taucut):
+        return self.passes("IsoEGer_TauJetEta2p17Pt", (), (egcut, taucut))
+
+    def Jet_MuOpen_Mu_dPhiMuMu1(self, jetcut, mucut):
+        return self.passes("Jet_MuOpen_Mu_dPhiMuMu1Pt", (), (jetcut, mucut))
+
+    def Jet_MuOpen_EG_dPhiMuEG1(self, jetcut, egcut):
+        return self.passes("Jet_MuOpen_EG_dPhiMuEG1Pt", (), (jetcut, egcut))
+
+    def DoubleJetCentral_ETM(self, jetcut1, jetcut2, ETMcut):
+        return self.passes("DoubleJetCentral_ETMPt", (), (jetcut1, jetcut2, ETMcut))
+
+    def QuadJetCentral_TauJet(self, jetcut, taucut):
+        return self.passes("QuadJetCentral_TauJetPt", (), (jetcut, taucut))
+
+    def DoubleJetC_deltaPhi7_HTT(self, jetcut, HTTcut):
+        return self.passes("DoubleJetC_deltaPhi7_HTTPt", (), (jetcut, HTTcut))
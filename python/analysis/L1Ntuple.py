@@ -0,0 +1,350 @@
+"""
+Columnar reader for the L1 ntuples, python counterpart of macros/L1Ntuple.C
+
+It opens the same file lists and trees (L1Tree with the RecoTree,
+MuonRecoTree, L1ExtraTree, L1EmuExtraTree and L1MenuTree friends, the
+optional ones being skipped when missing from the first file, and the
+subsystem trees L1GTTree, L1RCTTree, ... of the ntuples written with
+splitTrees, whose entries are the ones of L1Tree) but returns
+numpy columns for chunks of entries instead of filling the data format
+structs one event at a time :
+
+  from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple
+
+  ntuple = L1Ntuple()
+  ntuple.OpenWithList("ntuples.txt")
+  for batch in ntuple.Iterate(["run", "lumi", "tw1", "Pt", "CandBx"], 100000):
+      print(batch.start, batch.stop, batch["run"], batch["Pt"].max())
+
+Columns are the leaf names of the data format structs ("run", "tw1",
+"Rankel", ...), searched in the trees in the order above. A leaf of a
+given tree is asked for with the tree name as prefix, e.g.
+"L1EmuExtraTree:et". Scalar leaves give numpy arrays, std::vector leaves
+give JaggedArray's. Only the branches of the requested columns are read.
+IterateLumis reads only the entries of the selected lumisections, using
+the side-car lumisection index of the files (see LumiIndex.py).
+SetLumiMask restricts GetEntries and Iterate to the certified
+lumisections of a JSON lumi mask, as L1Ntuple::SetLumiMask of the macros.
+
+Without a list of columns, Iterate runs in learning mode : the columns of
+the first learn entries are read when the analysis first uses them and
+recorded, the recorded columns are then read at once for the next
+entries. SaveColumns writes them as a whitelist for
+L1Ntuple::SelectBranchesFromFile of the macros :
+
+  for batch in ntuple.Iterate(learn=1000):
+      fill(batch["tw1"], batch["Pt"])
+  ntuple.SaveColumns("branches.txt")
+"""
+
+import os
+import json
+import numpy as np
+import ROOT
+
+from L1TriggerDPG.L1Ntuples.analysis.JaggedArray import JaggedArray
+
+# (name, path in the file) of the trees, the first one is the main tree
+TREES = [("L1Tree",         "l1NtupleProducer/L1Tree"),
+         ("RecoTree",       "l1RecoTreeProducer/RecoTree"),
+         ("MuonRecoTree",   "l1MuonRecoTreeProducer/MuonRecoTree"),
+         ("L1ExtraTree",    "l1ExtraTreeProducer/L1ExtraTree"),
+         ("L1EmuExtraTree", "l1EmulatorExtraTree/L1ExtraTree"),
+         ("L1MenuTree",     "l1MenuTreeProducer/L1MenuTree")]
+
+# subsystem trees of the ntuples written with splitTrees, searched after L1Tree
+SPLIT_TREES = [("L1%sTree" % name, "l1NtupleProducer/L1%sTree" % name)
+               for name in ["Generator", "Simulation", "GMT", "GT", "GCT", "RCT", "DTTF", "CSCTF", "CALO"]]
+
+# numpy type of the leaf types
+DTYPES = {"int" : np.int32, "Int_t" : np.int32,
+          "unsigned int" : np.uint32, "UInt_t" : np.uint32,
+          "short" : np.int16, "short int" : np.int16, "Short_t" : np.int16,
+          "unsigned short" : np.uint16, "UShort_t" : np.uint16,
+          "long" : np.int64, "long int" : np.int64, "Long_t" : np.int64,
+          "unsigned long" : np.uint64, "unsigned long int" : np.uint64, "ULong_t" : np.uint64,
+          "long long" : np.int64, "Long64_t" : np.int64,
+          "unsigned long long" : np.uint64, "ULong64_t" : np.uint64,
+          "float" : np.float32, "Float_t" : np.float32,
+          "double" : np.float64, "Double_t" : np.float64,
+          "bool" : np.bool_, "Bool_t" : np.bool_,
+          "char" : np.int8, "Char_t" : np.int8,
+          "unsigned char" : np.uint8, "UChar_t" : np.uint8}
+
+_helper = False
+
+
+def macrosDir():
+    """ the L1Ntuples macros directory, in the CMSSW area or next to this package """
+    path = os.path.join(os.environ.get("CMSSW_BASE", ""), "src/L1TriggerDPG/L1Ntuples/macros")
+    if os.path.isdir(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "macros")
+
+
+def loadHelper():
+    """ compile (once) and load the bulk column reader macros/L1NtupleColumns.C """
+    global _helper
+    if not _helper:
+        if ROOT.gROOT.LoadMacro(os.path.join(macrosDir(), "L1NtupleColumns.C")+"+") != 0:
+            raise RuntimeError("L1Ntuple : cannot compile L1NtupleColumns.C")
+        _helper = True
+
+
+def toArray(vec, vectype, dtype):
+    """ copy of a std::vector of vectype into a numpy array of dtype """
+    n = vec.size()
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    buf = vec.data()
+    if hasattr(buf, "SetSize"):
+        buf.SetSize(n)
+    return np.frombuffer(buf, dtype=vectype, count=n).astype(dtype)
+
+
+class Batch(dict):
+    """ columns of the entries [start, stop) of the ntuple, by column name.
+    entries holds the entry numbers, they are not contiguous when the
+    reader skips entries """
+
+    def __init__(self, entries):
+        dict.__init__(self)
+        self.entries = entries
+        self.start = entries[0] if len(entries) > 0 else 0
+        self.stop = entries[-1]+1 if len(entries) > 0 else 0
+
+    @property
+    def size(self):
+        return len(self.entries)
+
+
+class LearningBatch(Batch):
+    """ Batch of the learning mode of L1Ntuple.Iterate, a column missing
+    from the batch is read when first used and recorded by the ntuple """
+
+    def __init__(self, ntuple, entries):
+        Batch.__init__(self, entries)
+        self.ntuple = ntuple
+
+    def __missing__(self, column):
+        if column not in self.ntuple.columns:
+            self.ntuple.columns.append(column)
+        self[column] = self.ntuple.ReadColumn(column, self.entries)
+        return self[column]
+
+
+class L1Ntuple(object):
+
+    def __init__(self, fname=None):
+        self.listNtuples = []
+        self.chains = {}
+        self.available = []
+        self.nentries_ = 0
+        self.selected = None
+        self.columns = []
+        self.rf = None
+        if fname is not None:
+            self.Open(fname)
+
+    def Open(self, fname):
+        self.listNtuples.append(fname)
+        self.CheckFirstFile()
+        self.OpenWithoutInit()
+        self.Init()
+        return True
+
+    def OpenWithList(self, fname):
+        self.OpenNtupleList(fname)
+        self.CheckFirstFile()
+        self.OpenWithoutInit()
+        self.Init()
+        return True
+
+    def OpenNtupleList(self, fname):
+        if not os.path.exists(fname):
+            raise IOError("File "+fname+" is not found !")
+        flist = open(fname)
+        for line in flist:
+            if line.strip() != "":
+                self.listNtuples.append(line.strip())
+        flist.close()
+
+    def CheckFirstFile(self):
+        """ look for the trees in the first file, the missing optional trees are skipped """
+        if len(self.listNtuples) == 0:
+            raise IOError("L1Ntuple : no file to open")
+        self.rf = ROOT.TFile.Open(self.listNtuples[0])
+        if not self.rf or not self.rf.IsOpen():
+            raise IOError("L1Ntuple : cannot open "+self.listNtuples[0])
+
+        self.available = []
+        for name, path in TREES:
+            if self.rf.Get(path):
+                print("%s is found ..." % name)
+                self.available.append(name)
+            elif name == TREES[0][0]:
+                raise IOError("L1Tree not found .... ")
+            else:
+                print("%s not found, it will be skipped..." % name)
+        split = [name for name, path in SPLIT_TREES if self.rf.Get(path)]
+        for name in split:
+            print("%s is found ..." % name)
+        self.available[1:1] = split
+
+    def OpenWithoutInit(self):
+        paths = dict(TREES+SPLIT_TREES)
+        self.chains = {}
+        for name in self.available:
+            self.chains[name] = ROOT.TChain(paths[name])
+        for fname in self.listNtuples:
+            print(" -- Adding "+fname)
+            for name in self.available:
+                self.chains[name].Add(fname)
+
+    def Init(self):
+        print("Estimate the number of entries ...")
+        self.nentries_ = self.chains[TREES[0][0]].GetEntries()
+        print(self.nentries_)
+        for name in self.available[1:]:
+            nentries = self.chains[name].GetEntries()
+            if nentries != self.nentries_:
+                print("WARNING %s has %d entries instead of %d" % (name, nentries, self.nentries_))
+
+    def GetEntries(self):
+        if self.selected is not None:
+            return len(self.selected)
+        return self.nentries_
+
+    def SetLumiMask(self, selection, directory=None):
+        """ keep only the entries of the certified lumisections of a JSON
+        selection {run : [[first, last], ...]} or JSON file, None to keep
+        all the entries. Iterate then counts the selected entries only """
+        if selection is None:
+            self.selected = None
+            return
+        if not hasattr(selection, "items"):
+            f = open(selection)
+            selection = json.load(f)
+            f.close()
+        self.selected = self.GetLumiIndex(directory).Entries(selection)
+        print("%d entries selected out of %d" % (len(self.selected), self.nentries_))
+
+    def FindColumn(self, column):
+        """ (tree name, leaf name, numpy type, is a vector) of a column """
+        if ":" in column:
+            trees, leafname = column.split(":", 1)
+            trees = [trees]
+        else:
+            trees, leafname = self.available, column
+        for name in trees:
+            if name not in self.chains:
+                continue
+            leaf = self.chains[name].GetLeaf(leafname)
+            if not leaf:
+                continue
+            typename = leaf.GetTypeName()
+            isvector = typename.startswith("vector<")
+            if isvector:
+                typename = typename[len("vector<"):-1].strip()
+            if typename not in DTYPES:
+                raise TypeError("L1Ntuple : column "+column+" of type "+leaf.GetTypeName()+" is not supported")
+            return name, leafname, DTYPES[typename], isvector
+        raise KeyError("L1Ntuple : unknown column -> "+column)
+
+    def ReadColumn(self, column, entries):
+        """ values of a column for the given entry numbers """
+        loadHelper()
+        name, leafname, dtype, isvector = self.FindColumn(column)
+        entries = np.ascontiguousarray(entries, dtype=np.int64)
+        counts = np.zeros(len(entries), dtype=np.int32)
+        if dtype in (np.int64, np.uint64):
+            vectype = np.uint64
+            values = ROOT.std.vector("ULong64_t")()
+            nread = ROOT.L1NtupleColumn64(self.chains[name], leafname, entries, len(entries), values, counts)
+        else:
+            vectype = np.float64
+            values = ROOT.std.vector("Double_t")()
+            nread = ROOT.L1NtupleColumn(self.chains[name], leafname, entries, len(entries), values, counts)
+        if nread < 0:
+            raise KeyError("L1Ntuple : cannot read column -> "+column)
+        content = toArray(values, vectype, dtype)
+        if isvector:
+            return JaggedArray(content, counts)
+        return content
+
+    def Read(self, columns, entries):
+        """ Batch of the columns for the given entry numbers """
+        batch = Batch(np.asarray(entries, dtype=np.int64))
+        for column in columns:
+            batch[column] = self.ReadColumn(column, batch.entries)
+        return batch
+
+    def GetLumiIndex(self, directory=None):
+        """ LumiIndex of the whole chain, from the side-cars of the files.
+        The index of a file without an up to date side-car is built from
+        its run and lumi columns and saved """
+        from L1TriggerDPG.L1Ntuples.analysis.LumiIndex import LumiIndex, sidecarPath
+        indices = []
+        offset = 0
+        for element in self.chains[TREES[0][0]].GetListOfFiles():
+            fname = element.GetTitle()
+            nentries = element.GetEntries()
+            path = sidecarPath(fname, directory)
+            index = None
+            if os.path.exists(path) and (not os.path.exists(fname) or os.path.getmtime(path) >= os.path.getmtime(fname)):
+                index = LumiIndex.Load(path)
+                if index.nentries != nentries:
+                    index = None
+            if index is None:
+                print("Building the lumisection index of "+fname)
+                entries = np.arange(offset, offset+nentries, dtype=np.int64)
+                index = LumiIndex.FromColumns(self.ReadColumn("run", entries), self.ReadColumn("lumi", entries))
+                index.Save(path, fname)
+            indices.append(index)
+            offset += nentries
+        return LumiIndex.Concatenate(indices)
+
+    def Iterate(self, columns=None, chunksize=100000, start=0, stop=None, learn=1000):
+        """ Batch's of the columns for the entries [start, stop) by chunks of
+        chunksize entries, of the selected entries with a lumi mask.
+        columns None : learning mode on the first learn entries """
+        nentries = self.GetEntries()
+        if stop is None or stop > nentries:
+            stop = nentries
+        first = start
+        while first < stop:
+            size = chunksize
+            if columns is None and first-start < learn:
+                size = min(chunksize, start+learn-first)
+            entries = np.arange(first, min(first+size, stop), dtype=np.int64)
+            if self.selected is not None:
+                entries = self.selected[entries]
+            if columns is None:
+                batch = LearningBatch(self, entries)
+                if first-start >= learn:
+                    for column in self.columns:
+                        batch[column] = self.ReadColumn(column, entries)
+                yield batch
+            else:
+                yield self.Read(columns, entries)
+            first += size
+
+    def SaveColumns(self, filename):
+        """ write the columns recorded in learning mode, one per line """
+        out = open(filename, "w")
+        out.write("# columns used by the analysis\n")
+        for column in self.columns:
+            out.write(column.split(":")[-1]+"\n")
+        out.close()
+
+    def IterateEntries(self, columns, entries, chunksize=100000):
+        """ Batch's of the columns for the given entry numbers by chunks of chunksize entries """
+        entries = np.asarray(entries, dtype=np.int64)
+        for first in range(0, len(entries), chunksize):
+            yield self.Read(columns, entries[first:first+chunksize])
+
+    def IterateLumis(self, columns, selection, chunksize=100000):
+        """ Batch's of the columns for the entries of the lumisections of a
+        JSON selection {run : [[first, last], ...]}, found with the
+        lumisection index """
+        return self.IterateEntries(columns, self.GetLumiIndex().Entries(selection), chunksize)
@@ -0,0 +1,140 @@
+"""
+(run, lumisection) index of the L1Tree entries, kept in a side-car text
+file per ntuple file so that it is built only once
+
+The index holds the blocks of consecutive entries of the same run and
+lumisection : "run lumi first stop" per line, first and stop being the
+entry range [first, stop) in the file. The side-car of a local file is
+written next to it (<file>.lumis), the one of a remote file in the
+lumiindex directory. The index of a whole L1Ntuple gives the entries of
+certified lumisections or of a lumisection window without reading the
+other entries :
+
+  from L1TriggerDPG.L1Ntuples.analysis.LumiIndex import lumiWindow
+
+  ntuple = L1Ntuple()
+  ntuple.OpenWithList("ntuples.txt")
+  index = ntuple.GetLumiIndex()
+  print(index.Counts())
+  entries = index.Entries(lumiWindow(208307, 100, 200))
+  for batch in ntuple.IterateEntries(["run", "lumi", "tw1"], entries):
+      ...
+"""
+
+import os
+import re
+import bisect
+import numpy as np
+
+SIDECAR_DIR = "lumiindex"
+
+
+def sidecarPath(fname, directory=None):
+    """ side-car of an ntuple file : next to a local file, else in directory """
+    if "://" not in fname and os.access(os.path.dirname(os.path.abspath(fname)), os.W_OK) and directory is None:
+        return fname + ".lumis"
+    return os.path.join(directory or SIDECAR_DIR, re.sub("[^A-Za-z0-9_.-]", "_", fname) + ".lumis")
+
+
+def lumiWindow(run, first, last):
+    """ selection of the lumisections [first, last] of a run """
+    return {run : [[first, last]]}
+
+
+def compileMask(selection):
+    """ per run, the sorted first and last lumisections of the non
+    overlapping ranges of a JSON selection {run : [[first, last], ...]} """
+    mask = {}
+    for run, ranges in selection.items():
+        merged = []
+        for first, last in sorted(ranges):
+            if len(merged) > 0 and first <= merged[-1][1]+1:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+        mask[int(run)] = ([r[0] for r in merged], [r[1] for r in merged])
+    return mask
+
+
+def isCertified(mask, run, ls):
+    if run not in mask:
+        return False
+    firsts, lasts = mask[run]
+    i = bisect.bisect_right(firsts, ls) - 1
+    return i >= 0 and ls <= lasts[i]
+
+
+class LumiIndex(object):
+
+    def __init__(self, blocks=None, nentries=0):
+        """ blocks : (run, lumi, first, stop) of the blocks of entries """
+        self.blocks = np.zeros((0, 4), dtype=np.int64) if blocks is None else np.asarray(blocks, dtype=np.int64).reshape(-1, 4)
+        self.nentries = nentries
+
+    def __len__(self):
+        return len(self.blocks)
+
+    @staticmethod
+    def FromColumns(run, lumi, offset=0):
+        """ index of entries offset, offset+1, ... with the given run and lumi """
+        run = np.asarray(run, dtype=np.int64)
+        lumi = np.asarray(lumi, dtype=np.int64)
+        if len(run) == 0:
+            return LumiIndex(nentries=0)
+        change = np.nonzero((run[1:] != run[:-1]) | (lumi[1:] != lumi[:-1]))[0]+1
+        first = np.concatenate(([0], change))
+        stop = np.append(change, len(run))
+        return LumiIndex(np.stack((run[first], lumi[first], first+offset, stop+offset), axis=1), len(run))
+
+    @staticmethod
+    def Concatenate(indices):
+        """ index of the entries of the indices one after the other, e.g. the
+        files of a chain """
+        blocks = []
+        offset = 0
+        for index in indices:
+            shifted = index.blocks.copy()
+            shifted[:, 2:] += offset
+            blocks.append(shifted)
+            offset += index.nentries
+        if len(blocks) == 0:
+            return LumiIndex()
+        return LumiIndex(np.concatenate(blocks), offset)
+
+    def Save(self, filename, fname=""):
+        directory = os.path.dirname(filename)
+        if directory != "" and not os.path.isdir(directory):
+            os.makedirs(directory)
+        out = open(filename, "w")
+        out.write("# %s %d\n" % (fname, self.nentries))
+        for run, lumi, first, stop in self.blocks:
+            out.write("%d %d %d %d\n" % (run, lumi, first, stop))
+        out.close()
+
+    @staticmethod
+    def Load(filename):
+        f = open(filename)
+        nentries = int(f.readline().split()[-1])
+        blocks = [[int(field) for field in line.split()] for line in f if line.strip() != ""]
+        f.close()
+        return LumiIndex(blocks, nentries)
+
+    def Counts(self):
+        """ (run, lumi, entries) of each lumisection, sorted """
+        keys, inverse = np.unique(self.blocks[:, 0] << 32 | self.blocks[:, 1], return_inverse=True)
+        counts = np.bincount(inverse.reshape(-1), weights=self.blocks[:, 3]-self.blocks[:, 2], minlength=len(keys))
+        return np.stack((keys >> 32, keys & 0xffffffff, counts.astype(np.int64)), axis=1)
+
+    def Select(self, selection):
+        """ blocks of the lumisections of a JSON selection {run : [[first, last], ...]} """
+        mask = compileMask(selection)
+        keep = np.array([isCertified(mask, run, lumi) for run, lumi in self.blocks[:, :2]], dtype=bool).reshape(-1)
+        return self.blocks[keep]
+
+    def Entries(self, selection):
+        """ entry numbers of the lumisections of a JSON selection, in order """
+        blocks = self.Select(selection)
+        if len(blocks) == 0:
+            return np.zeros(0, dtype=np.int64)
+        lengths = blocks[:, 3]-blocks[:, 2]
+        return np.repeat(blocks[:, 2]-np.cumsum(lengths)+lengths, lengths) + np.arange(lengths.sum())
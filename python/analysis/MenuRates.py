@@ -0,0 +1,169 @@
+"""
+Total, pure and shared rates of the seeds of a menu and the rate of the
+whole menu, in one pass over the GT decision words
+
+The seeds are GT bits with their prescales. As InsertInMenu of the
+L1Menu2012 macros, the prescales are applied with a counter per seed : the
+n-th time a seed fires, it is kept when DoPrescale(n, old, new) is true,
+so the result does not depend on random numbers :
+
+  from L1TriggerDPG.L1Ntuples.analysis.MenuRates import MenuRates
+
+  menu = MenuRates([("L1_SingleMu16", 56, 1), ("L1_SingleEG22", 49, 1), ("L1_SingleJet16", 15, 200)],
+                   groups={"SingleObjects" : ["L1_SingleMu16", "L1_SingleEG22"]})
+  menu.Run(ntuple)
+  print(menu.Rate("L1_SingleMu16", scale), menu.PureRate("L1_SingleMu16", scale), menu.MenuRate(scale))
+
+The pure rate of a seed counts the entries that no other seed of the
+menu keeps, i.e. the rate lost when the seed is removed. The shared rate
+splits each entry equally between the seeds that keep it, so the shared
+rates add up to the menu rate. MenuRates filled on different files or
+processes are merged with Add, each part starting its prescale counters
+at 0 as a separate job of the macros would.
+"""
+
+import json
+import numpy as np
+
+from L1TriggerDPG.L1Ntuples.analysis.TriggerBits import WORDS, triggerWords
+
+
+def prescaleKeeps(n, old, new, exact=True):
+    """ DoPrescale of the L1Menu2012 macros, vectorized over the counters n.
+    exact : new prescales multiple of the old ones, else the approximation
+    of the macros. A new prescale of 0 disables the seed """
+    if new <= 0 or old <= 0:
+        return np.zeros(np.shape(n), dtype=bool)
+    if exact:
+        return n % max(new//old, 1) == 0
+    return (n//old) % new <= old-1
+
+
+class MenuRates(object):
+    """ seeds are (name, bit, prescale) or (name, bit, prescale, prescale of
+    the data), groups are lists of seed names by group name """
+
+    def __init__(self, seeds, groups=None, exact=True, bx=2):
+        self.seeds = [(seed[0], int(seed[1]), int(seed[2]), int(seed[3]) if len(seed) > 3 else 1) for seed in seeds]
+        self.names = [seed[0] for seed in self.seeds]
+        self.groups = [(name, [self.names.index(seed) for seed in members])
+                       for name, members in sorted((groups or {}).items())]
+        self.exact = exact
+        self.bx = bx
+        nseeds = len(self.seeds)
+        self.nentries = 0
+        self.counters = np.zeros(nseeds, dtype=np.int64)
+        self.total = np.zeros(nseeds, dtype=np.int64)
+        self.pure = np.zeros(nseeds, dtype=np.int64)
+        self.shared = np.zeros(nseeds)
+        self.overlaps = np.zeros((nseeds, nseeds), dtype=np.int64)
+        self.groupTotal = np.zeros(len(self.groups), dtype=np.int64)
+        self.groupPure = np.zeros(len(self.groups), dtype=np.int64)
+        self.menu = 0
+
+    def Decisions(self, words):
+        """ (entries, seeds) decisions after the prescales of the entries of
+        (entries, 3) tw1, tw2, tt words, moving the prescale counters on """
+        bits = np.array([seed[1] for seed in self.seeds], dtype=np.int64)
+        raw = ((words[:, bits >> 6] >> (bits & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+        counters = self.counters + np.cumsum(raw, axis=0)
+        kept = np.zeros(raw.shape, dtype=bool)
+        for i, (name, bit, prescale, old) in enumerate(self.seeds):
+            kept[:, i] = raw[:, i] & prescaleKeeps(counters[:, i], old, prescale, self.exact)
+        if len(words) > 0:
+            self.counters = counters[-1]
+        return kept
+
+    def FillWords(self, words):
+        """ add the entries of (entries, 3) tw1, tw2, tt words, in the order
+        of the entries for the prescale counters """
+        kept = self.Decisions(np.asarray(words, dtype=np.uint64))
+        nkept = kept.sum(axis=1)
+        alone = nkept == 1
+        self.nentries += len(kept)
+        self.total += kept.sum(axis=0)
+        self.pure += kept[alone].sum(axis=0)
+        self.shared += (kept[nkept > 0]/nkept[nkept > 0, None].astype(np.float64)).sum(axis=0)
+        self.overlaps += np.rint(np.dot(kept.T.astype(np.float64), kept.astype(np.float64))).astype(np.int64)
+        self.menu += int((nkept > 0).sum())
+        for i, (name, members) in enumerate(self.groups):
+            ingroup = kept[:, members].any(axis=1)
+            self.groupTotal[i] += ingroup.sum()
+            self.groupPure[i] += (ingroup & (kept[:, members].sum(axis=1) == nkept)).sum()
+
+    def Fill(self, batch):
+        """ add the entries of a Batch read with the columns tw1, tw2 and tt """
+        self.FillWords(triggerWords(batch, self.bx))
+
+    def Run(self, ntuple, chunksize=100000, start=0, stop=None):
+        """ fill with the entries [start, stop) of an L1Ntuple """
+        for batch in ntuple.Iterate(WORDS, chunksize, start, stop):
+            self.Fill(batch)
+
+    def Add(self, other):
+        """ add the results filled on other entries, e.g. by another job """
+        if other.seeds != self.seeds or other.groups != self.groups:
+            raise ValueError("MenuRates : cannot add the results of another menu")
+        self.nentries += other.nentries
+        self.counters += other.counters
+        self.total += other.total
+        self.pure += other.pure
+        self.shared += other.shared
+        self.overlaps += other.overlaps
+        self.groupTotal += other.groupTotal
+        self.groupPure += other.groupPure
+        self.menu += other.menu
+
+    def fraction(self, count, scale):
+        return count*scale/float(max(self.nentries, 1))
+
+    def Rate(self, name, scale=1.):
+        """ fraction of the entries kept by the seed, times scale """
+        return self.fraction(self.total[self.names.index(name)], scale)
+
+    def PureRate(self, name, scale=1.):
+        return self.fraction(self.pure[self.names.index(name)], scale)
+
+    def SharedRate(self, name, scale=1.):
+        return self.fraction(self.shared[self.names.index(name)], scale)
+
+    def MenuRate(self, scale=1.):
+        return self.fraction(self.menu, scale)
+
+    def GroupRates(self, scale=1.):
+        """ (total, pure) rate of each group, by group name, the pure rate
+        counting the entries kept by no seed outside the group """
+        return dict([(name, (self.fraction(self.groupTotal[i], scale), self.fraction(self.groupPure[i], scale)))
+                     for i, (name, members) in enumerate(self.groups)])
+
+    def Table(self, scale=1.):
+        """ (name, bit, prescale, total, pure, shared rate) of the seeds """
+        return [(name, bit, prescale, self.fraction(self.total[i], scale), self.fraction(self.pure[i], scale),
+                 self.fraction(self.shared[i], scale)) for i, (name, bit, prescale, old) in enumerate(self.seeds)]
+
+    def Save(self, filename):
+        out = open(filename, "w")
+        json.dump({"seeds" : [list(seed) for seed in self.seeds], "exact" : self.exact, "bx" : self.bx,
+                   "groups" : [[name, [self.names[i] for i in members]] for name, members in self.groups],
+                   "nentries" : self.nentries, "counters" : self.counters.tolist(),
+                   "total" : self.total.tolist(), "pure" : self.pure.tolist(), "shared" : self.shared.tolist(),
+                   "overlaps" : self.overlaps.tolist(), "groupTotal" : self.groupTotal.tolist(),
+                   "groupPure" : self.groupPure.tolist(), "menu" : self.menu}, out)
+        out.close()
+
+    @staticmethod
+    def Load(filename):
+        f = open(filename)
+        saved = json.load(f)
+        f.close()
+        menu = MenuRates(saved["seeds"], dict(saved["groups"]), saved["exact"], saved["bx"])
+        menu.nentries = saved["nentries"]
+        menu.menu = saved["menu"]
+        menu.counters = np.array(saved["counters"], dtype=np.int64)
+        menu.total = np.array(saved["total"], dtype=np.int64)
+        menu.pure = np.array(saved["pure"], dtype=np.int64)
+        menu.shared = np.array(saved["shared"], dtype=np.float64)
+        menu.overlaps = np.array(saved["overlaps"], dtype=np.int64)
+        menu.groupTotal = np.array(saved["groupTotal"], dtype=np.int64)
+        menu.groupPure = np.array(saved["groupPure"], dtype=np.int64)
+        return menu
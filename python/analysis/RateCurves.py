@@ -0,0 +1,131 @@
+"""
+Rate versus threshold curves of the L1 seeds, in one pass over the ntuples
+
+For each curve, the ...Pt method of the vectorized L1AlgoFactory gives the
+thresholds an entry passes. The distribution of these thresholds is kept
+(exactly, the thresholds being discrete), so that the rate at any cut is
+read off without going through the entries again :
+
+  from L1TriggerDPG.L1Ntuples.analysis.RateCurves import RateCurves
+
+  curves = RateCurves([("SingleMu",    "SingleMuPt", (),      (None,)),
+                       ("DoubleMu_X_3p5", "DoubleMuPt", (),   (None, 3.5)),
+                       ("QuadJetC",    "QuadJetPt",  (True,), (None, None, None, None))])
+  curves.Run(ntuple)
+  print(curves.Rate("SingleMu", 16., scale))
+  curves.Save("curves.json")
+
+A curve is (name, ...Pt method, arguments of the method, cuts) : the
+thresholds given as None in the cuts are scanned together, the other ones
+are fixed. Rate(name, cut) is the rate of the seed with all the scanned
+thresholds at cut, e.g. QuadJetC above gives the rate of QuadJetC_X_X_X_X.
+"""
+
+import json
+import numpy as np
+
+from L1TriggerDPG.L1Ntuples.analysis.L1AlgoFactory import L1AlgoFactory, COLUMNS, NONE
+
+
+def scanValue(thresholds, cuts):
+    """ per entry, the largest cut of the scanned thresholds for which the
+    seed fires with the fixed ones, -10 when the fixed ones fail """
+    if not isinstance(thresholds, tuple):
+        thresholds = (thresholds,)
+    if len(thresholds) != len(cuts):
+        raise ValueError("RateCurves : %d cuts given for %d thresholds" % (len(cuts), len(thresholds)))
+    scanned = [threshold for threshold, cut in zip(thresholds, cuts) if cut is None]
+    if len(scanned) == 0:
+        raise ValueError("RateCurves : no threshold to scan")
+    value = np.minimum.reduce(scanned)
+    for threshold, cut in zip(thresholds, cuts):
+        if cut is not None:
+            value = np.where(threshold >= float(np.float32(cut)), value, NONE)
+    return value
+
+
+class RateCurves(object):
+
+    def __init__(self, curves, noHF=False, noTau=False):
+        self.curves = [(name, method, tuple(args), tuple(cuts)) for name, method, args, cuts in curves]
+        self.noHF = noHF
+        self.noTau = noTau
+        self.nentries = 0
+        self.values = {}
+        self.counts = {}
+        for name, method, args, cuts in self.curves:
+            self.values[name] = np.zeros(0)
+            self.counts[name] = np.zeros(0, dtype=np.int64)
+
+    def add(self, name, values, counts):
+        """ merge the (threshold, entries) of a curve """
+        values = np.concatenate((self.values[name], values))
+        counts = np.concatenate((self.counts[name], counts))
+        self.values[name], index = np.unique(values, return_inverse=True)
+        self.counts[name] = np.bincount(index, weights=counts, minlength=len(self.values[name])).astype(np.int64)
+
+    def Fill(self, batch):
+        """ add the entries of a Batch read with the L1AlgoFactory columns """
+        factory = L1AlgoFactory(batch)
+        factory.setHF(self.noHF)
+        factory.setTau(self.noTau)
+        for name, method, args, cuts in self.curves:
+            values, counts = np.unique(scanValue(factory.cached(method, *args), cuts), return_counts=True)
+            self.add(name, values, counts)
+        self.nentries += batch.size
+
+    def Run(self, ntuple, chunksize=100000, start=0, stop=None):
+        """ fill the curves with the entries [start, stop) of an L1Ntuple """
+        for batch in ntuple.Iterate(COLUMNS, chunksize, start, stop):
+            self.Fill(batch)
+
+    def Add(self, other):
+        """ add the curves filled on other entries, e.g. by another job """
+        for name, method, args, cuts in self.curves:
+            self.add(name, other.values[name], other.counts[name])
+        self.nentries += other.nentries
+
+    def Counts(self, name, cut):
+        """ number of entries passing the seed with the scanned thresholds at cut """
+        passed = self.values[name] >= float(np.float32(cut))
+        return int(self.counts[name][passed].sum())
+
+    def Rate(self, name, cut, scale=1.):
+        """ fraction of the entries passing, times scale (e.g. the zero bias
+        rate of the sample to get a rate in Hz) """
+        if self.nentries == 0:
+            return 0.
+        return self.Counts(name, cut)*scale/self.nentries
+
+    def Curve(self, name, cuts, scale=1.):
+        """ rates at each of the cuts """
+        return np.array([self.Rate(name, cut, scale) for cut in cuts])
+
+    def Histogram(self, name, nbins, xmin, xmax, scale=1.):
+        """ TH1F of the rate versus the cut at the low edge of each bin """
+        import ROOT
+        hist = ROOT.TH1F("rate_"+name, name+";threshold;rate", nbins, xmin, xmax)
+        for ibin in range(1, nbins+1):
+            hist.SetBinContent(ibin, self.Rate(name, hist.GetXaxis().GetBinLowEdge(ibin), scale))
+        return hist
+
+    def Save(self, filename):
+        out = open(filename, "w")
+        json.dump({"nentries" : self.nentries, "noHF" : self.noHF, "noTau" : self.noTau,
+                   "curves" : [{"name" : name, "method" : method, "args" : list(args), "cuts" : list(cuts),
+                                "values" : self.values[name].tolist(), "counts" : self.counts[name].tolist()}
+                               for name, method, args, cuts in self.curves]}, out)
+        out.close()
+
+    @staticmethod
+    def Load(filename):
+        f = open(filename)
+        saved = json.load(f)
+        f.close()
+        curves = RateCurves([(curve["name"], curve["method"], curve["args"], curve["cuts"]) for curve in saved["curves"]],
+                            saved["noHF"], saved["noTau"])
+        for curve in saved["curves"]:
+            curves.values[curve["name"]] = np.array(curve["values"], dtype=np.float64)
+            curves.counts[curve["name"]] = np.array(curve["counts"], dtype=np.int64)
+        curves.nentries = saved["nentries"]
+        return curves
@@ -0,0 +1,452 @@
+"""
+Rate extrapolation of the L1 seeds to any luminosity and number of
+bunches, python replacement of macros/menu/extrapolateFromFile_5e33.C and
+extrapolateFromFile_7e33.C
+
+The algo bits of the ntuples (GT tw1 and tw2 of the central BX) are
+counted once per lumisection into a RateTable (lumisections x 128 bits),
+joined with the delivered and recorded luminosity of the lumisections as
+cached by scripts/GetLumi.py. The table is saved next to the ntuples and
+reused as long as the list of ntuples does not change :
+
+  from L1TriggerDPG.L1Ntuples.analysis.RateExtrapolation import RateTable, RateExtrapolation, readLumis, fitFunctions
+
+  table = RateTable.Cached("ntuples.txt", "rates.npz")
+  table.JoinLumis(readLumis("lumis/lumis.db"))
+  table.SetBunches(1380)
+  extrapolation = RateExtrapolation(table.Select(pileup=(16., 28.)), fitFunctions("7e33"))
+  for lumi, nbunches in [(5e33, 1380), (7e33, 1380), (7e33, 2760)]:
+      print(extrapolation.Rates(lumi, nbunches))
+
+For a zero bias sample, the fraction of the entries firing a bit in a
+lumisection is the probability of the bit per colliding bunch crossing, at
+the pileup of the lumisection. As in the macros, this fraction is fitted
+per bit with a polynomial (the "pol0", "pol1", "pol2" of FitFunction)
+versus the pileup. The rate at a target luminosity L with nb colliding
+bunches is then nb * F_REV * fraction(L * SIGMA_INEL / (nb * F_REV)). The
+fits are done once, each scenario is only an evaluation of the
+polynomials.
+"""
+
+import os
+import sqlite3
+import numpy as np
+
+F_REV = 11246.          # LHC revolution frequency (Hz)
+LS_LENGTH = 23.31       # length of a lumisection (s)
+SIGMA_INEL = 69.3e-27   # pp inelastic cross section at 8 TeV (cm2)
+NBITS = 128
+
+# (bit, name, fit function of the 5e33 extrapolation) of the 2012 menu
+MENU_2012 = [
+    (  0, "L1_ZeroBias",                             "pol2"),
+    (  1, "L1_ZeroBias_Instance1",                   "pol2"),
+    (  2, "L1_BeamGas_Hf_BptxPlusPostQuiet",         "pol2"),
+    (  4, "L1_BeamGas_Hf_BptxMinusPostQuiet",        "pol2"),
+    (  5, "L1_InterBunch_Bptx",                      "pol2"),
+    (  8, "L1_BeamHalo",                             "pol2"),
+    (  9, "L1_TripleMu0",                            "pol1"),
+    ( 10, "L1_Mu4_HTT125",                           "pol2"),
+    ( 11, "L1_Mu3p5_EG12",                           "pol2"),
+    ( 12, "L1_Mu12er_ETM20",                         "pol2"),
+    ( 13, "L1_MuOpen_EG12",                          "pol2"),
+    ( 14, "L1_Mu12_EG7",                             "pol2"),
+    ( 15, "L1_SingleJet16",                          "pol2"),
+    ( 16, "L1_SingleJet36",                          "pol2"),
+    ( 17, "L1_SingleJet52",                          "pol2"),
+    ( 18, "L1_SingleJet68",                          "pol2"),
+    ( 19, "L1_SingleJet92",                          "pol2"),
+    ( 20, "L1_SingleJet128",                         "pol2"),
+    ( 21, "L1_DoubleEG6_HTT100",                     "pol2"),
+    ( 22, "L1_DoubleEG6_HTT125",                     "pol2"),
+    ( 23, "L1_Mu5_DoubleEG5",                        "pol2"),
+    ( 24, "L1_DoubleMu3p5_EG5",                      "pol2"),
+    ( 25, "L1_DoubleMu5_EG5",                        "pol1"),
+    ( 26, "L1_DoubleMu0er_HighQ",                    "pol1"),
+    ( 27, "L1_Mu5_DoubleEG6",                        "pol1"),
+    ( 28, "L1_DoubleJetC44_ETM30",                   "pol2"),
+    ( 29, "L1_Mu3_JetC16_WdEtaPhi2",                 "pol2"),
+    ( 30, "L1_Mu3_JetC52_WdEtaPhi2",                 "pol2"),
+    ( 31, "L1_SingleEG7",                            "pol1"),
+    ( 32, "L1_SingleIsoEG20er",                      "pol1"),
+    ( 33, "L1_EG22_ForJet24",                        "pol2"),
+    ( 34, "L1_EG22_ForJet32",                        "pol2"),
+    ( 35, "L1_DoubleJetC44_Eta1p74_WdEta4",          "pol2"),
+    ( 36, "L1_DoubleJetC56_Eta1p74_WdEta4",          "pol2"),
+    ( 37, "L1_DoubleTauJet44er",                     "pol1"),
+    ( 38, "L1_DoubleEG_13_7",                        "pol1"),
+    ( 39, "L1_TripleEG_12_7_5",                      "pol1"),
+    ( 40, "L1_HTT125",                               "pol0"),
+    ( 41, "L1_DoubleJetC52",                         "pol0"),
+    ( 42, "L1_SingleMu14er",                         "pol1"),
+    ( 43, "L1_SingleIsoEG18er",                      "pol1"),
+    ( 44, "L1_DoubleMu_10_Open",                     "pol1"),
+    ( 45, "L1_DoubleMu_10_3p5",                      "pol1"),
+    ( 46, "L1_ETT80",                                "pol2"),
+    ( 47, "L1_SingleEG5",                            "pol1"),
+    ( 48, "L1_SingleEG18er",                         "pol1"),
+    ( 49, "L1_SingleEG22",                           "pol1"),
+    ( 50, "L1_SingleEG12",                           "pol1"),
+    ( 51, "L1_SingleEG24",                           "pol1"),
+    ( 52, "L1_SingleEG20",                           "pol1"),
+    ( 53, "L1_SingleEG30",                           "pol1"),
+    ( 54, "L1_DoubleMu3er_HighQ_WdEta22",            "pol1"),
+    ( 55, "L1_SingleMuOpen",                         "pol1"),
+    ( 56, "L1_SingleMu16",                           "pol1"),
+    ( 57, "L1_SingleMu3",                            "pol0"),
+    ( 58, "L1_DoubleMu_5er_0er_HighQ_WdEta22",       "pol1"),
+    ( 59, "L1_SingleMu7",                            "pol1"),
+    ( 60, "L1_SingleMu20er",                         "pol1"),
+    ( 61, "L1_SingleMu12",                           "pol1"),
+    ( 62, "L1_SingleMu20",                           "pol1"),
+    ( 63, "L1_SingleMu25er",                         "pol1"),
+    ( 64, "L1_ETM100",                               "pol2"),
+    ( 65, "L1_ETM36",                                "pol2"),
+    ( 66, "L1_ETM30",                                "pol2"),
+    ( 67, "L1_ETM50",                                "pol2"),
+    ( 68, "L1_ETM70",                                "pol2"),
+    ( 69, "L1_ETT300",                               "pol2"),
+    ( 70, "L1_HTT100",                               "pol0"),
+    ( 71, "L1_HTT150",                               "pol2"),
+    ( 72, "L1_HTT175",                               "pol2"),
+    ( 73, "L1_HTT200",                               "pol2"),
+    ( 74, "L1_Mu10er_JetC12_WdEtaPhi1_DoubleJetC_20_12", "pol2"),
+    ( 75, "L1_Mu10er_JetC32",                        "pol2"),
+    ( 76, "L1_DoubleJetC64",                         "pol2"),
+    ( 77, "L1_Mu10er_JetC12_WdEtaPhi1_DoubleJetC_32_12", "pol2"),
+    ( 78, "L1_SingleJetC32_NotBptxOR",               "pol2"),
+    ( 79, "L1_ETM40",                                "pol2"),
+    ( 80, "L1_Mu0_HTT50",                            "pol0"),
+    ( 81, "L1_Mu0_HTT100",                           "pol2"),
+    ( 82, "L1_DoubleEG5",                            "pol2"),
+    ( 83, "L1_IsoEG18er_JetC_Cen36_Tau28_dPhi1",     "pol2"),
+    ( 84, "L1_EG18er_JetC_Cen36_Tau28_dPhi1",        "pol2"),
+    ( 86, "L1_SingleMu16er",                         "pol1"),
+    ( 87, "L1_EG18er_JetC_Cen28_Tau20_dPhi1",        "pol2"),
+    ( 88, "L1_IsoEG18er_JetC_Cen32_Tau24_dPhi1",     "pol2"),
+    ( 89, "L1_SingleMu6_NotBptxOR",                  "pol2"),
+    ( 90, "L1_Mu8_DoubleJetC20",                     "pol2"),
+    ( 92, "L1_DoubleMu0",                            "pol1"),
+    ( 94, "L1_EG8_DoubleJetC20",                     "pol2"),
+    ( 95, "L1_DoubleMu5",                            "pol1"),
+    ( 96, "L1_DoubleJetC56",                         "pol2"),
+    ( 97, "L1_TripleMu0_HighQ",                      "pol1"),
+    ( 98, "L1_TripleMu_5_5_0",                       "pol1"),
+    ( 99, "L1_ETT140",                               "pol2"),
+    (100, "L1_DoubleJetC36",                         "pol2"),
+    (101, "L1_DoubleJetC36_ETM30",                   "pol2"),
+    (102, "L1_SingleJet36_FwdVeto5",                 "pol2"),
+    (103, "L1_TripleJet_64_44_24_VBF",               "pol2"),
+    (104, "L1_TripleJet_64_48_28_VBF",               "pol2"),
+    (105, "L1_TripleJet_68_48_32_VBF",               "pol2"),
+    (106, "L1_QuadJetC40",                           "pol2"),
+    (107, "L1_QuadJetC36",                           "pol0"),
+    (108, "L1_TripleJetC_52_28_28",                  "pol2"),
+    (109, "L1_QuadJetC32",                           "pol0"),
+    (110, "L1_DoubleForJet16_EtaOpp",                "pol2"),
+    (111, "L1_DoubleEG3_FwdVeto",                    "pol2"),
+    (112, "L1_SingleJet20_Central_NotBptxOR",        "pol2"),
+    (113, "L1_SingleJet16_FwdVeto5",                 "pol2"),
+    (114, "L1_SingleForJet16",                       "pol2"),
+    (115, "L1_DoubleJetC36_RomanPotsOR",             "pol2"),
+    (116, "L1_SingleMu20_RomanPotsOR",               "pol2"),
+    (117, "L1_SingleEG20_RomanPotsOR",               "pol2"),
+    (118, "L1_DoubleMu5_RomanPotsOR",                "pol2"),
+    (119, "L1_DoubleEG5_RomanPotsOR",                "pol2"),
+    (120, "L1_SingleJet52_RomanPotsOR",              "pol2"),
+    (122, "L1_SingleMu18er",                         "pol1"),
+    (123, "L1_MuOpen_EG5",                           "pol1"),
+    (124, "L1_DoubleMu_12_5",                        "pol1"),
+    (125, "L1_TripleEG7",                            "pol1"),
+]
+
+# fit functions changed for the 7e33 extrapolation
+FIT_7E33 = {"L1_MuOpen_EG12" : "pol0", "L1_SingleJet16" : "pol0", "L1_SingleEG20" : "pol0", "L1_ETM36" : "pol0",
+            "L1_EG18er_JetC_Cen36_Tau28_dPhi1" : "pol0", "L1_EG18er_JetC_Cen28_Tau20_dPhi1" : "pol0",
+            "L1_DoubleJetC56" : "pol0", "L1_TripleJet_64_44_24_VBF" : "pol0", "L1_TripleJet_64_48_28_VBF" : "pol0"}
+
+
+def bitNames():
+    """ name of the bits of the 2012 menu, by bit """
+    return dict([(bit, name) for bit, name, fit in MENU_2012])
+
+
+def fitFunctions(menu="5e33"):
+    """ fit function of the bits of the 2012 menu, as in extrapolateFromFile_<menu>.C """
+    if menu not in ("5e33", "7e33"):
+        raise ValueError("RateExtrapolation : unknown menu -> "+menu)
+    fits = {}
+    for bit, name, fit in MENU_2012:
+        if menu == "7e33":
+            fit = FIT_7E33.get(name, fit)
+        fits[bit] = fit
+    return fits
+
+
+def readLumis(dbfile="lumis/lumis.db", norm="0.0429"):
+    """ (runs, lumisections, delivered, recorded) of the luminosity cache
+    of scripts/GetLumi.py, in /ub per lumisection """
+    if not os.path.exists(dbfile):
+        raise IOError("File "+dbfile+" is not found !")
+    db = sqlite3.connect(dbfile)
+    rows = db.execute("select run, ls, delivered, reported from lumis where norm=? order by run, ls", (norm,)).fetchall()
+    db.close()
+    rows = np.array(rows, dtype=np.float64).reshape(-1, 4)
+    return rows[:, 0].astype(np.int64), rows[:, 1].astype(np.int64), rows[:, 2], rows[:, 3]
+
+
+def lumiKey(run, lumi):
+    return (np.asarray(run, dtype=np.int64) << 32) | np.asarray(lumi, dtype=np.int64)
+
+
+def fileStamp(fname):
+    """ (size, modification time) of an ntuple file, to tell a file
+    rewritten under the same name, (-1, -1) if it cannot be opened """
+    if "://" not in fname:
+        if not os.path.exists(fname):
+            return (-1, -1)
+        stat = os.stat(fname)
+        return (int(stat.st_size), int(stat.st_mtime))
+    import ROOT
+    f = ROOT.TFile.Open(fname)
+    if not f:
+        return (-1, -1)
+    stamp = (int(f.GetSize()), int(f.GetModificationDate().Convert()))
+    f.Close()
+    return stamp
+
+
+def unpackBits(words):
+    """ 0/1 array (entries, 64) of the bits of 64 bits words, bit 0 first """
+    words = np.ascontiguousarray(words, dtype="<u8")
+    bits = np.unpackbits(words.view(np.uint8).reshape(-1, 8, 1), axis=2)
+    return bits[:, :, ::-1].reshape(-1, 64)
+
+
+class RateTable(object):
+    """ entries and algo bit counts per lumisection, sorted by run and
+    lumisection, with the luminosity and number of bunches of the
+    lumisections once joined """
+
+    def __init__(self):
+        self.run = np.zeros(0, dtype=np.int64)
+        self.lumi = np.zeros(0, dtype=np.int64)
+        self.entries = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros((0, NBITS), dtype=np.int64)
+        self.files = []
+        self.stamps = []
+        self.JoinLumis((self.run, self.lumi, np.zeros(0), np.zeros(0)))
+        self.SetBunches(0)
+
+    def __len__(self):
+        return len(self.run)
+
+    def add(self, run, lumi, entries, counts):
+        """ merge the counts of lumisections, the new lumisections have no luminosity """
+        keys = np.concatenate((lumiKey(self.run, self.lumi), lumiKey(run, lumi)))
+        keys, index = np.unique(keys, return_inverse=True)
+        self.entries = np.bincount(index, weights=np.concatenate((self.entries, entries)),
+                                   minlength=len(keys)).astype(np.int64)
+        merged = np.zeros((len(keys), NBITS), dtype=np.int64)
+        np.add.at(merged, index, np.concatenate((self.counts, counts)))
+        self.counts = merged
+        self.run = keys >> 32
+        self.lumi = keys & 0xffffffff
+        self.delivered = np.full(len(keys), np.nan)
+        self.recorded = np.full(len(keys), np.nan)
+        self.nbunches = np.zeros(len(keys))
+
+    def Fill(self, batch, bx=2):
+        """ add the entries of a Batch read with the columns run, lumi, tw1
+        and tw2, bx is the position of the central BX in tw1 and tw2 """
+        if batch.size == 0:
+            return
+        bits = np.concatenate((unpackBits(batch["tw1"].pad(bx+1, np.uint64(0))[:, bx]),
+                               unpackBits(batch["tw2"].pad(bx+1, np.uint64(0))[:, bx])), axis=1)
+        keys, index = np.unique(lumiKey(batch["run"], batch["lumi"]), return_inverse=True)
+        order = np.argsort(index, kind="mergesort")
+        starts = np.searchsorted(index[order], np.arange(len(keys)))
+        counts = np.add.reduceat(bits[order].astype(np.int64), starts, axis=0)
+        self.add(keys >> 32, keys & 0xffffffff, np.bincount(index, minlength=len(keys)), counts)
+
+    def Run(self, ntuple, chunksize=100000, start=0, stop=None, bx=2):
+        """ fill the table with the entries [start, stop) of an L1Ntuple """
+        for batch in ntuple.Iterate(["run", "lumi", "tw1", "tw2"], chunksize, start, stop):
+            self.Fill(batch, bx)
+
+    def Add(self, other):
+        """ add the table filled on other entries, e.g. by another job """
+        self.add(other.run, other.lumi, other.entries, other.counts)
+        for fname, stamp in zip(other.files, other.stamps):
+            if fname not in self.files:
+                self.files.append(fname)
+                self.stamps.append(stamp)
+
+    def JoinLumis(self, lumis):
+        """ delivered and recorded luminosity of the lumisections, from the
+        (runs, lumisections, delivered, recorded) of readLumis. The
+        lumisections missing from lumis get NaN """
+        runs, lss, delivered, recorded = lumis
+        self.delivered = np.full(len(self), np.nan)
+        self.recorded = np.full(len(self), np.nan)
+        if len(runs) == 0:
+            return
+        keys = lumiKey(runs, lss)
+        order = np.argsort(keys)
+        keys = keys[order]
+        mine = lumiKey(self.run, self.lumi)
+        where = np.minimum(np.searchsorted(keys, mine), len(keys)-1)
+        found = keys[where] == mine
+        self.delivered[found] = np.asarray(delivered, dtype=np.float64)[order][where[found]]
+        self.recorded[found] = np.asarray(recorded, dtype=np.float64)[order][where[found]]
+
+    def SetBunches(self, nbunches):
+        """ number of colliding bunches, for all the runs or as a dictionary by run """
+        if isinstance(nbunches, dict):
+            self.nbunches = np.array([nbunches.get(run, nbunches.get(str(run), 0)) for run in self.run], dtype=np.float64)
+        else:
+            self.nbunches = np.full(len(self), float(nbunches))
+
+    @property
+    def instLumi(self):
+        """ average instantaneous luminosity of the lumisections (cm-2 s-1) """
+        return self.delivered*1e30/LS_LENGTH
+
+    @property
+    def pileup(self):
+        """ average number of interactions per crossing of the lumisections """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.instLumi*SIGMA_INEL/(self.nbunches*F_REV)
+
+    def Select(self, runs=None, pileup=None, minLive=0.):
+        """ RateTable of the lumisections of the runs (all by default) with
+        a luminosity, colliding bunches, a pileup in the [min, max) range and
+        at least the fraction minLive of the luminosity recorded """
+        keep = np.isfinite(self.delivered) & (self.nbunches > 0) & (self.entries > 0)
+        if runs is not None:
+            keep &= np.isin(self.run, np.asarray(list(runs), dtype=np.int64))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if pileup is not None:
+                keep &= (self.pileup >= pileup[0]) & (self.pileup < pileup[1])
+            if minLive > 0.:
+                keep &= self.recorded >= minLive*self.delivered
+        table = RateTable()
+        for name in ("run", "lumi", "entries", "counts", "delivered", "recorded", "nbunches"):
+            setattr(table, name, getattr(self, name)[keep])
+        table.files = list(self.files)
+        table.stamps = list(self.stamps)
+        return table
+
+    def Totals(self):
+        """ entries, delivered and recorded luminosity of the table """
+        return int(self.entries.sum()), float(np.nansum(self.delivered)), float(np.nansum(self.recorded))
+
+    def Save(self, filename):
+        out = open(filename, "wb")
+        np.savez(out, run=self.run, lumi=self.lumi, entries=self.entries, counts=self.counts,
+                 files=np.array(self.files, dtype=str), stamps=np.array(self.stamps, dtype=np.int64).reshape(-1, 2))
+        out.close()
+
+    @staticmethod
+    def Load(filename):
+        """ RateTable saved by Save, without luminosity and bunches """
+        saved = np.load(filename)
+        table = RateTable()
+        table.add(saved["run"], saved["lumi"], saved["entries"], saved["counts"])
+        table.files = [str(fname) for fname in saved["files"]]
+        if "stamps" in saved.files:
+            table.stamps = [tuple(int(field) for field in stamp) for stamp in saved["stamps"]]
+        return table
+
+    @staticmethod
+    def Cached(filelist, cachefile, chunksize=100000, bx=2):
+        """ RateTable of the ntuples of filelist, read from cachefile when it
+        was made from the same ntuples, with the same sizes and modification
+        times, else filled and saved to cachefile """
+        from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple
+        ntuple = L1Ntuple()
+        ntuple.OpenNtupleList(filelist)
+        stamps = [fileStamp(fname) for fname in ntuple.listNtuples]
+        if os.path.exists(cachefile):
+            table = RateTable.Load(cachefile)
+            if table.files == ntuple.listNtuples and table.stamps == stamps:
+                print("Rate table read from "+cachefile)
+                return table
+        ntuple.CheckFirstFile()
+        ntuple.OpenWithoutInit()
+        ntuple.Init()
+        table = RateTable()
+        table.Run(ntuple, chunksize, bx=bx)
+        table.files = list(ntuple.listNtuples)
+        table.stamps = stamps
+        table.Save(cachefile)
+        print("Rate table written to "+cachefile)
+        return table
+
+
+def fitDegree(fit):
+    """ degree of a fit function "pol0", "pol1", "pol2" or of an int """
+    if isinstance(fit, str):
+        if not fit.startswith("pol"):
+            raise ValueError("RateExtrapolation : only polynomials are supported -> "+fit)
+        return int(fit[3:])
+    return int(fit)
+
+
+class RateExtrapolation(object):
+    """ per bit polynomial fits of the fraction of the entries firing the
+    bit versus the pileup, over the lumisections of a RateTable with
+    luminosity and bunches. fits gives the fit function of the bits, by bit,
+    default for the others """
+
+    def __init__(self, table, fits=None, default="pol2"):
+        table = table.Select()
+        if len(table) == 0:
+            raise ValueError("RateExtrapolation : no lumisection with luminosity and bunches")
+        self.table = table
+        self.degrees = np.full(NBITS, fitDegree(default), dtype=np.int64)
+        for bit, fit in (fits or {}).items():
+            self.degrees[bit] = fitDegree(fit)
+        self.coefficients = self.Fit()
+
+    def Fit(self):
+        """ coefficients (bits, highest degree + 1) of the fits, from the
+        highest degree down as for np.polyval. Each lumisection is weighted
+        with its number of entries """
+        x = self.table.pileup
+        fractions = self.table.counts/self.table.entries[:, None].astype(np.float64)
+        weights = np.sqrt(self.table.entries.astype(np.float64))
+        maxdegree = self.degrees.max()
+        coefficients = np.zeros((NBITS, maxdegree+1))
+        for degree in np.unique(self.degrees):
+            bits = np.nonzero(self.degrees == degree)[0]
+            # no more parameters than distinct pileup values
+            degree = min(degree, len(np.unique(x))-1)
+            fitted = np.polyfit(x, fractions[:, bits], degree, w=weights).reshape(degree+1, -1)
+            coefficients[bits, maxdegree-degree:] = fitted.T
+        return coefficients
+
+    def Fraction(self, pileup):
+        """ fitted fraction of the crossings firing each bit at pileup, one
+        row per pileup value for an array """
+        pileup = np.asarray(pileup, dtype=np.float64)
+        powers = pileup[..., None]**np.arange(self.coefficients.shape[1]-1, -1, -1)
+        return np.maximum(np.dot(powers, self.coefficients.T), 0.)
+
+    def Pileup(self, lumi, nbunches):
+        """ average number of interactions per crossing at the instantaneous
+        luminosity lumi (cm-2 s-1) with nbunches colliding bunches """
+        return np.asarray(lumi, dtype=np.float64)*SIGMA_INEL/(np.asarray(nbunches, dtype=np.float64)*F_REV)
+
+    def Rates(self, lumi, nbunches):
+        """ rate (Hz) of each bit at the luminosity lumi (cm-2 s-1) with
+        nbunches colliding bunches, one row per scenario for arrays """
+        nbunches = np.asarray(nbunches, dtype=np.float64)
+        return self.Fraction(self.Pileup(lumi, nbunches))*(nbunches*F_REV)[..., None]
+
+    def Rate(self, bit, lumi, nbunches):
+        return float(self.Rates(lumi, nbunches)[bit])
+
+    def Measured(self):
+        """ (pileup, fraction of the entries) of the lumisections, for each bit """
+        return self.table.pileup, self.table.counts/self.table.entries[:, None].astype(np.float64)
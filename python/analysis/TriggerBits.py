@@ -0,0 +1,187 @@
+"""
+Rates, pairwise overlaps and unique rates of the 192 GT bits (algo bits
+0-127 of tw1 and tw2, technical bits 128-191 of tt), python counterpart
+of the correlation plot of macros/L1Rates/L1RatesAnalyzer.C
+
+The trigger words of a chunk of entries are transposed into one bitset per
+trigger bit (64 entries per word), the overlap of two bits is then the
+popcount of the AND of their bitsets, and the entries firing only one of
+the followed bits are found from the popcount of the trigger words :
+
+  from L1TriggerDPG.L1Ntuples.analysis.TriggerBits import BitCorrelations, readBitMasks
+
+  correlations = BitCorrelations(masks=readBitMasks("macros/L1Rates/conf/bitmasks.dat"))
+  correlations.Run(ntuple)
+  print(correlations.Top(15))
+  print(correlations.Overlap()[55, 56], correlations.Unique()[55])
+"""
+
+import json
+import numpy as np
+
+NBITS = 192
+NWORDS = 3
+WORDS = ["tw1", "tw2", "tt"]
+
+# number of bits set of each byte value
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """ number of bits set in each 64 bits word """
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).astype(np.int64)
+    return _POPCOUNT8[words.view(np.uint8)].reshape(words.shape+(8,)).sum(axis=-1, dtype=np.int64)
+
+
+def readConfig(filename):
+    """ key=value lines of the L1Rates configuration files, % starts a comment """
+    config = {}
+    f = open(filename)
+    for line in f:
+        line = line.split("%")[0].strip()
+        if "=" in line:
+            key, value = line.split("=", 1)
+            config[key.strip()] = value.strip()
+    f.close()
+    return config
+
+
+def readBitMasks(filename):
+    """ the masks m1, m2, m3 of tw1, tw2 and tt of conf/bitmasks.dat """
+    config = readConfig(filename)
+    return np.array([int(config["m%d" % (i+1)], 16) for i in range(NWORDS)], dtype=np.uint64)
+
+
+def triggerWords(batch, bx=2, masks=None):
+    """ (entries, 3) tw1, tw2 and tt words of the bunch crossing bx, the
+    position in the GT readout (2 is the triggering crossing) """
+    words = np.stack([batch[word].pad(bx+1, np.uint64(0))[:, bx] for word in WORDS], axis=1)
+    if masks is not None:
+        words &= np.asarray(masks, dtype=np.uint64)
+    return words
+
+
+def bitMask(bits):
+    """ the three words with the given bits set """
+    masks = np.zeros(NWORDS, dtype=np.uint64)
+    for bit in bits:
+        masks[bit >> 6] |= np.uint64(1) << np.uint64(bit & 63)
+    return masks
+
+
+def transpose(words):
+    """ (192, entries/64) bitsets of the trigger bits : bit j of word k of
+    row i is bit i of the entry 64*k+j """
+    nentries = len(words)
+    bits = np.unpackbits(np.ascontiguousarray(words, dtype="<u8").view(np.uint8).reshape(nentries, NWORDS*8, 1), axis=2)
+    bits = bits[:, :, ::-1].reshape(nentries, NBITS)
+    nwords = (nentries+63)//64
+    packed = np.zeros((NBITS, nwords*8), dtype=np.uint8)
+    packed[:, :(nentries+7)//8] = np.packbits(bits.T, axis=1)
+    return packed.view(np.uint64)
+
+
+class BitCorrelations(object):
+    """ entries firing each bit, each pair of bits and each bit alone, for
+    the followed bits (default : all of them) after the masks """
+
+    def __init__(self, bits=None, masks=None, bx=2):
+        self.bits = np.arange(NBITS) if bits is None else np.array(sorted(bits), dtype=np.int64)
+        self.masks = bitMask(self.bits)
+        if masks is not None:
+            self.masks &= np.asarray(masks, dtype=np.uint64)
+        self.bx = bx
+        self.nentries = 0
+        self.counts = np.zeros(NBITS, dtype=np.int64)
+        self.overlaps = np.zeros((NBITS, NBITS), dtype=np.int64)
+        self.unique = np.zeros(NBITS, dtype=np.int64)
+
+    def FillWords(self, words):
+        """ add the entries of (entries, 3) tw1, tw2, tt words """
+        words = np.asarray(words, dtype=np.uint64) & self.masks
+        self.nentries += len(words)
+        if len(words) == 0:
+            return
+        sets = transpose(words)
+        # only the bits fired at least once take part in the pairs
+        fired = np.nonzero(sets.any(axis=1))[0]
+        for position, i in enumerate(fired):
+            overlap = popcount(sets[i] & sets[fired[position:]]).sum(axis=1)
+            self.overlaps[i, fired[position:]] += overlap
+            self.overlaps[fired[position+1:], i] += overlap[1:]
+        self.counts += popcount(sets).sum(axis=1)
+        alone = transpose(np.where((popcount(words).sum(axis=1) == 1)[:, None], words, np.uint64(0)))
+        self.unique += popcount(alone).sum(axis=1)
+
+    def Fill(self, batch):
+        """ add the entries of a Batch read with the columns tw1, tw2 and tt """
+        self.FillWords(triggerWords(batch, self.bx))
+
+    def Run(self, ntuple, chunksize=100000, start=0, stop=None):
+        """ fill with the entries [start, stop) of an L1Ntuple """
+        for batch in ntuple.Iterate(WORDS, chunksize, start, stop):
+            self.Fill(batch)
+
+    def Add(self, other):
+        """ add the counts filled on other entries, e.g. by another job """
+        self.nentries += other.nentries
+        self.counts += other.counts
+        self.overlaps += other.overlaps
+        self.unique += other.unique
+
+    def Rates(self, scale=1.):
+        """ fraction of the entries firing each bit, times scale """
+        return self.counts*scale/float(max(self.nentries, 1))
+
+    def Overlap(self, scale=1.):
+        """ (192, 192) fraction of the entries firing both bits, times scale """
+        return self.overlaps*scale/float(max(self.nentries, 1))
+
+    def Unique(self, scale=1.):
+        """ fraction of the entries firing the bit and none of the other
+        followed bits, times scale """
+        return self.unique*scale/float(max(self.nentries, 1))
+
+    def Top(self, n=15):
+        """ the n bits fired the most, as getTopTriggers """
+        order = np.lexsort((np.arange(NBITS), -self.counts))
+        return [int(bit) for bit in order[:n] if self.counts[bit] > 0]
+
+    def Histogram(self, bits=None, name="h2"):
+        """ TH2D of the overlaps of the bits in % of the entries, as the
+        correlation plot of L1RatesAnalyzer (default : the 15 top bits) """
+        import ROOT
+        if bits is None:
+            bits = sorted(self.Top())
+        overlap = self.Overlap(100.)
+        hist = ROOT.TH2D(name, "Correlations between two trigger bits", len(bits), 0, len(bits), len(bits), 0, len(bits))
+        for r, first in enumerate(bits):
+            hist.GetXaxis().SetBinLabel(r+1, str(first))
+            hist.GetYaxis().SetBinLabel(r+1, str(first))
+            for k, second in enumerate(bits):
+                hist.SetBinContent(r+1, k+1, overlap[first, second])
+        hist.GetXaxis().SetTitle("Bit number")
+        hist.GetYaxis().SetTitle("Bit number")
+        return hist
+
+    def Save(self, filename):
+        out = open(filename, "w")
+        json.dump({"nentries" : self.nentries, "bx" : self.bx, "bits" : self.bits.tolist(),
+                   "masks" : ["0x%016x" % mask for mask in self.masks],
+                   "counts" : self.counts.tolist(), "overlaps" : self.overlaps.tolist(),
+                   "unique" : self.unique.tolist()}, out)
+        out.close()
+
+    @staticmethod
+    def Load(filename):
+        f = open(filename)
+        saved = json.load(f)
+        f.close()
+        correlations = BitCorrelations(saved["bits"], [int(mask, 16) for mask in saved["masks"]], saved["bx"])
+        correlations.nentries = saved["nentries"]
+        correlations.counts = np.array(saved["counts"], dtype=np.int64)
+        correlations.overlaps = np.array(saved["overlaps"], dtype=np.int64)
+        correlations.unique = np.array(saved["unique"], dtype=np.int64)
+        return correlations
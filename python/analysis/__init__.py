@@ -0,0 +1 @@
+# python analysis tools for the L1 ntuples, see L1Ntuple.py
@@ -17,14 +17,15 @@ l1MuonRecoTreeProducer = cms.EDAnalyzer("L1MuonRecoTreeProducer",
   # maximum delta R between trigger object and muon
   triggerMaxDeltaR = cms.double(.1),
   # trigger to match to, may use regexp wildcard as supported by ROOT's 
-  # TString; up to now the first found match (per run) is used.
+  # TString; all the matching paths are used, resolved once per HLT table
+  # and printed at the first run of each table.
   isoTriggerNames = cms.vstring(
         "HLT_IsoMu17_eta2p1_v*",
-        "HLT_IsoMu17_v*"
+        "HLT_IsoMu17_v*",
         "HLT_IsoMu20_eta2p1_v*",
-        "HLT_IsoMu20_v*"
+        "HLT_IsoMu20_v*",
         "HLT_IsoMu24_eta2p1_v*",
-        "HLT_IsoMu24_v*"
+        "HLT_IsoMu24_v*",
         "HLT_IsoMu27_eta2p1_v*",
         "HLT_IsoMu27_v*"
         ),
@@ -2,6 +2,8 @@ import FWCore.ParameterSet.Config as cms
 
 l1NtupleProducer = cms.EDAnalyzer("L1NtupleProducer",
     verbose              = cms.untracked.bool(False),
+    # wall/CPU time and bytes per subsystem, in the profile directory of the TFileService output
+    profile              = cms.untracked.bool(False),
     physVal              = cms.bool(True),
 
     generatorSource      = cms.InputTag("none"),
@@ -55,6 +57,32 @@ l1NtupleProducer = cms.EDAnalyzer("L1NtupleProducer",
     puMCHist             = cms.untracked.string(""),
     puDataHist           = cms.untracked.string(""),
 
+    # baskets and compression of the L1Tree branches : "default" for all the
+    # branches, overridden per branch (Event, Generator, Simulation, GMT, GT,
+    # GCT, RCT, DTTF, CSCTF, CALO). algorithm 1 : zlib, 2 : lzma, level -1
+    # keeps the compression of the output file. autoFlush in entries, or in
+    # bytes if negative, also per branch with splitTrees. report prints the
+    # size of each branch at end of job
+    treeSettings         = cms.untracked.PSet(
+        autoFlush  = cms.untracked.int64(-30000000),
+        report     = cms.untracked.bool(False),
+        default    = cms.untracked.PSet(
+            basketSize = cms.untracked.int32(32000),
+            splitLevel = cms.untracked.int32(3),
+            algorithm  = cms.untracked.int32(1),
+            level      = cms.untracked.int32(-1)
+        ),
+        # the large vectors of regions, LCTs and trigger primitives
+        RCT        = cms.untracked.PSet(basketSize = cms.untracked.int32(256000)),
+        CSCTF      = cms.untracked.PSet(basketSize = cms.untracked.int32(256000)),
+        CALO       = cms.untracked.PSet(basketSize = cms.untracked.int32(256000))
+    ),
+
+    # one tree per subsystem (L1GTTree, L1RCTTree, ...) next to L1Tree, which
+    # then holds the Event branch only. The trees have one entry per event,
+    # L1Ntuple of the macros and of python/analysis reads them as friends
+    splitTrees           = cms.untracked.bool(False),
+
     useAvgVtx            = cms.untracked.bool(True),
     maxAllowedWeight     = cms.untracked.double(-1)                         
 )
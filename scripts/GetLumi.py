@@ -1,42 +1,156 @@
-import os, json, csv, sys
+
+import os, json, csv, sys, getopt, sqlite3, tempfile, shutil, bisect
+from multiprocessing.pool import ThreadPool
+from subprocess import *
 from ROOT import TFile, TNtuple
 
-if len(sys.argv) < 2:
-    print 'Usage: '+sys.argv[0]+' CONFFILE'
+def usage():
+    print 'Usage: '+sys.argv[0]+' [ -j NPROC ] [ -n NORM ] [ -c LUMICMD ] CONFFILE'
     print ' where CONFFILE is a JSON file with run and lumisection selection'
+    print '  -j : number of runs queried in parallel (default : 4)'
+    print '  -n : normalisation of the luminosity, key of the cache with the run (default : 0.0429)'
+    print '  -c : luminosity command, called as LUMICMD -n NORM -r RUN -o CSVFILE lumibyls'
+    print '       (default : lumiCalc.py -c frontier://LumiProd/CMS_LUMI_PROD)'
+    print ' The luminosity per run and lumisection is cached in '+wdir+'/'+cachefile+','
+    print ' only the runs missing from the cache are queried.'
+    print ' Only the lumisections certified in CONFFILE are written to '+wdir+'/lumis.root.'
     print
-    sys.exit()
 
-jsonfile=sys.argv[1]
+# query the luminosity per lumisection of one run, run in the worker threads
+def fetchRun(args):
+    run, lumicmd, norm, tmpdir = args
+    csvfile = os.path.join(tmpdir, run+'.csvt')
+    fullcmd = lumicmd+' -n '+norm+' -r '+run+' -o '+csvfile+' lumibyls'
+    p = Popen(fullcmd, shell=True, stdout=PIPE, stderr=STDOUT)
+    log = p.communicate()[0]
+    if p.returncode != 0 or not os.path.exists(csvfile):
+        return run, None, log
+    rf = open(csvfile, 'r')
+    crf = csv.reader(rf)
+    crf.next()
+    rows = [(int(row[0]), int(row[1]), float(row[2]), float(row[3])) for row in crf]
+    rf.close()
+    os.remove(csvfile)
+    return run, rows, log
+
+# compile the lumisection ranges of the JSON selection into an interval index :
+# per run, the sorted first and last lumisections of non overlapping ranges
+def lumiMask(selection):
+    mask = {}
+    for run, ranges in selection.items():
+        merged = []
+        for first, last in sorted(ranges):
+            if len(merged) > 0 and first <= merged[-1][1]+1:
+                merged[-1][1] = max(merged[-1][1], last)
+            else:
+                merged.append([first, last])
+        mask[int(run)] = ([r[0] for r in merged], [r[1] for r in merged])
+    return mask
+
+def isCertified(mask, run, ls):
+    if not mask.has_key(run):
+        return False
+    firsts, lasts = mask[run]
+    i = bisect.bisect_right(firsts, ls) - 1
+    return i >= 0 and ls <= lasts[i]
+
+def openCache(path):
+    db = sqlite3.connect(path)
+    db.execute('create table if not exists runs (norm text, run integer, primary key (norm, run))')
+    db.execute('create table if not exists lumis (norm text, run integer, ls integer, '
+               'delivered real, reported real, primary key (norm, run, ls))')
+    return db
+
 wdir = "lumis"
+cachefile = "lumis.db"
+
+lumicmd = 'lumiCalc.py -c frontier://LumiProd/CMS_LUMI_PROD'
+norm = '0.0429'
+nproc = 4
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "hj:n:c:")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
 
-cmd=['lumiCalc.py -n 0.0429 -c frontier://LumiProd/CMS_LUMI_PROD -r ',' -o ','.csvt lumibyls']
+for opt, arg in opts:
+    if opt=='-h':
+        usage()
+        sys.exit()
+    if opt=='-j':
+        nproc=int(arg)
+    if opt=='-n':
+        norm=arg
+    if opt=='-c':
+        lumicmd=arg
 
-a={}        
+if len(args) < 1:
+    usage()
+    sys.exit()
+
+jsonfile=args[0]
+
+a={}
 with open(jsonfile) as f:
     a = json.load(f)
     f.close()
 
 if not os.path.isdir(wdir):
     os.system('mkdir '+wdir)
+tmpdir = tempfile.mkdtemp(dir=wdir)
+
+# runs not yet in the cache for this normalisation
+db = openCache(wdir+'/'+cachefile)
+runs = sorted([str(run) for run in a.keys()], key=int)
+cached = set([str(run) for (run,) in db.execute('select run from runs where norm=?', (norm,))])
+missing = [run for run in runs if run not in cached]
+print str(len(runs)-len(missing))+' run(s) found in the cache, '+str(len(missing))+' to query'
+
+failed = []
+pool = ThreadPool(nproc)
+for run, rows, log in pool.imap_unordered(fetchRun, [(run, lumicmd, norm, tmpdir) for run in missing]):
+    if rows is None:
+        print log
+        print 'Failed to get luminosity information for run '+run
+        failed.append(run)
+        continue
+    print 'Get luminosity information for run '+run+' : '+str(len(rows))+' lumisections'
+    db.executemany('insert or replace into lumis values (?,?,?,?,?)', [(norm,)+row for row in rows])
+    db.execute('insert or replace into runs values (?,?)', (norm, int(run)))
+    db.commit()
+pool.close()
+pool.join()
+
+# fill the ntuple in one go from a text dump of the certified lumisections,
+# the whole runs stay in the cache so that the selection can change
+mask = lumiMask(a)
+nls = 0
+totDelivered = 0.
+totReported = 0.
+txtfile = os.path.join(tmpdir, 'lumis.txt')
+out = open(txtfile, 'w')
+for run, ls, delivered, reported in db.execute('select run, ls, delivered, reported from lumis '
+                                               'where norm=? order by run, ls', (norm,)):
+    if isCertified(mask, run, ls):
+        out.write('%d %d %r %r\n' % (run, ls, delivered, reported))
+        nls = nls + 1
+        totDelivered = totDelivered + delivered
+        totReported = totReported + reported
+out.close()
+db.close()
 
 f = TFile(wdir+'/lumis.root','recreate')
 ntuple = TNtuple('ntuple','data from ascii file','run:ls:lumiDelivered:lumiReported')
-
-for run, lumis in a.iteritems():
-    fullcmd=cmd[0]+run+cmd[1]+wdir+'/'+run+cmd[2]
-    print 'Get luminosity information for run '+run
-    os.system(fullcmd)
-    rf=open(wdir+'/'+run+'.csvt','r')
-    crf=csv.reader(rf)
-    crf.next()
-    for row in crf:
-        ntuple.Fill(int(row[0]),int(row[1]),float(row[2]),float(row[3]))
-    rf.close()
-    os.system('rm '+wdir+'/'+run+'.csvt')
+ntuple.ReadFile(txtfile)
 
 f.Write()
 f.Close()
+shutil.rmtree(tmpdir)
 print 'Luminosity tree written to working directory ./'+wdir
+print str(nls)+' certified lumisections, delivered : %g /ub, recorded : %g /ub' % (totDelivered, totReported)
 os.system('cp '+jsonfile+' '+wdir+'/'+jsonfile)
+if len(failed) > 0:
+    print 'No luminosity information for run(s) '+' '.join(sorted(failed, key=int))+', rerun to query them again'
+    sys.exit(1)
 sys.exit()
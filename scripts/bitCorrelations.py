@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+# rates, pairwise overlaps and unique rates of the 192 GT bits on full runs,
+# from python/analysis/TriggerBits.py
+
+import sys
+import getopt
+
+from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple
+from L1TriggerDPG.L1Ntuples.analysis.TriggerBits import BitCorrelations, readBitMasks
+
+
+def usage():
+    print("Usage : bitCorrelations.py [ -n <entries> ] [ -m <bitmasks.dat> ] [ -t <top> ] [ -o <output> ] <ntuple list>")
+    print("  -n : number of entries read (default : all)")
+    print("  -m : bit masks m1, m2, m3 of tw1, tw2, tt (default : no mask)")
+    print("  -t : number of top bits printed and in the correlation plot (default : 15)")
+    print("  -o : output prefix, <output>.json for the counts, <output>.root for the plot (default : correlations)")
+    print("")
+
+
+try:
+    opts, files = getopt.getopt(sys.argv[1:], "hn:m:t:o:")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
+
+nentries = None
+masks = None
+ntop = 15
+output = "correlations"
+
+for opt, arg in opts:
+    if opt == "-h":
+        usage()
+        sys.exit()
+    if opt == "-n":
+        nentries = int(arg)
+    if opt == "-m":
+        masks = readBitMasks(arg)
+    if opt == "-t":
+        ntop = int(arg)
+    if opt == "-o":
+        output = arg
+
+if len(files) < 1:
+    usage()
+    sys.exit(2)
+
+ntuple = L1Ntuple()
+ntuple.OpenWithList(files[0])
+correlations = BitCorrelations(masks=masks)
+correlations.Run(ntuple, stop=nentries)
+correlations.Save(output+".json")
+
+top = correlations.Top(ntop)
+rates = correlations.Rates(100.)
+unique = correlations.Unique(100.)
+print("%d entries" % correlations.nentries)
+print("bit\tfired (%)\tunique (%)")
+for bit in top:
+    print("%d\t%.4f\t%.4f" % (bit, rates[bit], unique[bit]))
+
+import ROOT
+out = ROOT.TFile(output+".root", "recreate")
+correlations.Histogram(sorted(top)).Write()
+correlations.Histogram(list(correlations.bits), "h2_all").Write()
+out.Close()
+print("Counts written to "+output+".json, correlation plots to "+output+".root")
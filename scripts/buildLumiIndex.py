@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+# build the side-car lumisection index of the ntuple files
+# (python/analysis/LumiIndex.py) and print the entries per lumisection
+
+import sys
+import getopt
+
+from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple
+
+
+def usage():
+    print("Usage : buildLumiIndex.py [ -d <directory> ] [ -q ] <ntuple list>")
+    print("  -d : directory of the side-cars (default : next to the local files, lumiindex/ for the remote ones)")
+    print("  -q : do not print the entries per lumisection")
+    print("")
+
+
+try:
+    opts, files = getopt.getopt(sys.argv[1:], "hd:q")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
+
+directory = None
+quiet = False
+
+for opt, arg in opts:
+    if opt == "-h":
+        usage()
+        sys.exit()
+    if opt == "-d":
+        directory = arg
+    if opt == "-q":
+        quiet = True
+
+if len(files) < 1:
+    usage()
+    sys.exit(2)
+
+ntuple = L1Ntuple()
+ntuple.OpenWithList(files[0])
+index = ntuple.GetLumiIndex(directory)
+counts = index.Counts()
+if not quiet:
+    print("run\tlumi\tentries")
+    for run, lumi, entries in counts:
+        print("%d\t%d\t%d" % (run, lumi, entries))
+print("%d entries in %d lumisections, %d blocks" % (index.nentries, len(counts), len(index)))
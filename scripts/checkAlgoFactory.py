@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+# compare the vectorized seeds of python/analysis/L1AlgoFactory.py with the
+# C++ macros/L1AlgoFactory.h on a sample of ntuples, entry by entry
+
+import sys
+import os
+import getopt
+import numpy as np
+
+import ROOT
+from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple, macrosDir
+from L1TriggerDPG.L1Ntuples.analysis.L1AlgoFactory import L1AlgoFactory, COLUMNS
+
+# (algorithm, arguments) of the compared seeds, covering all the algorithms
+# and their options
+SEEDS = [
+    ("SingleMu", (16.,)), ("SingleMu", (3.5, 3)), ("SingleMuEta2p1", (14.,)),
+    ("DoubleMu", (10., 3.5)), ("DoubleMu", (3., 0., True, False)), ("DoubleMu", (0., 0., True, True)),
+    ("DoubleMuXOpen", (7.,)), ("Onia", (0., 0., 5)), ("Onia2015", (0., 0., True, True, 7)),
+    ("TripleMu", (5., 3.5, 2.5, 4)), ("QuadMu", (0., 0., 0., 0., 2)),
+    ("SingleEG", (20.,)), ("SingleEG", (10., True)), ("SingleEGEta2p1", (15., True)),
+    ("DoubleEG", (13., 7.)), ("DoubleEG", (5., 3., True)), ("TripleEG", (7., 5., 3.)),
+    ("SingleJet", (36.,)), ("SingleJet", (36., True)), ("DoubleJet", (52., 20., True)),
+    ("DoubleJet_Eta1p7_deltaEta4", (20., 12.)), ("DoubleTauJetEta2p17", (20., 12.)), ("DoubleTauJetEta2p17", (8., 4., True)),
+    ("TripleJet", (64., 48., 28., True)), ("TripleJet_VBF", (64., 48., 28.)), ("TripleJet_VBF", (20., 12., 8., 5)),
+    ("QuadJet", (36., 36., 36., 36., True)),
+    ("ETM", (36.,)), ("HTT", (150.,)), ("HTM", (50.,)), ("ETT", (300.,)), ("ETM_NoQCD", (36.,)),
+    ("Mu_EG", (3.5, 12.)), ("Mu_EG", (5., 5., True, 3)), ("DoubleMu_EG", (3., 5.)), ("Mu_DoubleEG", (5., 8.)),
+    ("Muer_JetCentral", (10., 32.)), ("Mu_JetCentral_delta", (10., 32.)), ("Mu_DoubleJetCentral", (0., 32.)),
+    ("Mu_HTT", (8., 100.)), ("Muer_ETM", (16., 20.)), ("Muer_TauJetEta2p17", (10., 20.)),
+    ("Muer_ETM_HTT", (10., 20., 100.)), ("Muer_ETM_JetC", (10., 20., 32.)),
+    ("SingleEG_Eta2p1_HTT", (18., 100.)), ("EG_FwdJet", (12., 20.)), ("EG_DoubleJetCentral", (8., 24.)),
+    ("EGer_TripleJetCentral", (12., 20.)), ("DoubleEG_HT", (5., 100.)), ("IsoEGer_TauJetEta2p17", (12., 20.)),
+    ("Jet_MuOpen_Mu_dPhiMuMu1", (16., 3.)), ("Jet_MuOpen_EG_dPhiMuEG1", (16., 5.)),
+    ("DoubleJetCentral_ETM", (20., 20., 30.)), ("QuadJetCentral_TauJet", (20., 20.)), ("DoubleJetC_deltaPhi7_HTT", (20., 100.)),
+]
+
+
+def usage():
+    print("Usage : checkAlgoFactory.py [ -n <entries> ] [ -f ] [ -t ] <ntuple list>")
+    print("  -n : number of entries compared (default : 10000)")
+    print("  -f : switch HF off (setHF)")
+    print("  -t : do not count the tau jets as jets (setTau)")
+    print("")
+
+
+def seedName(algo, args):
+    return algo + "_" + "_".join([str(arg) for arg in args])
+
+
+def pythonMasks(filelist, seeds, nentries, noHF, noTau):
+    """ masks of the vectorized seeds, read by chunks of entries """
+    ntuple = L1Ntuple()
+    ntuple.OpenWithList(filelist)
+    masks = dict([(name, []) for name, algo, args in seeds])
+    for batch in ntuple.Iterate(COLUMNS, 100000, 0, nentries):
+        factory = L1AlgoFactory(batch)
+        factory.setHF(noHF)
+        factory.setTau(noTau)
+        for name, mask in factory.Evaluate(seeds).items():
+            masks[name].append(mask)
+    return dict([(name, np.concatenate(parts)) for name, parts in masks.items()])
+
+
+def cppMasks(filelist, seeds, nentries, noHF, noTau):
+    """ masks of the C++ seeds, evaluated one entry at a time """
+    ROOT.gROOT.Macro(os.path.join(macrosDir(), "initL1Analysis.C"))
+    ntuple = ROOT.L1Ntuple()
+    ntuple.OpenWithList(filelist)
+    factory = ROOT.L1AlgoFactory(ntuple.gt_, ntuple.gmt_, ntuple.gct_)
+    factory.setHF(noHF)
+    factory.setTau(noTau)
+    nentries = min(nentries, ntuple.GetEntries())
+    masks = dict([(name, np.zeros(nentries, dtype=bool)) for name, algo, args in seeds])
+    for i in range(nentries):
+        ntuple.GetEntry(i)
+        for name, algo, args in seeds:
+            masks[name][i] = getattr(factory, algo)(*args)
+    return masks
+
+
+if __name__ == "__main__":
+    try:
+        opts, files = getopt.getopt(sys.argv[1:], "hn:ft")
+    except getopt.GetoptError:
+        usage()
+        sys.exit(2)
+
+    nentries = 10000
+    noHF = False
+    noTau = False
+    for opt, arg in opts:
+        if opt == '-h':
+            usage()
+            sys.exit()
+        if opt == '-n':
+            nentries = int(arg)
+        if opt == '-f':
+            noHF = True
+        if opt == '-t':
+            noTau = True
+
+    if len(files) != 1:
+        usage()
+        sys.exit(2)
+
+    seeds = [(seedName(algo, arguments), algo, arguments) for algo, arguments in SEEDS]
+    vectorized = pythonMasks(files[0], seeds, nentries, noHF, noTau)
+    reference = cppMasks(files[0], seeds, nentries, noHF, noTau)
+
+    nbad = 0
+    print("%-45s %10s %10s %10s" % ("seed", "python", "C++", "different"))
+    for name, algo, arguments in seeds:
+        n = min(len(vectorized[name]), len(reference[name]))
+        different = np.nonzero(vectorized[name][:n] != reference[name][:n])[0]
+        print("%-45s %10d %10d %10d" % (name, vectorized[name][:n].sum(), reference[name][:n].sum(), len(different)))
+        if len(different) > 0:
+            nbad += 1
+            print("   first different entries : " + " ".join([str(i) for i in different[:10]]))
+    if nbad > 0:
+        print(str(nbad) + " seed(s) differ")
+        sys.exit(1)
+    print("all the seeds agree")
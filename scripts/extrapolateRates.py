@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+# rates of the 2012 menu bits extrapolated to several luminosity scenarios,
+# from the per lumisection rate table of python/analysis/RateExtrapolation.py
+# (replaces macros/menu/extrapolateFromFile_5e33.C and _7e33.C)
+
+import sys
+import json
+import getopt
+import numpy as np
+
+from L1TriggerDPG.L1Ntuples.analysis.RateExtrapolation import RateTable, RateExtrapolation, readLumis, fitFunctions, bitNames
+
+
+def usage():
+    print("Usage : extrapolateRates.py [ options ] <ntuple list> <lumi>:<bunches> [ <lumi>:<bunches> ... ]")
+    print("  -c : rate table cache (default : rates.npz), remade when the ntuple list changes")
+    print("  -l : luminosity cache of GetLumi.py (default : lumis/lumis.db)")
+    print("  -n : normalisation of the luminosity (default : 0.0429)")
+    print("  -b : colliding bunches of the ntuples, a number or a JSON file {run : bunches} (default : 1380)")
+    print("  -m : fit functions of the 5e33 or 7e33 extrapolation (default : 7e33)")
+    print("  -p : pileup range of the fits, min:max (default : 16:28)")
+    print("  -o : prefix of the TXT and CSV output files (default : rates)")
+    print(" e.g. extrapolateRates.py ntuples.txt 5e33:1380 7e33:1380 7e33:2760")
+    print("")
+
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "hc:l:n:b:m:p:o:")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
+
+cachefile = "rates.npz"
+lumidb = "lumis/lumis.db"
+norm = "0.0429"
+bunches = "1380"
+menu = "7e33"
+pileup = "16:28"
+prefix = "rates"
+
+for opt, arg in opts:
+    if opt == "-h":
+        usage()
+        sys.exit()
+    if opt == "-c":
+        cachefile = arg
+    if opt == "-l":
+        lumidb = arg
+    if opt == "-n":
+        norm = arg
+    if opt == "-b":
+        bunches = arg
+    if opt == "-m":
+        menu = arg
+    if opt == "-p":
+        pileup = arg
+    if opt == "-o":
+        prefix = arg
+
+if len(args) < 2:
+    usage()
+    sys.exit(2)
+
+scenarios = [(float(scenario.split(":")[0]), int(scenario.split(":")[1])) for scenario in args[1:]]
+
+table = RateTable.Cached(args[0], cachefile)
+table.JoinLumis(readLumis(lumidb, norm))
+if bunches.isdigit():
+    table.SetBunches(int(bunches))
+else:
+    f = open(bunches)
+    table.SetBunches(dict([(int(run), nb) for run, nb in json.load(f).items()]))
+    f.close()
+
+fitted = table.Select(pileup=[float(value) for value in pileup.split(":")])
+nentries, delivered, recorded = fitted.Totals()
+print("%d lumisections, %d entries, delivered : %g /ub, recorded : %g /ub" % (len(fitted), nentries, delivered, recorded))
+
+extrapolation = RateExtrapolation(fitted, fitFunctions(menu))
+rates = extrapolation.Rates([lumi for lumi, nb in scenarios], [nb for lumi, nb in scenarios])
+names = bitNames()
+bits = sorted(names)
+
+columns = ["rate@%g_%db_PU%.1f" % (lumi, nb, extrapolation.Pileup(lumi, nb)) for lumi, nb in scenarios]
+txt = open(prefix+".txt", "w")
+csv = open(prefix+".csv", "w")
+print("L1Bit\tL1SeedName\t" + "\t".join(columns))
+txt.write("L1Bit\tL1SeedName\t" + "\t".join(columns) + "\n")
+csv.write("L1Bit;L1SeedName;" + ";".join(columns) + "\n")
+for bit in bits:
+    values = ["%g" % rate for rate in rates[:, bit]]
+    print("%d\t%s\t%s" % (bit, names[bit], "\t".join(values)))
+    txt.write("%d\t%s\t%s\n" % (bit, names[bit], "\t".join(values)))
+    csv.write("%d;%s;%s\n" % (bit, names[bit], ";".join(values)))
+txt.close()
+csv.close()
+
+# as in the macros, sum of the rates of the bits above 0.001 Hz
+combined = np.where(rates[:, bits] > 0.001, rates[:, bits], 0.).sum(axis=1)
+print("")
+for (lumi, nb), rate in zip(scenarios, combined):
+    print("Combined rate at %g with %d bunches : %g" % (lumi, nb, rate))
+print("")
+print("Rates written to "+prefix+".txt and "+prefix+".csv")
@@ -5,26 +5,348 @@
 
 import sys
 import os
-import re
+import glob
+import getopt
+import json
+import time
 import tarfile
 import commands
+import multiprocessing
 
 #import ROOT
 from subprocess import *
 
+# seconds between two looks at the crab res directory
+POLL = 2
+
+
+#
+def usage():
+    print "Usage : harvest.py [ -j <nproc> ] [ -g <files per merge> ] <crab dir>"
+    print "  -j : number of hadd processes running in parallel (default : number of cores)"
+    print "  -g : number of files merged together by one hadd (default : 20)"
+    print
+    print "The output archives are untarred and merged while crab retrieves them."
+    print "An interrupted harvest is resumed from the manifests in <crab dir>/merge/"
+    print
+
+
+# hadd one group of files, run in the worker processes
+def haddGroup(group):
+    start = time.time()
+    output, inputs = group
+    hadd = Popen(["hadd", "-f", output] + inputs, stdout=PIPE, stderr=STDOUT)
+    log = hadd.communicate()[0]
+    return output, hadd.returncode, log, time.time()-start
+
+
+# untar one crab output archive next to it, run in the worker processes
+# returns the list of extracted ROOT files, None if the archive is unreadable
+def untar(archive):
+    start = time.time()
+    destdir = os.path.dirname(archive)
+    try:
+        tar = tarfile.open(archive, "r:gz")
+        names = tar.getnames()
+        tar.extractall(destdir)
+        tar.close()
+    except (tarfile.TarError, IOError, EOFError):
+        return archive, None, time.time()-start
+    roots = [os.path.join(destdir, name) for name in names if name.endswith(".root")]
+    return archive, roots, time.time()-start
+
+
+# accumulate the time spent in each stage of the harvesting
+def addTiming(timings, stage, seconds):
+    if not timings.has_key(stage):
+        timings[stage] = [0, 0.]
+    timings[stage][0] = timings[stage][0] + 1
+    timings[stage][1] = timings[stage][1] + seconds
+
+
+def printTimings(timings, wall):
+    print "Stage timings :"
+    for stage in ["retrieve", "untar", "merge"]:
+        if timings.has_key(stage):
+            print "  %-8s : %5d task(s) %10.1f s" % (stage, timings[stage][0], timings[stage][1])
+    print "  total wall time   %10.1f s" % wall
+
+
+# build the tree of partial merges : one list of (output, inputs) per level,
+# the last level holds the single group producing the final output
+def mergePlan(inputs, output, workdir, fanin):
+    levels = []
+    current = sorted(inputs)
+    level = 0
+    while len(current) > fanin:
+        groups = []
+        merged = []
+        for i in range(0, len(current), fanin):
+            chunk = current[i:i+fanin]
+            if len(chunk) == 1:
+                # nothing to merge, pass the file to the next level
+                merged.append(chunk[0])
+                continue
+            partial = os.path.join(workdir, "merge_%d_%04d.root" % (level, i/fanin))
+            groups.append((partial, chunk))
+            merged.append(partial)
+        levels.append(groups)
+        current = merged
+        level = level + 1
+    levels.append([(output, current)])
+    return levels
+
+
+def loadManifest(manifestfile):
+    if not os.path.exists(manifestfile):
+        return {}
+    f = open(manifestfile)
+    manifest = json.load(f)
+    f.close()
+    return manifest
+
+
+def saveManifest(manifestfile, manifest):
+    # write then rename, so that an interruption never leaves a truncated manifest
+    f = open(manifestfile+".tmp", "w")
+    json.dump(manifest, f, indent=1)
+    f.close()
+    os.rename(manifestfile+".tmp", manifestfile)
+
+
+# merge the inputs into output through the partial merges of mergePlan,
+# running the groups of each level in a process pool.
+# Each finished group is recorded in the manifest, so a new call with the
+# same inputs only redoes the groups that are missing or failed.
+def mergeFiles(inputs, output, workdir, nproc, fanin, timings=None):
+    if timings is None:
+        timings = {}
+    if len(inputs) == 0:
+        print "No ROOT file to merge !"
+        return False
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    manifestfile = os.path.join(workdir, "merge.manifest")
+    manifest = loadManifest(manifestfile)
+
+    levels = mergePlan(inputs, output, workdir, fanin)
+    print "Merging "+str(len(inputs))+" files in "+str(len(levels))+" level(s) with "+str(nproc)+" process(es) ..."
+
+    pool = multiprocessing.Pool(nproc)
+    failed = []
+    for level, groups in enumerate(levels):
+        todo = []
+        for partial, chunk in groups:
+            if manifest.get(partial) == chunk and os.path.exists(partial):
+                continue
+            todo.append((partial, chunk))
+        print " -- level "+str(level)+" : "+str(len(groups))+" group(s), "+str(len(groups)-len(todo))+" already merged"
+
+        chunks = dict(todo)
+        for partial, code, log, elapsed in pool.imap_unordered(haddGroup, todo):
+            addTiming(timings, "merge", elapsed)
+            if code == 0:
+                manifest[partial] = chunks[partial]
+                saveManifest(manifestfile, manifest)
+            else:
+                print log
+                print "hadd failed for "+partial
+                failed.append(partial)
+
+        # the next level needs every partial merge of this one
+        if len(failed) > 0:
+            break
+
+    pool.close()
+    pool.join()
+
+    if len(failed) > 0:
+        print str(len(failed))+" merge(s) failed, rerun harvest.py to resume from "+manifestfile
+        return False
+
+    # clean the partial merges
+    for groups in levels[:-1]:
+        for partial, chunk in groups:
+            os.remove(partial)
+    os.remove(manifestfile)
+    return True
+
+
+# stream the crab output into the merge while it is being retrieved :
+# archives landing in resdir are untarred in the pool as soon as they are
+# complete, and every fanin staged ROOT files are hadded into a partial merge.
+# The partial merges and the leftover files are then merged into output.
+# Untarred archives and finished partial merges are recorded in
+# stream.manifest, a rerun skips them.
+def harvestStream(retrieve, resdir, output, workdir, nproc, fanin, timings):
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    manifestfile = os.path.join(workdir, "stream.manifest")
+    manifest = loadManifest(manifestfile)
+    if not manifest:
+        manifest = {"archives" : {}, "groups" : {}}
+
+    # files already merged by a previous call
+    merged = set()
+    partials = []
+    for partial, chunk in manifest["groups"].items():
+        if os.path.exists(partial):
+            partials.append(partial)
+            merged.update(chunk)
+        else:
+            del manifest["groups"][partial]
+
+    seen = set(manifest["archives"].keys())
+    staged = []
+    for roots in manifest["archives"].values():
+        for root in roots:
+            seen.add(root)
+            if root not in merged:
+                staged.append(root)
+
+    sizes = {}
+    untars = []
+    hadds = []
+    leftover = []
+    failed = []
+    # the groups finish out of order, the new partials are numbered after
+    # the highest recorded one so that they never overwrite one of them
+    ngroups = 1 + max([int(p[-9:-5]) for p in manifest["groups"]] + [-1])
+    retrieving = True
+    start = time.time()
+
+    pool = multiprocessing.Pool(nproc)
+    while True:
+        if retrieving and retrieve.poll() is not None:
+            retrieving = False
+            addTiming(timings, "retrieve", time.time()-start)
+
+        # new archives and ROOT files, taken once their size is stable
+        # (ROOT files only while no archive is being extracted next to them)
+        for name in sorted(os.listdir(resdir)):
+            path = os.path.join(resdir, name)
+            if path in seen:
+                continue
+            isarchive = name.endswith(".tgz")
+            if not isarchive and not name.endswith(".root"):
+                continue
+            if not isarchive and len(untars) > 0:
+                continue
+            size = os.path.getsize(path)
+            if retrieving and sizes.get(path) != size:
+                sizes[path] = size
+                continue
+            seen.add(path)
+            if isarchive:
+                untars.append(pool.apply_async(untar, (path,)))
+            elif path not in merged:
+                staged.append(path)
+
+        # extracted archives
+        for result in [r for r in untars if r.ready()]:
+            untars.remove(result)
+            archive, roots, elapsed = result.get()
+            addTiming(timings, "untar", elapsed)
+            if roots is None:
+                if retrieving:
+                    # probably still being written, try again later
+                    seen.discard(archive)
+                    sizes.pop(archive, None)
+                else:
+                    print "Cannot untar "+archive
+                    failed.append(archive)
+                continue
+            manifest["archives"][archive] = roots
+            saveManifest(manifestfile, manifest)
+            for root in roots:
+                if root not in seen:
+                    seen.add(root)
+                    staged.append(root)
+
+        # partial merges of the staged files
+        while len(staged) >= fanin:
+            chunk = staged[:fanin]
+            staged = staged[fanin:]
+            partial = os.path.join(workdir, "stream_%04d.root" % ngroups)
+            ngroups = ngroups + 1
+            hadds.append((chunk, pool.apply_async(haddGroup, ((partial, chunk),))))
+
+        for chunk, result in [h for h in hadds if h[1].ready()]:
+            hadds.remove((chunk, result))
+            partial, code, log, elapsed = result.get()
+            addTiming(timings, "merge", elapsed)
+            if code == 0:
+                partials.append(partial)
+                manifest["groups"][partial] = chunk
+                saveManifest(manifestfile, manifest)
+            else:
+                print log
+                print "hadd failed for "+partial+", its files go to the final merge"
+                leftover.extend(chunk)
+
+        if not retrieving and len(untars) == 0 and len(hadds) == 0:
+            # last look for ROOT files, now that nothing writes into resdir
+            for path in sorted(glob.glob(os.path.join(resdir, "*.root"))):
+                if path not in seen and path not in merged:
+                    seen.add(path)
+                    staged.append(path)
+            if len(staged) < fanin:
+                break
+            continue
+
+        time.sleep(POLL)
+
+    pool.close()
+    pool.join()
+
+    if retrieve.returncode != 0:
+        print "crab -getoutput failed, rerun harvest.py once the problem is fixed"
+        return False
+    if len(failed) > 0:
+        return False
+
+    if not mergeFiles(sorted(partials)+leftover+staged, output, workdir, nproc, fanin, timings):
+        return False
+
+    for partial in partials:
+        os.remove(partial)
+    os.remove(manifestfile)
+    return True
+
+
 # arguments
-crabdir=sys.argv[1]
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "hj:g:")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
+
+nproc=multiprocessing.cpu_count()
+fanin=20
+for opt, arg in opts:
+    if opt=='-h':
+        usage()
+        sys.exit()
+    if opt=='-j':
+        nproc=int(arg)
+    if opt=='-g':
+        fanin=int(arg)
+
+if len(args)!=1 or fanin<2:
+    usage()
+    sys.exit(2)
+
+crabdir=args[0]
 
 # directories
 ntupdir=os.environ['CAF_TRIGGER']+"/l1analysis/ntuples"
 input_root="/castor/cern.ch/cms/store/caf/user/"+os.environ['USER']+"/"+"L1PromptAnalysis_"+crabdir
 output_root="/castor/cern.ch/cms/store/caf/user/L1AnalysisNtuples"
+mergedir=crabdir+"/merge"
 
 print "Open crab directory "+crabdir+" ..."
-
-# retrieve data
-retrieve = Popen("crab -getoutput -c "+crabdir, shell=True)
-retrieve.wait()
+start=time.time()
+timings={}
 
 # determine if the output are stored in CASTOR
 result=commands.getoutput("grep T1_CH_CERN_Buffer "+crabdir+"/log/crab.log")
@@ -39,31 +361,29 @@ if (output_mode!="ROOTMODE"):
     print "Getting files for "+crabdir+" and putting in "+ntupdir
 else:
     print "Getting files for "+input_root+" and putting in "+ntupdir
-    
-if (output_mode!="ROOTMODE"):
-    # untar if required
-    files=os.listdir(crabdir+"/res")
-    for file in files:
-        if re.search("tgz", file):
-            tarfile.open(file, "r:gz")
-            tarfile.extractall(crabdir+"/res")
-
-# hadd all the files together
+
+# retrieve data
+retrieve = Popen("crab -getoutput -c "+crabdir, shell=True)
+
+# untar and hadd all the files together while they are retrieved
 if (output_mode!="ROOTMODE"):
-    hadd=Popen("hadd -f "+ntupdir+"/"+crabdir+".root "+crabdir+"/res/*.root", shell=True)
-    hadd.wait()
+    if not harvestStream(retrieve, crabdir+"/res", ntupdir+"/"+crabdir+".root", mergedir, nproc, fanin, timings):
+        printTimings(timings, time.time()-start)
+        sys.exit(1)
+    printTimings(timings, time.time()-start)
 else:
-    result=commands.getoutput("nsls "+input_root+"/ > "+crabdir+"/list.txt")
-    result=commands.getoutput("awk '{print \"rfio:"+input_root+"/\" $1}' "+crabdir+"/list.txt > "+crabdir+"/list2.txt");
-    hadd=Popen("hadd -f "+crabdir+".root @"+crabdir+"/list2.txt", shell=True)
-    hadd.wait()
+    retrieve.wait()
+    addTiming(timings, "retrieve", time.time()-start)
+    result=commands.getoutput("nsls "+input_root+"/")
+    inputs=["rfio:"+input_root+"/"+name for name in result.split()]
+    if not mergeFiles(inputs, crabdir+".root", mergedir, nproc, fanin, timings):
+        printTimings(timings, time.time()-start)
+        sys.exit(1)
+    printTimings(timings, time.time()-start)
     print ""
     print "Move "+crabdir+".root to "+output_root+"/"
     result=commands.getoutput("rfcp "+crabdir+".root "+output_root)
-    result=commands.getoutput("mv "+crabdir+".root "+ntupdir+"/") 
+    result=commands.getoutput("mv "+crabdir+".root "+ntupdir+"/")
     print "------------------------------------------------------------"
     print "Please do not forget to remove the crab directory on CASTOR :"
     print input_root
-    
-
-
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+# total, pure and shared rates of the seeds of a menu and the menu rate,
+# from python/analysis/MenuRates.py, the ntuples being processed in parallel
+# and the partial results merged
+
+import sys
+import json
+import getopt
+from multiprocessing import Pool
+
+from L1TriggerDPG.L1Ntuples.analysis.MenuRates import MenuRates
+
+
+def usage():
+    print("Usage : menuRates.py [ options ] <menu> <ntuple list>")
+    print(" <menu> has one seed per line : name bit prescale [ prescale of the data ], # for comments")
+    print("  -g : JSON file of the seed groups {group : [seeds]}")
+    print("  -s : scale from fraction of the entries to rate (default : 1)")
+    print("  -a : approximate prescales, when the new prescales are not multiples of the data ones")
+    print("  -j : number of processes (default : 4)")
+    print("  -o : output JSON file of the merged results (default : menurates.json)")
+    print("")
+
+
+def readMenu(filename):
+    seeds = []
+    f = open(filename)
+    for line in f:
+        fields = line.split("#")[0].split()
+        if len(fields) >= 3:
+            seeds.append((fields[0],) + tuple([int(field) for field in fields[1:4]]))
+    f.close()
+    return seeds
+
+
+def runFile(args):
+    """ partial results of one ntuple file, run in the worker processes """
+    fname, seeds, groups, exact = args
+    from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple
+    ntuple = L1Ntuple()
+    ntuple.Open(fname)
+    menu = MenuRates(seeds, groups, exact)
+    menu.Run(ntuple)
+    return menu
+
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "hg:s:aj:o:")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
+
+groups = {}
+scale = 1.
+exact = True
+nproc = 4
+output = "menurates.json"
+
+for opt, arg in opts:
+    if opt == "-h":
+        usage()
+        sys.exit()
+    if opt == "-g":
+        f = open(arg)
+        groups = json.load(f)
+        f.close()
+    if opt == "-s":
+        scale = float(arg)
+    if opt == "-a":
+        exact = False
+    if opt == "-j":
+        nproc = int(arg)
+    if opt == "-o":
+        output = arg
+
+if len(args) < 2:
+    usage()
+    sys.exit(2)
+
+seeds = readMenu(args[0])
+flist = open(args[1])
+files = [line.strip() for line in flist if line.strip() != ""]
+flist.close()
+
+menu = MenuRates(seeds, groups, exact)
+pool = Pool(nproc)
+for partial in pool.imap(runFile, [(fname, seeds, groups, exact) for fname in files]):
+    menu.Add(partial)
+pool.close()
+pool.join()
+menu.Save(output)
+
+print("%d entries" % menu.nentries)
+print("%-40s %4s %8s %12s %12s %12s" % ("seed", "bit", "prescale", "total", "pure", "shared"))
+for name, bit, prescale, total, pure, shared in menu.Table(scale):
+    print("%-40s %4d %8d %12.4g %12.4g %12.4g" % (name, bit, prescale, total, pure, shared))
+for name, (total, pure) in sorted(menu.GroupRates(scale).items()):
+    print("group %-34s %26.4g %12.4g" % (name, total, pure))
+print("")
+print("Menu rate : %g" % menu.MenuRate(scale))
+print("Results written to "+output)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+# record the GT decisions of the ntuples once, then replay prescale columns
+# on them (python/analysis/DecisionStream.py)
+
+import sys
+import getopt
+import numpy as np
+
+from L1TriggerDPG.L1Ntuples.analysis.DecisionStream import DecisionStream, readPrescales
+from L1TriggerDPG.L1Ntuples.analysis.TriggerBits import readBitMasks
+
+
+def usage():
+    print("Usage : replayPrescales.py [ options ] <decisions.npz> [ <prescales.dat> ... ]")
+    print("  -r : record the decisions of the ntuples of this list into <decisions.npz> first")
+    print("  -m : bit masks m1, m2, m3 of tw1, tw2, tt (default : no mask)")
+    print("  -c : prescale with counters instead of random numbers")
+    print("  -s : seed of the random numbers (default : 0)")
+    print("  -n : number of random replays per column, with seeds seed, seed+1, ... (default : 1)")
+    print("  -k : scale from fraction of the entries to rate (default : 1)")
+    print("")
+
+
+try:
+    opts, args = getopt.getopt(sys.argv[1:], "hr:m:cs:n:k:")
+except getopt.GetoptError:
+    usage()
+    sys.exit(2)
+
+record = None
+masks = None
+counters = False
+seed = 0
+nreplays = 1
+scale = 1.
+
+for opt, arg in opts:
+    if opt == "-h":
+        usage()
+        sys.exit()
+    if opt == "-r":
+        record = arg
+    if opt == "-m":
+        masks = readBitMasks(arg)
+    if opt == "-c":
+        counters = True
+    if opt == "-s":
+        seed = int(arg)
+    if opt == "-n":
+        nreplays = int(arg)
+    if opt == "-k":
+        scale = float(arg)
+
+if len(args) < 1:
+    usage()
+    sys.exit(2)
+
+if record is not None:
+    from L1TriggerDPG.L1Ntuples.analysis.L1Ntuple import L1Ntuple
+    ntuple = L1Ntuple()
+    ntuple.OpenWithList(record)
+    stream = DecisionStream.Record(ntuple)
+    stream.Save(args[0])
+    print("%d entries, %d decision patterns written to %s" % (len(stream), len(stream.patterns), args[0]))
+else:
+    stream = DecisionStream.Load(args[0])
+
+if counters:
+    nreplays = 1
+
+print("%-40s %12s %12s" % ("column", "rate", "spread"))
+for column in args[1:]:
+    prescales = readPrescales(column)
+    rates = [stream.Replay(prescales, masks, seed+i, counters).Rate(scale) for i in range(nreplays)]
+    print("%-40s %12.4g %12.4g" % (column, np.mean(rates), np.std(rates)))
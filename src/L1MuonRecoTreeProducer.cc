@@ -98,6 +98,84 @@ UserCode/L1TriggerDPG/src/L1MuonRecoTreeProducer.cc
 #include "TString.h"
 #include "TRegexp.h"
 #include <utility>
+#include <set>
+#include <map>
+#include <cmath>
+#include <algorithm>
+
+//
+// trigger objects of an event binned in eta and phi, for the deltaR
+// matching of the muons : the cells are at least maxDeltaR wide, so the
+// objects within maxDeltaR of a muon are in the 3x3 cells around it. When
+// none is found there, all the objects are scanned and the closest one is
+// returned as before
+//
+
+class TriggerObjectGrid {
+public:
+  explicit TriggerObjectGrid(double maxDeltaR) {
+    const double etaMax = 5.;
+    nphi_ = std::max(int(2*M_PI/std::max(maxDeltaR, 0.1)), 1);
+    neta_ = std::max(int(2*etaMax/std::max(maxDeltaR, 0.1)), 1);
+    etaMin_ = -etaMax;
+    etaCell_ = 2*etaMax/neta_;
+    phiCell_ = 2*M_PI/nphi_;
+    maxDeltaR_ = maxDeltaR;
+    cells_.resize(neta_*nphi_);
+  }
+
+  void clear() {
+    for (size_t i = 0; i < filled_.size(); ++i) cells_[filled_[i]].clear();
+    filled_.clear();
+    keys_.clear();
+    eta_.clear();
+    phi_.clear();
+  }
+
+  // adds the object once, whatever the number of filters that kept it
+  void add(unsigned key, double eta, double phi) {
+    if (!keys_.insert(key).second) return;
+    const int cell = ieta(eta)*nphi_ + iphi(phi);
+    if (cells_[cell].empty()) filled_.push_back(cell);
+    cells_[cell].push_back(eta_.size());
+    eta_.push_back(eta);
+    phi_.push_back(phi);
+  }
+
+  // deltaR to the closest object, 9999 without object
+  double minDeltaR(double eta, double phi) const {
+    double best = 9999;
+    if (nphi_ >= 3) {
+      const int ie = ieta(eta), ip = iphi(phi);
+      for (int je = std::max(ie-1, 0); je <= std::min(ie+1, neta_-1); ++je)
+        for (int dp = -1; dp <= 1; ++dp) {
+          const std::vector<size_t> & cell = cells_[je*nphi_ + (ip+dp+nphi_)%nphi_];
+          for (size_t i = 0; i < cell.size(); ++i)
+            best = std::min(best, reco::deltaR(eta, phi, eta_[cell[i]], phi_[cell[i]]));
+        }
+      if (best <= maxDeltaR_) return best;
+    }
+    for (size_t i = 0; i < eta_.size(); ++i)
+      best = std::min(best, reco::deltaR(eta, phi, eta_[i], phi_[i]));
+    return best;
+  }
+
+private:
+  int ieta(double eta) const {
+    return std::min(std::max(int(floor((eta-etaMin_)/etaCell_)), 0), neta_-1);
+  }
+  int iphi(double phi) const {
+    int i = int(floor((phi+M_PI)/phiCell_)) % nphi_;
+    return i < 0 ? i+nphi_ : i;
+  }
+
+  int neta_, nphi_;
+  double etaMin_, etaCell_, phiCell_, maxDeltaR_;
+  std::vector<std::vector<size_t> > cells_;
+  std::vector<int> filled_;
+  std::set<unsigned> keys_;
+  std::vector<double> eta_, phi_;
+};
 
 //
 // class declaration
@@ -114,8 +192,10 @@ public:
   void empty_standalone();
   void empty_hlt();
 
-  double match_trigger(std::vector<int> &trigIndices, const trigger::TriggerObjectCollection &trigObjs, 
-    edm::Handle<trigger::TriggerEvent>  &triggerEvent, const reco::Muon &mu);
+  std::vector<int> resolve_trigger_patterns(const std::vector<std::string> &names, const std::vector<TRegexp> &patterns,
+    const std::vector<TString> &pathNames);
+  void collect_trigger_objects(const std::vector<int> &trigIndices, const trigger::TriggerObjectCollection &trigObjs,
+    const trigger::TriggerEvent &triggerEvent, TriggerObjectGrid &grid);
 
 private:
   virtual void beginJob(void) ;
@@ -150,8 +230,15 @@ private:
 
   std::vector<int> isoTriggerIndices_;
   std::vector<int> triggerIndices_;
+  // patterns compiled once, path indices resolved once per HLT table
+  std::vector<TRegexp> isoTriggerPatterns_;
+  std::vector<TRegexp> triggerPatterns_;
+  std::map<std::string, std::pair<std::vector<int>, std::vector<int> > > triggerIndexCache_;
   double triggerMaxDeltaR_;
   HLTConfigProvider hltConfig_;
+  // trigger objects of the last filters of the paths, filled once per event
+  TriggerObjectGrid triggerObjects_;
+  TriggerObjectGrid isoTriggerObjects_;
   
   enum {
     GL_MUON    = 0,
@@ -199,7 +286,9 @@ private:
 
 
 
-L1MuonRecoTreeProducer::L1MuonRecoTreeProducer(const edm::ParameterSet& iConfig)
+L1MuonRecoTreeProducer::L1MuonRecoTreeProducer(const edm::ParameterSet& iConfig) :
+  triggerObjects_(iConfig.getParameter<double> ("triggerMaxDeltaR")),
+  isoTriggerObjects_(iConfig.getParameter<double> ("triggerMaxDeltaR"))
 {
   
   maxMuon_ = iConfig.getParameter<unsigned int>("maxMuon");
@@ -232,6 +321,13 @@ L1MuonRecoTreeProducer::L1MuonRecoTreeProducer(const edm::ParameterSet& iConfig)
   isoTriggerNames_     = iConfig.getParameter<std::vector<std::string> > ("isoTriggerNames");
   triggerMaxDeltaR_    = iConfig.getParameter<double> ("triggerMaxDeltaR");
 
+  // prepare for regular expression (with wildcards) functionality:
+  bool enableWildcard = true;
+  for (size_t iTrig = 0; iTrig < triggerNames_.size(); ++iTrig)
+    triggerPatterns_.push_back(TRegexp(TString(triggerNames_[iTrig]), enableWildcard));
+  for (size_t iTrig = 0; iTrig < isoTriggerNames_.size(); ++iTrig)
+    isoTriggerPatterns_.push_back(TRegexp(TString(isoTriggerNames_[iTrig]), enableWildcard));
+
 }
 
 
@@ -245,41 +341,32 @@ L1MuonRecoTreeProducer::~L1MuonRecoTreeProducer()
 // member functions
 //
 
-double L1MuonRecoTreeProducer::match_trigger(
-    std::vector<int> &trigIndices, const trigger::TriggerObjectCollection &trigObjs, 
-    edm::Handle<trigger::TriggerEvent>  &triggerEvent, const reco::Muon &mu
-    ) 
+void L1MuonRecoTreeProducer::collect_trigger_objects(
+    const std::vector<int> &trigIndices, const trigger::TriggerObjectCollection &trigObjs,
+    const trigger::TriggerEvent &triggerEvent, TriggerObjectGrid &grid
+    )
 {
-  double matchDeltaR = 9999;
+  grid.clear();
 
   for(size_t iTrigIndex = 0; iTrigIndex < trigIndices.size(); ++iTrigIndex) {
     int triggerIndex = trigIndices[iTrigIndex];
-    const std::vector<std::string> moduleLabels(hltConfig_.moduleLabels(triggerIndex));
+    const std::vector<std::string> & moduleLabels(hltConfig_.moduleLabels(triggerIndex));
     // find index of the last module:
     const unsigned moduleIndex = hltConfig_.size(triggerIndex)-2;
     // find index of HLT trigger name:
-    const unsigned hltFilterIndex = triggerEvent->filterIndex( edm::InputTag ( moduleLabels[moduleIndex], "", triggerProcessLabel_ ) );
+    const unsigned hltFilterIndex = triggerEvent.filterIndex( edm::InputTag ( moduleLabels[moduleIndex], "", triggerProcessLabel_ ) );
 
-    if (hltFilterIndex < triggerEvent->sizeFilters()) {
-      const trigger::Keys triggerKeys(triggerEvent->filterKeys(hltFilterIndex));
-      const trigger::Vids triggerVids(triggerEvent->filterIds(hltFilterIndex));
+    if (hltFilterIndex < triggerEvent.sizeFilters()) {
+      const trigger::Keys & triggerKeys(triggerEvent.filterKeys(hltFilterIndex));
 
-      const unsigned nTriggers = triggerVids.size();
+      const unsigned nTriggers = triggerEvent.filterIds(hltFilterIndex).size();
       for (size_t iTrig = 0; iTrig < nTriggers; ++iTrig) {
         // loop over all trigger objects:
-        const trigger::TriggerObject trigObject = trigObjs[triggerKeys[iTrig]];
-
-        double dRtmp = deltaR( mu, trigObject );
-
-        if ( dRtmp < matchDeltaR ) {
-          matchDeltaR = dRtmp;
-        }
-
+        const trigger::TriggerObject & trigObject = trigObjs[triggerKeys[iTrig]];
+        grid.add(triggerKeys[iTrig], trigObject.eta(), trigObject.phi());
       } // loop over different trigger objects
     } // if trigger is in event (should apply hltFilter with used trigger...)
-  } // loop over muon candidates
-
-  return matchDeltaR;
+  } // loop over trigger paths
 }
 
 void L1MuonRecoTreeProducer::empty_global(){
@@ -527,6 +614,26 @@ L1MuonRecoTreeProducer::analyze(const edm::Event& iEvent, const edm::EventSetup&
   iSetup.get<TrackingComponentsRecord>().get("SmartPropagatorAny", propagatorAlong   );
   iSetup.get<TrackingComponentsRecord>().get("SmartPropagatorAnyOpposite", propagatorOpposite);
 
+  // trigger objects of the paths to match the muons to, collected once
+  bool triggerObjectsValid = false;
+  if (triggerMatching_) {
+    // first check if the trigger results are valid:
+    edm::Handle<edm::TriggerResults> triggerResults;
+    iEvent.getByLabel(edm::InputTag("TriggerResults", "", triggerProcessLabel_), triggerResults);
+
+    if (triggerResults.isValid()) {
+      edm::Handle<trigger::TriggerEvent> triggerEvent;
+      iEvent.getByLabel(triggerSummaryLabel_, triggerEvent);
+      if (triggerEvent.isValid()) {
+        // get trigger objects:
+        const trigger::TriggerObjectCollection & triggerObjects = triggerEvent->getObjects();
+        collect_trigger_objects(triggerIndices_, triggerObjects, *triggerEvent, triggerObjects_);
+        collect_trigger_objects(isoTriggerIndices_, triggerObjects, *triggerEvent, isoTriggerObjects_);
+        triggerObjectsValid = true;
+      } // end if (triggerEvent.isValid())
+    } // end if (triggerResults.isValid())
+  }
+
   for(reco::MuonCollection::const_iterator imu = mucand->begin(); 
       // for(pat::MuonCollection::const_iterator imu = mucand->begin(); 
       imu != mucand->end() && (unsigned) muonData->nMuons < maxMuon_; imu++) {
@@ -580,26 +687,15 @@ L1MuonRecoTreeProducer::analyze(const edm::Event& iEvent, const edm::EventSetup&
         int hasIsoTriggered = 0;
         int hasTriggered = 0;
 
-	    // first check if the trigger results are valid:
-    	edm::Handle<edm::TriggerResults> triggerResults;
-		iEvent.getByLabel(edm::InputTag("TriggerResults", "", triggerProcessLabel_), triggerResults);
-		  
-		if (triggerResults.isValid()) {
-		  edm::Handle<trigger::TriggerEvent> triggerEvent;
-		  iEvent.getByLabel(triggerSummaryLabel_, triggerEvent);
-		  if (triggerEvent.isValid()) {
-			// get trigger objects:
-			const trigger::TriggerObjectCollection triggerObjects = triggerEvent->getObjects();
-
-			matchDeltaR = match_trigger(triggerIndices_, triggerObjects, triggerEvent, (*imu));
+		if (triggerObjectsValid) {
+			matchDeltaR = triggerObjects_.minDeltaR(imu->eta(), imu->phi());
 			if (matchDeltaR < triggerMaxDeltaR_)
 				hasTriggered = 1;
 
-			isoMatchDeltaR = match_trigger(isoTriggerIndices_, triggerObjects, triggerEvent, (*imu));
+			isoMatchDeltaR = isoTriggerObjects_.minDeltaR(imu->eta(), imu->phi());
 			if (isoMatchDeltaR < triggerMaxDeltaR_) 
 				hasIsoTriggered = 1;
-		  } // end if (triggerEvent.isValid())
-		} // end if (triggerResults.isValid())
+		} // end if (triggerObjectsValid)
 
         // fill trigger matching variables:
         muonData->hlt_isomu.push_back(hasIsoTriggered);
@@ -1351,48 +1447,54 @@ void L1MuonRecoTreeProducer::beginRun(const edm::Run &run, const edm::EventSetup
       assert(false);
     }
 
-    bool enableWildcard = true;
-    for (size_t iTrig = 0; iTrig < triggerNames_.size(); ++iTrig) { 
-      // prepare for regular expression (with wildcards) functionality:
-      TString tNameTmp = TString(triggerNames_[iTrig]);
-      TRegexp tNamePattern = TRegexp(tNameTmp, enableWildcard);
-      int tIndex = -1;
-      // find the trigger index:
-      for (unsigned ipath = 0; ipath < hltConfig_.size(); ++ipath) {
-        // use TString since it provides reg exp functionality:
-        TString tmpName = TString(hltConfig_.triggerName(ipath));
-        if (tmpName.Contains(tNamePattern)) {
-          tIndex = int(ipath);
-          triggerIndices_.push_back(tIndex);
-        }
-      }
-      if (tIndex < 0) { // if can't find trigger path at all, give warning:
-        std::cout << "Warning: Could not find trigger" << triggerNames_[iTrig] << std::endl;
-        //assert(false);
-      }
-    } // end for triggerNames
-    for (size_t iTrig = 0; iTrig < isoTriggerNames_.size(); ++iTrig) { 
-      // prepare for regular expression functionality:
-      TString tNameTmp = TString(isoTriggerNames_[iTrig]);
-      TRegexp tNamePattern = TRegexp(tNameTmp, enableWildcard);
-      int tIndex = -1;
-      // find the trigger index:
-      for (unsigned ipath = 0; ipath < hltConfig_.size(); ++ipath) {
-        // use TString since it provides reg exp functionality:
-        TString tmpName = TString(hltConfig_.triggerName(ipath));
-        if (tmpName.Contains(tNamePattern)) {
-          tIndex = int(ipath);
-          isoTriggerIndices_.push_back(tIndex);
-        }
-      }
-      if (tIndex < 0) { // if can't find trigger path at all, give warning:
-        std::cout << "Warning: Could not find trigger" << isoTriggerNames_[iTrig] << std::endl;
-        //assert(false);
-      }
-    } // end for isoTriggerNames
+    // the patterns are resolved once per HLT table, short runs with the
+    // same menu reuse the indices
+    const std::string table = hltConfig_.tableName();
+    std::map<std::string, std::pair<std::vector<int>, std::vector<int> > >::const_iterator cached = triggerIndexCache_.find(table);
+    if (cached == triggerIndexCache_.end()) {
+      // use TString since it provides reg exp functionality:
+      std::vector<TString> pathNames;
+      for (unsigned ipath = 0; ipath < hltConfig_.size(); ++ipath)
+        pathNames.push_back(TString(hltConfig_.triggerName(ipath)));
+
+      std::cout << "Trigger paths of the patterns in the HLT table " << table << " :" << std::endl;
+      std::vector<int> indices = resolve_trigger_patterns(triggerNames_, triggerPatterns_, pathNames);
+      std::vector<int> isoIndices = resolve_trigger_patterns(isoTriggerNames_, isoTriggerPatterns_, pathNames);
+      cached = triggerIndexCache_.insert(std::make_pair(table, std::make_pair(indices, isoIndices))).first;
+    }
+    triggerIndices_ = cached->second.first;
+    isoTriggerIndices_ = cached->second.second;
   } // end if (triggerMatching_)
 }
 
+std::vector<int> L1MuonRecoTreeProducer::resolve_trigger_patterns(
+    const std::vector<std::string> &names, const std::vector<TRegexp> &patterns,
+    const std::vector<TString> &pathNames)
+{
+  std::vector<int> indices;
+  for (size_t iTrig = 0; iTrig < names.size(); ++iTrig) {
+    int tIndex = -1;
+    std::cout << "  " << names[iTrig] << " :";
+    // find the trigger index:
+    for (unsigned ipath = 0; ipath < pathNames.size(); ++ipath) {
+      if (pathNames[ipath].Contains(patterns[iTrig])) {
+        tIndex = int(ipath);
+        indices.push_back(tIndex);
+        std::cout << " " << pathNames[ipath];
+      }
+    }
+    std::cout << std::endl;
+    if (tIndex < 0) { // if can't find trigger path at all, give warning:
+      std::cout << "Warning: Could not find trigger" << names[iTrig] << std::endl;
+    }
+    // two names glued together, e.g. by a missing comma in the configuration
+    if (TString(names[iTrig]).Index("HLT_", 1) != kNPOS) {
+      std::cout << "Warning: trigger pattern " << names[iTrig] << " holds several path names" << std::endl;
+    }
+  }
+  return indices;
+}
+
 void L1MuonRecoTreeProducer::endRun(const edm::Run &run, const edm::EventSetup &eventSetup) {
 }
 // ------------ method called once each job just before starting event loop  ------------
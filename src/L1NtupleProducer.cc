@@ -24,6 +24,10 @@
 #include <iomanip>
 #include <vector>
 #include <cmath>
+#include <ctime>
+#include <cstring>
+#include <algorithm>
+#include <sys/time.h>
 
 
 //-------------------------------
@@ -31,7 +35,10 @@
 //-------------------------------
 #include "TROOT.h"
 #include "TTree.h"
+#include "TBranch.h"
 #include "TFile.h"
+#include "TH1F.h"
+#include "TObjArray.h"
 
 
 #include "FWCore/Framework/interface/Frameworkfwd.h"
@@ -67,7 +74,7 @@
 //----------------
 // Constructor  --
 //----------------
-L1NtupleProducer::L1NtupleProducer(const edm::ParameterSet& ps) : csctfPtLUTs_(NULL), tree_(0) {
+L1NtupleProducer::L1NtupleProducer(const edm::ParameterSet& ps) : csctfPtLUTs_(NULL), tree_(0), profileTree_(0) {
 
   hltSource_           = ps.getParameter<edm::InputTag>("hltSource");
 
@@ -88,6 +95,12 @@ L1NtupleProducer::L1NtupleProducer(const edm::ParameterSet& ps) : csctfPtLUTs_(N
   gctIsoEmSource_      = ps.getParameter<edm::InputTag>("gctIsoEmSource");
   gctNonIsoEmSource_   = ps.getParameter<edm::InputTag>("gctNonIsoEmSource");
   verbose_             = ps.getUntrackedParameter< bool >("verbose", false);
+  profile_             = ps.getUntrackedParameter< bool >("profile", false);
+
+//compression and baskets of the branches
+  treeSettings_        = ps.getUntrackedParameter<edm::ParameterSet>("treeSettings", edm::ParameterSet());
+  sizeReport_          = treeSettings_.getUntrackedParameter< bool >("report", false);
+  splitTrees_          = ps.getUntrackedParameter< bool >("splitTrees", false);
 
 //rct
   rctSource_           = ps.getParameter<edm::InputTag>("rctSource");
@@ -163,8 +176,11 @@ L1NtupleProducer::L1NtupleProducer(const edm::ParameterSet& ps) : csctfPtLUTs_(N
   initCSCTF(); 
   
   tree_ = tfs_->make<TTree>("L1Tree", "L1Tree");
+  tree_->SetAutoFlush(treeSettings_.getUntrackedParameter<long long>("autoFlush", -30000000));
+  trees_.push_back(tree_);
 
   book();
+  if (profile_) bookProfile();
 }
 
 //--------------
@@ -195,6 +211,119 @@ void L1NtupleProducer::beginJob(void) {
 
 void L1NtupleProducer::endJob() {
 
+  // the sizes include the baskets still in memory
+  if (profile_ || sizeReport_)
+    for (unsigned int t=0; t<trees_.size(); t++) trees_[t]->FlushBaskets();
+  if (profile_) writeProfile();
+  if (sizeReport_) reportSizes();
+}
+
+//-------------
+// Profiling --
+//-------------
+
+// names of the profiled steps of analyze, also the names of their branches
+static const char* profileStepNames[] = { "Event", "Generator", "Simulation", "GMT", "GT", "GCT",
+                                          "RCT", "DTTF", "CSCTF", "CALO", "Fill" };
+
+static double wallTime() {
+  timeval tv;
+  gettimeofday(&tv, 0);
+  return tv.tv_sec + 1e-6*tv.tv_usec;
+}
+
+static double cpuTime() {
+  return double(std::clock())/CLOCKS_PER_SEC;
+}
+
+void L1NtupleProducer::bookProfile() {
+
+  TFileDirectory dir = tfs_->mkdir("profile");
+  profileEvents_   = 0;
+  profileSumBytes_ = 0.;
+  hProfileBytes_   = dir.make<TH1F>("bytes", "bytes added to the trees;bytes;events", 500, 0., 50000.);
+  for (unsigned int i=0; i<kNProfileSteps; i++) {
+    std::string name = profileStepNames[i];
+    profileBranch_[i]   = 0;
+    for (unsigned int t=0; t<trees_.size() && !profileBranch_[i]; t++)
+      profileBranch_[i] = trees_[t]->GetBranch(name.c_str());
+    profileSumWall_[i]  = 0.;
+    profileSumCpu_[i]   = 0.;
+    hProfileWall_[i] = dir.make<TH1F>(("wall"+name).c_str(), (name+" wall time;time (ms);events").c_str(), 500, 0., 5.);
+    hProfileCpu_[i]  = dir.make<TH1F>(("cpu"+name).c_str(), (name+" CPU time;time (ms);events").c_str(), 500, 0., 5.);
+  }
+  profileTree_ = dir.make<TTree>("ProfileSummary", "ProfileSummary");
+}
+
+// the profiling costs a test per step when it is off
+inline void L1NtupleProducer::startProfile() {
+
+  if (!profile_) return;
+  profileWall_ = wallTime();
+  profileCpu_  = cpuTime();
+}
+
+// time since the previous step, the next step starts now
+inline void L1NtupleProducer::stopProfile(unsigned int step) {
+
+  if (!profile_) return;
+  double wall = wallTime();
+  double cpu  = cpuTime();
+  profileSumWall_[step] += wall-profileWall_;
+  profileSumCpu_[step]  += cpu-profileCpu_;
+  hProfileWall_[step]->Fill(1e3*(wall-profileWall_));
+  hProfileCpu_[step]->Fill(1e3*(cpu-profileCpu_));
+  profileWall_ = wall;
+  profileCpu_  = cpu;
+}
+
+// uncompressed bytes added to the trees by the fill of an event, as
+// returned by TTree::Fill (GetTotBytes counts the written baskets only)
+void L1NtupleProducer::profileBytes(long long bytes) {
+
+  profileEvents_++;
+  profileSumBytes_ += bytes;
+  hProfileBytes_->Fill(bytes);
+}
+
+// summary tree of the means per event of the steps, also printed. The
+// bytes of the branches are taken after the baskets are flushed in endJob
+void L1NtupleProducer::writeProfile() {
+
+  TTree* summary = profileTree_;
+  char step[16];
+  double wall, cpu, bytes, zipBytes;
+  summary->Branch("step", step, "step/C");
+  summary->Branch("events", &profileEvents_, "events/l");
+  summary->Branch("wall", &wall, "wall/D");
+  summary->Branch("cpu", &cpu, "cpu/D");
+  summary->Branch("bytes", &bytes, "bytes/D");
+  summary->Branch("zipBytes", &zipBytes, "zipBytes/D");
+
+  double n = profileEvents_ > 0 ? double(profileEvents_) : 1.;
+  edm::LogInfo log("L1NtupleProducer");
+  log << "per event means of " << profileEvents_ << " events\n"
+      << std::setw(12) << "step" << std::setw(12) << "wall (ms)" << std::setw(12) << "cpu (ms)"
+      << std::setw(12) << "bytes" << std::setw(12) << "zip bytes" << "\n";
+  for (unsigned int i=0; i<kNProfileSteps; i++) {
+    strncpy(step, profileStepNames[i], sizeof(step));
+    wall     = 1e3*profileSumWall_[i]/n;
+    cpu      = 1e3*profileSumCpu_[i]/n;
+    bytes    = 0.;
+    zipBytes = 0.;
+    if (i == kFill) {
+      bytes = profileSumBytes_/n;
+      for (unsigned int t=0; t<trees_.size(); t++) zipBytes += trees_[t]->GetZipBytes()/n;
+    }
+    else if (profileBranch_[i]) {
+      bytes    = profileBranch_[i]->GetTotBytes("*")/n;
+      zipBytes = profileBranch_[i]->GetZipBytes("*")/n;
+    }
+    summary->Fill();
+    log << std::setw(12) << step << std::setw(12) << wall << std::setw(12) << cpu
+        << std::setw(12) << bytes << std::setw(12) << zipBytes << "\n";
+  }
+  summary->ResetBranchAddresses();
 }
 
 //--------------
@@ -204,20 +333,34 @@ void L1NtupleProducer::endJob() {
 void L1NtupleProducer::analyze(const edm::Event& e, const edm::EventSetup& es) {
   
    //add if "none" ..
+  startProfile();
   analyzeEvent(e);
+  stopProfile(kEvent);
   analyzeGenerator(e);
+  stopProfile(kGenerator);
   analyzeSimulation(e);
+  stopProfile(kSimulation);
   analyzeGMT(e);
+  stopProfile(kGMT);
   analyzeGT(e);
+  stopProfile(kGT);
   analyzeGCT(e);
+  stopProfile(kGCT);
   analyzeRCT(e);
+  stopProfile(kRCT);
   analyzeDTTF(e);
+  stopProfile(kDTTF);
   analyzeCSCTF(e,es); 
+  stopProfile(kCSCTF);
   pL1calotp->Reset();
   analyzeECAL(e, es);
   analyzeHCAL(e, es);                           
+  stopProfile(kCALO);
 
-  tree_->Fill();
+  long long bytes = 0;
+  for (unsigned int t=0; t<trees_.size(); t++) bytes += trees_[t]->Fill();
+  stopProfile(kFill);
+  if (profile_) profileBytes(bytes);
 
 }
 
@@ -601,7 +744,7 @@ void L1NtupleProducer::analyzeHCAL(const edm::Event& e, const edm::EventSetup& e
 //--------------
 void L1NtupleProducer::book() {
 
-  tree_->Branch("Event", "L1Analysis::L1AnalysisEventDataFormat", &pL1evt_data, 32000, 3);
+  bookBranch("Event", "L1Analysis::L1AnalysisEventDataFormat", &pL1evt_data);
    
   if (gctCenJetsSource_.label() != "none" || 
       gctForJetsSource_.label() != "none" || 
@@ -609,35 +752,126 @@ void L1NtupleProducer::book() {
       gctEnergySumsSource_.label() != "none" || 
       gctIsoEmSource_.label() != "none" || 
       gctNonIsoEmSource_.label() != "none")
-  tree_->Branch("GCT", "L1Analysis::L1AnalysisGCTDataFormat", &pL1gct_data, 32000, 3);
+  bookBranch("GCT", "L1Analysis::L1AnalysisGCTDataFormat", &pL1gct_data);
 
   if (generatorSource_.label() != "none") 
-    tree_->Branch("Generator", "L1Analysis::L1AnalysisGeneratorDataFormat", &pL1generator_data, 32000, 3);
+    bookBranch("Generator", "L1Analysis::L1AnalysisGeneratorDataFormat", &pL1generator_data);
   
   if (simulationSource_.label() != "none") 
-    tree_->Branch("Simulation", "L1Analysis::L1AnalysisSimulationDataFormat", &pL1simulation_data, 32000, 3);
+    bookBranch("Simulation", "L1Analysis::L1AnalysisSimulationDataFormat", &pL1simulation_data);
   
   if (gmtSource_.label() != "none")   
-    tree_->Branch("GMT", "L1Analysis::L1AnalysisGMTDataFormat", &pL1gmt_data, 32000, 3);
+    bookBranch("GMT", "L1Analysis::L1AnalysisGMTDataFormat", &pL1gmt_data);
     
   if (gtSource_.label() != "none") 
-    tree_->Branch("GT", "L1Analysis::L1AnalysisGTDataFormat", &pL1gt_data, 32000, 3);
+    bookBranch("GT", "L1Analysis::L1AnalysisGTDataFormat", &pL1gt_data);
      
   if (rctSource_.label() != "none") 
-    tree_->Branch("RCT", "L1Analysis::L1AnalysisRCTDataFormat", &pL1rct_data, 32000, 3);
+    bookBranch("RCT", "L1Analysis::L1AnalysisRCTDataFormat", &pL1rct_data);
 
   if (dttfSource_.label() != "none") 
-  tree_->Branch("DTTF", "L1Analysis::L1AnalysisDTTFDataFormat", &pL1dttf_data, 32000, 3);
+  bookBranch("DTTF", "L1Analysis::L1AnalysisDTTFDataFormat", &pL1dttf_data);
   if (csctfTrkSource_.label() != "none" ||
       csctfLCTSource_.label() != "none" ||
       csctfStatusSource_.label() != "none" ||
       csctfDTStubsSource_.label() != "none" ) 
-  tree_->Branch("CSCTF", "L1Analysis::L1AnalysisCSCTFDataFormat", &pL1csctf_data, 32000, 3);
+  bookBranch("CSCTF", "L1Analysis::L1AnalysisCSCTFDataFormat", &pL1csctf_data);
 
   if (!(ecalSource_.label()=="none" && hcalSource_.label()=="none")) {
-    tree_->Branch("CALO", "L1Analysis::L1AnalysisCaloTPDataFormat", &pL1calotp_data, 32000, 3);
+    bookBranch("CALO", "L1Analysis::L1AnalysisCaloTPDataFormat", &pL1calotp_data);
+  }
+
+}
+
+// basket size, split level and compression of a branch from its PSet in
+// treeSettings, else from treeSettings.default. With splitTrees the branches
+// other than Event get their own tree, L1<name>Tree, filled with L1Tree
+void L1NtupleProducer::bookBranch(const char* name, const char* classname, void* address) {
+
+  edm::ParameterSet defaults = treeSettings_.getUntrackedParameter<edm::ParameterSet>("default", edm::ParameterSet());
+  edm::ParameterSet settings = treeSettings_.getUntrackedParameter<edm::ParameterSet>(name, edm::ParameterSet());
+  int basketSize = settings.getUntrackedParameter<int>("basketSize", defaults.getUntrackedParameter<int>("basketSize", 32000));
+  int splitLevel = settings.getUntrackedParameter<int>("splitLevel", defaults.getUntrackedParameter<int>("splitLevel", 3));
+  int algorithm  = settings.getUntrackedParameter<int>("algorithm", defaults.getUntrackedParameter<int>("algorithm", 0));
+  int level      = settings.getUntrackedParameter<int>("level", defaults.getUntrackedParameter<int>("level", -1));
+
+  TTree* tree = tree_;
+  if (splitTrees_ && std::string(name) != "Event") {
+    tree = tfs_->make<TTree>(("L1"+std::string(name)+"Tree").c_str(), ("L1"+std::string(name)+"Tree").c_str());
+    tree->SetAutoFlush(settings.getUntrackedParameter<long long>("autoFlush", treeSettings_.getUntrackedParameter<long long>("autoFlush", -30000000)));
+    trees_.push_back(tree);
   }
 
+  TBranch* branch = tree->Branch(name, classname, address, basketSize, splitLevel);
+  // level < 0 : compression of the output file
+  if (level >= 0 && algorithm > 0) branch->SetCompressionSettings(100*algorithm+level);
+  else if (level >= 0) branch->SetCompressionLevel(level);
+}
+
+struct BranchSize {
+  std::string name;
+  long long totBytes;
+  long long zipBytes;
+  bool operator<(const BranchSize& other) const { return zipBytes > other.zipBytes; }
+};
+
+// sizes of the branches and of their sub-branches, the sizes of a
+// subsystem branch ("*") include its sub-branches
+static void branchSizes(TObjArray* branches, const std::string& prefix, std::vector<BranchSize>& sizes,
+                        Option_t* option = "") {
+  for (int i=0; i<branches->GetEntriesFast(); i++) {
+    TBranch* branch = (TBranch*) branches->UncheckedAt(i);
+    BranchSize size;
+    size.name     = prefix+branch->GetName();
+    size.totBytes = branch->GetTotBytes(option);
+    size.zipBytes = branch->GetZipBytes(option);
+    if (size.totBytes > 0) sizes.push_back(size);
+  }
+}
+
+static void subBranchSizes(TObjArray* branches, const std::string& prefix, std::vector<BranchSize>& sizes) {
+  for (int i=0; i<branches->GetEntriesFast(); i++) {
+    TBranch* branch = (TBranch*) branches->UncheckedAt(i);
+    std::string name = prefix+branch->GetName()+"/";
+    branchSizes(branch->GetListOfBranches(), name, sizes);
+    subBranchSizes(branch->GetListOfBranches(), name, sizes);
+  }
+}
+
+static void printSizes(edm::LogInfo& log, const std::vector<BranchSize>& sizes, double zipTotal) {
+  log << std::setw(40) << std::left << "branch" << std::right << std::setw(14) << "bytes"
+      << std::setw(14) << "compressed" << std::setw(8) << "ratio" << std::setw(8) << "% file" << "\n";
+  for (std::vector<BranchSize>::const_iterator size = sizes.begin(); size != sizes.end(); ++size) {
+    log << std::setw(40) << std::left << size->name << std::right << std::setw(14) << size->totBytes
+        << std::setw(14) << size->zipBytes
+        << std::setw(8) << std::setprecision(3) << (size->zipBytes > 0 ? double(size->totBytes)/size->zipBytes : 0.)
+        << std::setw(8) << std::setprecision(3) << 100.*size->zipBytes/zipTotal << "\n";
+  }
+}
+
+// uncompressed and compressed sizes of the subsystem branches, then of
+// their sub-branches, largest first
+void L1NtupleProducer::reportSizes() {
+
+  std::vector<BranchSize> subsystems, sizes;
+  long long totBytes = 0, zipBytes = 0;
+  for (unsigned int t=0; t<trees_.size(); t++) {
+    std::string prefix = splitTrees_ ? std::string(trees_[t]->GetName())+"/" : "";
+    branchSizes(trees_[t]->GetListOfBranches(), prefix, subsystems, "*");
+    subBranchSizes(trees_[t]->GetListOfBranches(), prefix, sizes);
+    totBytes += trees_[t]->GetTotBytes();
+    zipBytes += trees_[t]->GetZipBytes();
+  }
+  std::sort(subsystems.begin(), subsystems.end());
+  std::sort(sizes.begin(), sizes.end());
+
+  double zipTotal = zipBytes > 0 ? double(zipBytes) : 1.;
+  edm::LogInfo log("L1NtupleProducer");
+  log << "L1Tree : " << tree_->GetEntries() << " entries, " << totBytes << " bytes, "
+      << zipBytes << " compressed\n";
+  printSizes(log, subsystems, zipTotal);
+  log << "\n";
+  printSizes(log, sizes, zipTotal);
 }
 
 void L1NtupleProducer::initCSCTF() {
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+# local stand-in for lumiCalc.py lumibyls, for testing scripts/GetLumi.py
+# without access to the luminosity database :
+#   GetLumi.py -c "python lumiCalcStandIn.py" Cert.json
+# Each run gets 10 + (run % 40) lumisections with a delivered luminosity
+# depending on the run, lumisection and normalisation, 95% of it recorded.
+# Runs listed in the LUMISTANDIN_FAIL environment variable fail.
+
+import os, sys, getopt
+
+opts, args = getopt.getopt(sys.argv[1:], "n:c:r:o:")
+
+norm = 1.
+run = 0
+output = ''
+for opt, arg in opts:
+    if opt=='-n':
+        norm=float(arg)
+    if opt=='-r':
+        run=int(arg)
+    if opt=='-o':
+        output=arg
+
+if str(run) in os.environ.get('LUMISTANDIN_FAIL', '').split(','):
+    print 'No luminosity information for run '+str(run)
+    sys.exit(1)
+
+out = open(output, 'w')
+out.write('Run,LS,Delivered(/ub),Recorded(/ub)\n')
+for ls in range(1, 11 + run % 40):
+    delivered = norm * 1000. * (1 + (run + ls) % 7)
+    out.write('%d,%d,%f,%f\n' % (run, ls, delivered, 0.95 * delivered))
+out.close()